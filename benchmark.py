@@ -0,0 +1,233 @@
+"""
+Benchmark da varredura, dos filtros e das operações de exclusão e
+movimentação sobre árvores sintéticas.
+
+As árvores são geradas de forma determinística (mesma semente, mesma
+árvore) com arquivos esparsos, que ocupam um único bloco em disco.
+Como a varredura compara o espaço em disco, o limite padrão é baixo
+para que todos os arquivos passem por ele.
+O resultado sai em JSON para comparar execuções:
+
+    python benchmark.py --depth 3 --fanout 8 --files 20 > antes.json
+    python benchmark.py --depth 3 --fanout 8 --files 20 > depois.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from controller import create_scanner, excluir_arquivos, mover_arquivos
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+EXTENSIONS = [".mp4", ".mkv", ".jpg", ".png", ".pdf", ".docx", ".zip", ".tar", ".log", ".bin", ""]
+SIZE_DISTRIBUTIONS = ("lognormal", "uniform", "fixed")
+
+# Filtros medidos no custo de filtragem, no formato do config.json.
+# Ocultos incluídos: a varredura filtrada vê os mesmos arquivos que a base
+BENCH_FILTERS = {"file_types": ["video", "archive"], "max_size_mb": 4096, "days_old": 30,
+                 "include_hidden": True}
+
+
+def _file_size(rng, distribution, mean_bytes):
+    if distribution == "fixed":
+        return mean_bytes
+    if distribution == "uniform":
+        return rng.randint(0, 2 * mean_bytes)
+    # Muitos arquivos pequenos e poucos muito grandes
+    return int(rng.lognormvariate(0, 1.5) * mean_bytes / 3)
+
+
+def generate_tree(root, depth=3, fanout=5, files=20, distribution="lognormal", mean_mb=50, seed=0):
+    """
+    Cria uma árvore sintética em root com fanout subpastas por nível até
+    depth níveis e files arquivos esparsos por pasta, cada um com um
+    bloco gravado (um arquivo sem blocos não passaria em nenhum limite).
+    Retorna {"dirs": n, "files": n, "bytes": total aparente}.
+    """
+    rng = random.Random(seed)
+    mean_bytes = int(mean_mb * 1024 * 1024)
+    now = 1_700_000_000
+    counts = {"dirs": 0, "files": 0, "bytes": 0}
+    pending = [(root, 0)]
+    while pending:
+        path, level = pending.pop()
+        os.makedirs(path, exist_ok=True)
+        counts["dirs"] += 1
+        for i in range(files):
+            # Nomes únicos na árvore toda: a movimentação junta tudo numa pasta
+            name = f"f{counts['dirs']:04d}_{i:05d}{EXTENSIONS[rng.randrange(len(EXTENSIONS))]}"
+            if rng.random() < 0.05:
+                name = "." + name
+            file_path = os.path.join(path, name)
+            size = _file_size(rng, distribution, mean_bytes)
+            with open(file_path, "wb") as f:
+                if size:
+                    f.write(b"\0")
+                f.truncate(size)
+            mtime = now - rng.randrange(365 * 86400)
+            os.utime(file_path, (mtime, mtime))
+            counts["files"] += 1
+            counts["bytes"] += size
+        if level < depth:
+            pending.extend((os.path.join(path, f"d{j:03d}"), level + 1) for j in range(fanout))
+    return counts
+
+
+def _timed(func, repeat):
+    """Executa func repeat vezes; retorna (tempos, último resultado)"""
+    times = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    return times, result
+
+
+def _peak_memory(func):
+    """Pico de memória alocada pelo Python durante func, em bytes"""
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def _summary(times, count):
+    best = min(times)
+    return {
+        "runs": len(times),
+        "best_s": best,
+        "median_s": statistics.median(times),
+        "items": count,
+        "items_per_sec": count / best if best > 0 else None,
+    }
+
+
+def bench_scan(root, limit_mb, workers, filters, repeat):
+    def run():
+        scanner = create_scanner(root, limit_mb, workers=workers, filters=filters)
+        matched = sum(1 for _ in scanner.scan())
+        return scanner, matched
+
+    times, (scanner, matched) = _timed(run, repeat)
+    result = _summary(times, scanner.files_seen + scanner.dirs_visited)
+    result.update({
+        "workers": workers,
+        "dirs": scanner.dirs_visited,
+        "files": scanner.files_seen,
+        "matched": matched,
+        "peak_bytes": _peak_memory(run),
+    })
+    return result
+
+
+def _bench_operation(workdir, args, operation):
+    """Gera uma árvore nova, aplica operation nos arquivos e mede"""
+    root = os.path.join(workdir, "op")
+    shutil.rmtree(root, ignore_errors=True)
+    generate_tree(root, args.op_depth, args.fanout, args.files, args.distribution, args.mean_mb, args.seed)
+    paths = [entry.path for entry in create_scanner(root, 0.000001, workers=args.workers).scan()]
+    start = time.perf_counter()
+    erros = operation(paths)
+    elapsed = time.perf_counter() - start
+    shutil.rmtree(root, ignore_errors=True)
+    result = _summary([elapsed], len(paths))
+    result["errors"] = len(erros)
+    return result
+
+
+def run(args, workdir):
+    tree = os.path.join(workdir, "tree")
+    start = time.perf_counter()
+    counts = generate_tree(tree, args.depth, args.fanout, args.files, args.distribution, args.mean_mb, args.seed)
+    generate_s = time.perf_counter() - start
+
+    results = {"generate": dict(counts, seconds=generate_s), "scan": [], "filter": []}
+    for workers in args.scan_workers:
+        results["scan"].append(bench_scan(tree, args.limit_mb, workers, None, args.repeat))
+        filtered = bench_scan(tree, args.limit_mb, workers, BENCH_FILTERS, args.repeat)
+        base = results["scan"][-1]["best_s"]
+        filtered["overhead_s"] = filtered["best_s"] - base
+        results["filter"].append(filtered)
+
+    if not args.skip_operations:
+        results["delete"] = _bench_operation(
+            workdir, args, lambda paths: excluir_arquivos(paths, workers=args.workers))
+        dest = args.move_dest or os.path.join(workdir, "moved")
+        os.makedirs(dest, exist_ok=True)
+        results["move"] = _bench_operation(
+            workdir, args, lambda paths: mover_arquivos(paths, dest, workers=args.workers))
+        results["move"]["destination"] = dest
+        if not args.move_dest:
+            shutil.rmtree(dest, ignore_errors=True)
+
+    if resource is not None:
+        # KB no Linux, bytes no macOS
+        results["max_rss"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return results
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Benchmark do Limpador de Arquivos Grandes")
+    parser.add_argument("--depth", type=int, default=3, help="níveis de subpastas (padrão: 3)")
+    parser.add_argument("--fanout", type=int, default=5, help="subpastas por pasta (padrão: 5)")
+    parser.add_argument("--files", type=int, default=20, help="arquivos por pasta (padrão: 20)")
+    parser.add_argument("--distribution", choices=SIZE_DISTRIBUTIONS, default="lognormal",
+                        help="distribuição dos tamanhos (padrão: lognormal)")
+    parser.add_argument("--mean-mb", type=float, default=50, help="tamanho médio dos arquivos em MB")
+    parser.add_argument("--seed", type=int, default=0, help="semente da árvore sintética")
+    parser.add_argument("--limit-mb", default="0.001",
+                        help="espaço em disco mínimo da varredura (padrão: 0.001, todos os arquivos)")
+    parser.add_argument("--scan-workers", type=int, nargs="+", default=[1, 8],
+                        help="números de threads de varredura a medir (padrão: 1 8)")
+    parser.add_argument("--workers", type=int, default=8, help="threads de exclusão e movimentação")
+    parser.add_argument("--repeat", type=int, default=3, help="repetições de cada varredura")
+    parser.add_argument("--op-depth", type=int, default=2, help="níveis da árvore usada em exclusão/movimentação")
+    parser.add_argument("--move-dest", help="pasta de destino da movimentação (ex.: outro disco)")
+    parser.add_argument("--skip-operations", action="store_true", help="medir apenas varredura e filtros")
+    parser.add_argument("--workdir", help="pasta onde gerar as árvores (padrão: temporária)")
+    parser.add_argument("--output", help="arquivo JSON de saída (padrão: saída padrão)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    workdir = args.workdir or tempfile.mkdtemp(prefix="limpador-bench-")
+    try:
+        results = run(args, workdir)
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "params": {key: value for key, value in vars(args).items() if key not in ("output", "workdir")},
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
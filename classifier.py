@@ -0,0 +1,154 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+# Categorias padrão; o config.json pode acrescentar ou redefinir
+# categorias em "categories": {"nome": [".ext", ...]}
+DEFAULT_CATEGORIES = {
+    "video": [".mp4", ".avi", ".mkv", ".mov", ".wmv", ".flv", ".webm", ".m4v"],
+    "image": [".jpg", ".jpeg", ".png", ".gif", ".bmp", ".tiff", ".svg", ".webp"],
+    "document": [".pdf", ".doc", ".docx", ".txt", ".rtf", ".odt", ".xls", ".xlsx", ".ppt", ".pptx"],
+    "archive": [".zip", ".rar", ".7z", ".tar", ".gz", ".bz2", ".xz"],
+}
+
+OTHER = "other"
+
+# Modos de identificação pelo conteúdo
+SNIFF_OFF = "off"
+SNIFF_UNKNOWN = "unknown"   # só arquivos sem extensão conhecida
+SNIFF_ALL = "all"           # o conteúdo prevalece sobre a extensão
+SNIFF_MODES = (SNIFF_OFF, SNIFF_UNKNOWN, SNIFF_ALL)
+
+# Bytes lidos do início do arquivo; o tar tem a assinatura no offset 257
+HEADER_BYTES = 512
+
+# (offset, assinatura, categoria)
+SIGNATURES = [
+    (0, b"\x1a\x45\xdf\xa3", "video"),          # mkv, webm
+    (0, b"FLV\x01", "video"),
+    (0, b"\x30\x26\xb2\x75\x8e\x66\xcf\x11", "video"),  # wmv/asf
+    (0, b"\xff\xd8\xff", "image"),
+    (0, b"\x89PNG\r\n\x1a\n", "image"),
+    (0, b"GIF87a", "image"),
+    (0, b"GIF89a", "image"),
+    (0, b"II*\x00", "image"),                    # tiff
+    (0, b"MM\x00*", "image"),
+    (0, b"%PDF-", "document"),
+    (0, b"{\\rtf", "document"),
+    (0, b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1", "document"),  # doc/xls/ppt antigos
+    (0, b"PK\x03\x04", "archive"),
+    (0, b"Rar!\x1a\x07", "archive"),
+    (0, b"7z\xbc\xaf\x27\x1c", "archive"),
+    (0, b"\x1f\x8b", "archive"),
+    (0, b"BZh", "archive"),
+    (0, b"\xfd7zXZ\x00", "archive"),
+    (257, b"ustar", "archive"),
+]
+
+
+def _sniff_header(header):
+    """Categoria a partir dos primeiros bytes, ou None"""
+    for offset, magic, category in SIGNATURES:
+        if header.startswith(magic, offset):
+            return category
+    # Contêineres com o tipo após o cabeçalho
+    if header[4:8] == b"ftyp":
+        return "image" if header[8:12] in (b"avif", b"heic", b"heix", b"mif1") else "video"
+    if header[:4] == b"RIFF":
+        if header[8:12] == b"WEBP":
+            return "image"
+        if header[8:12] == b"AVI ":
+            return "video"
+    return None
+
+
+@lru_cache(maxsize=65536)
+def _sniff_cached(path, size, mtime_ns):
+    # size e mtime_ns fazem parte da chave: um arquivo reescrito é lido de novo
+    try:
+        with open(path, "rb") as f:
+            return _sniff_header(f.read(HEADER_BYTES))
+    except OSError:
+        return None
+
+
+def sniff_file(path):
+    """Lê o cabeçalho de um arquivo e retorna a categoria, ou None"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return _sniff_cached(path, st.st_size, st.st_mtime_ns)
+
+
+class Classifier:
+    """
+    Classifica arquivos em categorias pela extensão, num dict consultado
+    em O(1). Com sniff em "unknown" ou "all", o cabeçalho do arquivo é
+    lido para identificar arquivos sem extensão ou com extensão enganosa;
+    classify_many distribui essas leituras num pool de threads.
+    """
+
+    def __init__(self, categories=None, sniff=SNIFF_OFF, workers=4):
+        merged = {name: list(exts) for name, exts in DEFAULT_CATEGORIES.items()}
+        for name, exts in (categories or {}).items():
+            merged[name] = list(exts)
+        self.by_extension = {}
+        for name, exts in merged.items():
+            for ext in exts:
+                ext = ext.lower()
+                self.by_extension[ext if ext.startswith(".") else "." + ext] = name
+        self.categories = list(merged) + [OTHER]
+        self.sniff = sniff if sniff in SNIFF_MODES else SNIFF_OFF
+        self.workers = max(1, workers)
+        self._executor = None
+
+    def by_name(self, path):
+        """Categoria só pela extensão"""
+        return self.by_extension.get(os.path.splitext(path)[1].lower(), OTHER)
+
+    def _needs_sniff(self, category):
+        return self.sniff == SNIFF_ALL or (self.sniff == SNIFF_UNKNOWN and category == OTHER)
+
+    def category(self, path):
+        """Categoria de um arquivo, lendo o cabeçalho se o modo pedir"""
+        category = self.by_name(path)
+        if self._needs_sniff(category):
+            category = sniff_file(path) or category
+        return category
+
+    def classify_many(self, paths):
+        """Categorias de vários arquivos, na mesma ordem"""
+        categories = [self.by_name(path) for path in paths]
+        if self.sniff == SNIFF_OFF:
+            return categories
+        pending = [i for i, category in enumerate(categories) if self._needs_sniff(category)]
+        if len(pending) == 1:
+            i = pending[0]
+            categories[i] = sniff_file(paths[i]) or categories[i]
+        elif pending:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers)
+            sniffed = self._executor.map(sniff_file, [paths[i] for i in pending])
+            for i, category in zip(pending, sniffed):
+                categories[i] = category or categories[i]
+        return categories
+
+    def extensions_of(self, categories):
+        """Extensões das categorias indicadas"""
+        return [ext for ext, name in self.by_extension.items() if name in categories]
+
+
+_default = Classifier()
+
+
+def get_classifier():
+    """Classificador em uso, configurado por configure_classifier"""
+    return _default
+
+
+def configure_classifier(categories=None, sniff=SNIFF_OFF, workers=4):
+    """Substitui o classificador em uso pelas categorias do config.json"""
+    global _default
+    _default = Classifier(categories, sniff, workers)
+    return _default
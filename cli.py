@@ -0,0 +1,343 @@
+"""
+Interface de linha de comando, sem dependência de interface gráfica.
+
+Exemplos:
+    python main.py scan /dados --min-mb 500 --types video,archive
+    python main.py scan /dados --top-k 100 --format csv > maiores.csv
+    python main.py scan /dados --days-old 90 | python main.py delete -
+    python main.py move /backup arquivo1 arquivo2 --verify
+    python main.py scan /var/log --min-mb 50 | python main.py compress - --codec xz
+    python main.py scan /dados --days-old 365 | python main.py quarantine -
+    python main.py restore --last
+    python main.py tree /dados --depth 2
+    python main.py scan /dados --min-mb 10 --snapshot hoje.snap > /dev/null
+    python main.py diff ontem.snap hoje.snap --limit 10
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from controller import (compare_snapshots, comprimir_arquivos, configure_categories, create_scanner,
+                        directory_tree, excluir_arquivos, limpar_quarentena, listar_quarentena, mover_arquivos,
+                        quarentenar_arquivos, restaurar_arquivos, save_snapshot, validate_top_k)
+from scanner import TopK, disk_usage
+from utils import format_size
+
+# Intervalo máximo entre flushes da saída, para o consumidor do pipe
+FLUSH_INTERVAL = 0.2
+
+
+class _Output:
+    """Escreve registros em NDJSON ou CSV com flush periódico"""
+
+    def __init__(self, fmt, fields, stream=None):
+        self.stream = stream or sys.stdout
+        self.fields = fields
+        self.fmt = fmt
+        self._last_flush = time.monotonic()
+        if fmt == "csv":
+            self._csv = csv.writer(self.stream)
+            self._csv.writerow(fields)
+
+    def write(self, record):
+        if self.fmt == "csv":
+            self._csv.writerow([record[field] for field in self.fields])
+        else:
+            self.stream.write(json.dumps(record, ensure_ascii=False) + "\n")
+        now = time.monotonic()
+        if now - self._last_flush >= FLUSH_INTERVAL:
+            self.stream.flush()
+            self._last_flush = now
+
+    def close(self):
+        self.stream.flush()
+
+
+def _load_filters(args):
+    """
+    Monta os filtros no formato do config.json a partir dos argumentos.
+    As categorias do config.json e o modo de identificação pelo conteúdo
+    são aplicados ao classificador.
+    """
+    filters = {}
+    categories = None
+    sniff = "off"
+    if args.config:
+        with open(args.config, "r") as f:
+            config = json.load(f)
+        filters = dict(config.get("filters", {}))
+        categories = config.get("categories")
+        sniff = config.get("content_sniffing", "off")
+    if args.sniff:
+        sniff = args.sniff
+    if categories or sniff != "off":
+        configure_categories(categories, sniff, workers=args.workers)
+    if args.types:
+        filters["file_types"] = [t.strip() for t in args.types.split(",") if t.strip()]
+    if args.max_mb:
+        filters["max_size_mb"] = args.max_mb
+    if args.days_old:
+        filters["days_old"] = args.days_old
+    if args.hidden is not None:
+        filters["include_hidden"] = args.hidden
+    patterns = list(args.exclude)
+    if args.exclude_from:
+        with open(args.exclude_from, "r") as f:
+            patterns.extend(line.rstrip("\n") for line in f)
+    if patterns:
+        filters["exclude_patterns"] = list(filters.get("exclude_patterns", [])) + patterns
+    if args.one_file_system:
+        filters["one_file_system"] = True
+    if args.follow_symlinks:
+        filters["follow_symlinks"] = True
+    return filters or None
+
+
+def _read_paths(args):
+    """Caminhos dos argumentos ou, com "-", da entrada padrão (texto ou NDJSON)"""
+    if args.paths != ["-"]:
+        return args.paths
+    paths = []
+    for line in sys.stdin:
+        line = line.rstrip("\n")
+        if not line:
+            continue
+        if line.startswith("{"):
+            line = json.loads(line)["path"]
+        paths.append(line)
+    return paths
+
+
+def cmd_scan(args):
+    if args.top_k:
+        is_valid, error_msg = validate_top_k(args.top_k)
+        if not is_valid:
+            raise ValueError(f"Erro no limite de resultados: {error_msg}")
+
+    scanner = create_scanner(args.folder, args.min_mb, workers=args.workers,
+                             filters=_load_filters(args), use_index=args.index,
+                             aggregate_dirs=bool(args.snapshot), revalidate=args.revalidate)
+    out = _Output(args.format, ["path", "size", "disk", "mtime"])
+    entries = scanner.scan()
+    if args.top_k:
+        maiores = TopK(args.top_k).extend(entries)
+        with scanner.metrics.phase("sort"):
+            entries = maiores.items()
+    found = []
+    for entry in entries:
+        out.write({"path": entry.path, "size": entry.size, "disk": disk_usage(entry), "mtime": entry.mtime})
+        if args.snapshot:
+            found.append(entry)
+    out.close()
+    if args.snapshot:
+        save_snapshot(args.snapshot, found, scanner)
+    if args.stats:
+        print(json.dumps(scanner.stats(), ensure_ascii=False), file=sys.stderr)
+    elif scanner.metrics.error_count:
+        print(f"{scanner.metrics.error_count} erros de acesso (detalhes com --stats)", file=sys.stderr)
+    return 0
+
+
+def cmd_tree(args):
+    raiz = directory_tree(args.folder, workers=args.workers, filters=_load_filters(args), use_index=args.index,
+                          revalidate=args.revalidate)
+    json.dump(raiz.to_dict(args.depth), sys.stdout, ensure_ascii=False, indent=2)
+    sys.stdout.write("\n")
+    return 0
+
+
+def cmd_diff(args):
+    resultado = compare_snapshots(args.old, args.new, args.limit)
+    json.dump(resultado.to_dict(), sys.stdout, ensure_ascii=False, indent=2)
+    sys.stdout.write("\n")
+    print(f"Variação: {'+' if resultado.growth > 0 else ''}{format_size(resultado.growth)}", file=sys.stderr)
+    return 0
+
+
+def _write_results(args, operation):
+    out = _Output(args.format, ["path", "ok", "error"])
+    reported = set()
+
+    def on_result(result):
+        reported.add(result.path)
+        out.write({"path": result.path, "ok": result.ok, "error": result.error})
+
+    erros = operation(on_result)
+    out.close()
+    for path, erro in erros:
+        # Erros de validação do destino não passam por on_result
+        if path not in reported:
+            print(f"{path}: {erro}", file=sys.stderr)
+    return 1 if erros else 0
+
+
+def cmd_delete(args):
+    paths = _read_paths(args)
+    return _write_results(
+        args, lambda on_result: excluir_arquivos(paths, workers=args.workers, on_result=on_result))
+
+
+def cmd_move(args):
+    paths = _read_paths(args)
+    return _write_results(
+        args, lambda on_result: mover_arquivos(paths, args.destination, workers=args.workers,
+                                               verify=args.verify, on_result=on_result))
+
+
+def cmd_quarantine(args):
+    if args.list:
+        out = _Output(args.format, ["path", "size", "time", "id"])
+        for entry in listar_quarentena():
+            out.write({"path": entry.path, "size": entry.size, "time": entry.time, "id": entry.id})
+        out.close()
+        return 0
+    if not args.paths:
+        raise ValueError("Indique os arquivos ou --list")
+    paths = _read_paths(args)
+    return _write_results(args, lambda on_result: quarentenar_arquivos(paths, on_result=on_result))
+
+
+def cmd_restore(args):
+    ids = None
+    if args.paths:
+        # Caminhos originais -> ids; vale o registro mais recente de cada caminho
+        by_path = {entry.path: entry.id for entry in reversed(listar_quarentena())}
+        ids = [by_path.get(os.path.abspath(path), path) for path in _read_paths(args)]
+    elif not args.last and not args.all:
+        raise ValueError("Indique os arquivos, --last ou --all")
+
+    def operation(on_result):
+        return restaurar_arquivos(ids, ultimo_lote=args.last, on_result=on_result)[1]
+
+    return _write_results(args, operation)
+
+
+def cmd_purge(args):
+    erros, liberado = limpar_quarentena(args.older_than)
+    for path, erro in erros:
+        print(f"{path}: {erro}", file=sys.stderr)
+    print(f"Espaço liberado: {format_size(liberado)}", file=sys.stderr)
+    return 1 if erros else 0
+
+
+def cmd_compress(args):
+    paths = _read_paths(args)
+    economizado = [0]
+
+    def operation(on_result):
+        erros, economizado[0] = comprimir_arquivos(
+            paths, args.codec, workers=args.workers or None, on_result=on_result,
+            destino_tar=args.tar, nivel=args.level)
+        return erros
+
+    status = _write_results(args, operation)
+    print(f"Espaço liberado: {format_size(economizado[0])}", file=sys.stderr)
+    return status
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="limpador", description="Limpador de Arquivos Grandes (modo texto)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    scan = sub.add_parser("scan", help="lista arquivos grandes à medida que são encontrados")
+    scan.add_argument("--min-mb", default="100", help="espaço mínimo ocupado em disco, em MB (padrão: 100)")
+    scan.add_argument("--top-k", type=int, default=0, help="apenas os N que mais ocupam disco (saída ao final)")
+    scan.add_argument("--stats", action="store_true", help="imprimir as métricas da varredura (JSON) em stderr")
+    scan.add_argument("--snapshot", metavar="ARQUIVO", help="gravar um snapshot da varredura para comparar depois")
+    scan.set_defaults(func=cmd_scan)
+
+    tree = sub.add_parser("tree", help="uso de disco acumulado por pasta, em JSON")
+    tree.add_argument("--depth", type=int, default=1, help="níveis de subpastas na saída (padrão: 1)")
+    tree.set_defaults(func=cmd_tree)
+
+    diff = sub.add_parser("diff", help="compara dois snapshots: o que apareceu, sumiu ou cresceu, em JSON")
+    diff.add_argument("old", help="snapshot anterior")
+    diff.add_argument("new", help="snapshot mais recente")
+    diff.add_argument("--limit", type=int, default=20, help="itens de cada lista (padrão: 20)")
+    diff.set_defaults(func=cmd_diff)
+
+    scan.add_argument("folder", nargs="+", help="pastas a analisar, varridas ao mesmo tempo")
+    tree.add_argument("folder", help="pasta a analisar")
+    for command in (scan, tree):
+        command.add_argument("--workers", type=int, default=8, help="threads de varredura (padrão: 8)")
+        command.add_argument("--types", help="categorias: video,image,document,archive,other ou do config.json")
+        command.add_argument("--sniff", choices=["off", "unknown", "all"],
+                             help="identificar o tipo pelo conteúdo: arquivos sem extensão conhecida ou todos")
+        command.add_argument("--max-mb", type=int, default=0, help="tamanho máximo em MB")
+        command.add_argument("--days-old", type=int, default=0, help="apenas arquivos mais antigos que N dias")
+        command.add_argument("--hidden", action=argparse.BooleanOptionalAction, default=None,
+                             help="incluir arquivos e pastas ocultos (padrão: incluir)")
+        command.add_argument("--exclude", action="append", default=[], metavar="PADRÃO",
+                             help="ignorar caminhos no estilo .gitignore (pode repetir)")
+        command.add_argument("--exclude-from", metavar="ARQUIVO", help="ler padrões de exclusão de um arquivo")
+        command.add_argument("--one-file-system", action="store_true",
+                             help="não entrar em pastas de outros sistemas de arquivos")
+        command.add_argument("--follow-symlinks", action="store_true",
+                             help="seguir links simbólicos de pastas (com proteção contra ciclos)")
+        command.add_argument("--config", help="usar os filtros salvos num config.json")
+        command.add_argument("--index", action="store_true",
+                             help="usar o índice para reanálise incremental; só relê pastas alteradas, "
+                                  "então um arquivo que cresceu sem mudar a pasta mantém o tamanho antigo")
+        command.add_argument("--revalidate", action="store_true",
+                             help="reler todas as pastas e reconstruir o índice (implica --index)")
+
+    delete = sub.add_parser("delete", help="exclui os arquivos indicados")
+    delete.add_argument("paths", nargs="+", help='arquivos, ou "-" para ler da entrada padrão')
+    delete.add_argument("--workers", type=int, default=8)
+    delete.set_defaults(func=cmd_delete)
+
+    move = sub.add_parser("move", help="move os arquivos indicados para uma pasta")
+    move.add_argument("destination", help="pasta de destino")
+    move.add_argument("paths", nargs="+", help='arquivos, ou "-" para ler da entrada padrão')
+    move.add_argument("--workers", type=int, default=4)
+    move.add_argument("--verify", action="store_true", help="conferir a cópia por hash antes de remover a origem")
+    move.set_defaults(func=cmd_move)
+
+    compress = sub.add_parser("compress", help="comprime os arquivos indicados e remove os originais")
+    compress.add_argument("paths", nargs="+", help='arquivos, ou "-" para ler da entrada padrão')
+    compress.add_argument("--codec", choices=["gzip", "bz2", "xz"], default="gzip", help="compressão (padrão: gzip)")
+    compress.add_argument("--tar", metavar="ARQUIVO", help="juntar tudo num único tar comprimido")
+    compress.add_argument("--level", type=int, help="nível de compressão do codec")
+    compress.add_argument("--workers", type=int, default=0, help="processos (padrão: um por núcleo)")
+    compress.set_defaults(func=cmd_compress)
+
+    quarantine = sub.add_parser("quarantine", help="exclui os arquivos indicados movendo-os para a quarentena")
+    quarantine.add_argument("paths", nargs="*", help='arquivos, ou "-" para ler da entrada padrão')
+    quarantine.add_argument("--list", action="store_true", help="listar os arquivos em quarentena")
+    quarantine.set_defaults(func=cmd_quarantine)
+
+    restore = sub.add_parser("restore", help="devolve arquivos da quarentena ao lugar original")
+    restore.add_argument("paths", nargs="*", help='caminhos originais, ou "-" para ler da entrada padrão')
+    restore.add_argument("--last", action="store_true", help="desfazer a última exclusão")
+    restore.add_argument("--all", action="store_true", help="restaurar tudo")
+    restore.set_defaults(func=cmd_restore)
+
+    purge = sub.add_parser("purge", help="elimina de vez arquivos da quarentena")
+    purge.add_argument("--older-than", type=int, default=0, metavar="DIAS",
+                       help="só os que estão há mais de N dias na quarentena (padrão: todos)")
+    purge.set_defaults(func=cmd_purge)
+
+    for command in (scan, delete, move, compress, quarantine, restore):
+        command.add_argument("--format", choices=["ndjson", "csv"], default="ndjson")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        return args.func(args)
+    except ValueError as e:
+        print(str(e), file=sys.stderr)
+        return 2
+    except BrokenPipeError:
+        # Consumidor do pipe encerrou (ex.: head)
+        sys.stderr.close()
+        return 0
+    except KeyboardInterrupt:
+        return 130
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,268 @@
+import bz2
+import errno
+import gzip
+import hashlib
+import lzma
+import multiprocessing
+import os
+import shutil
+import stat
+import tarfile
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from operations import VerificationError, describe_error
+from scanner import disk_usage, entry_from_stat
+
+# Formato -> (função de abertura, sufixo do arquivo, modo do tarfile)
+CODECS = {
+    "gzip": (gzip.open, ".gz", "gz"),
+    "bz2": (bz2.open, ".bz2", "bz2"),
+    "xz": (lzma.open, ".xz", "xz"),
+}
+
+# Extensões de arquivos que já estão comprimidos
+COMPRESSED_EXTENSIONS = {".gz", ".tgz", ".bz2", ".tbz2", ".xz", ".txz", ".zst", ".lz4", ".zip", ".7z", ".rar"}
+
+# Bytes lidos e gravados por vez: a memória fica limitada mesmo em
+# arquivos de vários GB
+CHUNK_SIZE = 1024 * 1024
+
+# Resultado da compressão de um arquivo. output é o arquivo gerado e
+# saved o espaço em disco liberado; no tar, saved é o espaço do original
+# e o do tar é descontado do total por quem chama.
+CompressResult = namedtuple("CompressResult", ["path", "ok", "error", "output", "saved"])
+
+
+class CompressionRefused(OSError):
+    """Arquivo que não deve ser comprimido (links físicos, alterado durante a leitura)"""
+
+
+def _describe(error):
+    if isinstance(error, VerificationError):
+        return "Arquivo comprimido não confere com o original"
+    if isinstance(error, CompressionRefused):
+        return error.strerror
+    return describe_error(error)
+
+
+def _level_args(codec, level):
+    if level is None:
+        return {}
+    return {"preset": level} if codec == "xz" else {"compresslevel": level}
+
+
+def _stream_digest(f):
+    """(bytes, hash) do conteúdo lido de f em blocos"""
+    digest = hashlib.blake2b()
+    size = 0
+    for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+        digest.update(chunk)
+        size += len(chunk)
+    return size, digest.digest()
+
+
+def _check_source(path):
+    """lstat de um arquivo que pode ser comprimido e removido"""
+    st = os.lstat(path)
+    if not stat.S_ISREG(st.st_mode):
+        raise IsADirectoryError(errno.EISDIR, "Não é um arquivo", path)
+    if st.st_nlink > 1:
+        # Remover um dos links não libera espaço
+        raise CompressionRefused(errno.EMLINK, "Arquivo com vários links físicos", path)
+    return st
+
+
+def _check_unchanged(path, st):
+    current = os.lstat(path)
+    if (current.st_size, current.st_mtime_ns) != (st.st_size, st.st_mtime_ns):
+        raise CompressionRefused(errno.EBUSY, "Arquivo alterado durante a compressão", path)
+
+
+def _fsync(path):
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _compress_one(path, codec, level):
+    """
+    Comprime path em path + sufixo, confere o resultado descomprimindo-o
+    e só então remove o original. Roda num processo do pool.
+    """
+    opener, suffix, _ = CODECS[codec]
+    target = path + suffix
+    part = None
+    try:
+        st = _check_source(path)
+        if os.path.splitext(path)[1].lower() in COMPRESSED_EXTENSIONS:
+            raise CompressionRefused(errno.EINVAL, "Arquivo já comprimido", path)
+        if os.path.lexists(target):
+            raise FileExistsError(errno.EEXIST, "Destino já existe", target)
+        folder, name = os.path.split(target)
+        part = os.path.join(folder, f".{name}.part")
+        digest = hashlib.blake2b()
+        with open(path, "rb") as src, opener(part, "wb", **_level_args(codec, level)) as dst:
+            for chunk in iter(lambda: src.read(CHUNK_SIZE), b""):
+                digest.update(chunk)
+                dst.write(chunk)
+        _check_unchanged(path, st)
+        _fsync(part)
+        with opener(part, "rb") as f:
+            if _stream_digest(f) != (st.st_size, digest.digest()):
+                raise VerificationError(errno.EIO, "Falha na verificação", path)
+        saved = disk_usage(entry_from_stat(path, st)) - disk_usage(entry_from_stat(part, os.stat(part)))
+        if saved <= 0:
+            # Conteúdo já comprimido ou aleatório: o original fica
+            raise CompressionRefused(errno.EFBIG, "A compressão não reduz o espaço ocupado", path)
+        shutil.copystat(path, part)
+        os.rename(part, target)
+        part = None
+        os.remove(path)
+    except OSError as e:
+        if part is not None and os.path.exists(part):
+            os.remove(part)
+        return CompressResult(path, False, _describe(e), None, 0)
+    return CompressResult(path, True, None, target, saved)
+
+
+def _pool_context():
+    # A interface tem threads em execução: fork copiaria locks em uso
+    return multiprocessing.get_context("spawn")
+
+
+def compress_files(paths, codec="gzip", workers=None, level=None, progress=None, on_result=None):
+    """
+    Comprime cada arquivo em arquivo.gz, .bz2 ou .xz ao lado do original,
+    com um processo por núcleo (workers=None). A leitura é feita em blocos
+    de CHUNK_SIZE e o original só é removido depois que o comprimido é
+    descomprimido e confere por hash.
+    progress(feitos, total) e on_result(CompressResult) são chamados no
+    thread chamador. Retorna um CompressResult por arquivo.
+    """
+    if codec not in CODECS:
+        raise ValueError(f"Formato desconhecido: {codec}")
+    paths = list(paths)
+    total = len(paths)
+    workers = min(workers or os.cpu_count() or 1, max(1, total))
+    results = []
+
+    def done(result):
+        results.append(result)
+        if on_result:
+            on_result(result)
+        if progress:
+            progress(len(results), total)
+
+    if workers == 1:
+        for path in paths:
+            done(_compress_one(path, codec, level))
+        return results
+    with ProcessPoolExecutor(max_workers=workers, mp_context=_pool_context()) as executor:
+        futures = [executor.submit(_compress_one, path, codec, level) for path in paths]
+        for future in as_completed(futures):
+            done(future.result())
+    return results
+
+
+class _HashingReader:
+    """Leitor que calcula o hash do que passa por ele"""
+
+    def __init__(self, f):
+        self._f = f
+        self.digest = hashlib.blake2b()
+        self.size = 0
+
+    def read(self, size=-1):
+        data = self._f.read(size)
+        self.digest.update(data)
+        self.size += len(data)
+        return data
+
+
+def archive_files(paths, archive, codec="gzip", progress=None, on_result=None):
+    """
+    Junta os arquivos num único tar comprimido (archive), com caminhos
+    relativos à pasta comum. O tar é um fluxo único e não se divide entre
+    processos. Depois de gravado ele é lido de novo e cada membro é
+    conferido por hash; só então os originais são removidos.
+    Retorna um CompressResult por arquivo; o espaço ocupado pelo próprio
+    tar deve ser descontado da soma de saved.
+    """
+    if codec not in CODECS:
+        raise ValueError(f"Formato desconhecido: {codec}")
+    paths = list(dict.fromkeys(paths))
+    total = len(paths)
+    results = []
+    added = {}  # nome no tar -> (path, stat, (bytes, hash))
+    pending = 0  # paths[pending:] ainda não foram acrescentados ao tar
+
+    def done(result):
+        results.append(result)
+        if on_result:
+            on_result(result)
+
+    folder, name = os.path.split(os.path.abspath(archive))
+    part = os.path.join(folder, f".{name}.part")
+    base = os.path.commonpath([os.path.dirname(os.path.abspath(path)) for path in paths]) if paths else folder
+    try:
+        with tarfile.open(part, "w:" + CODECS[codec][2], copybufsize=CHUNK_SIZE) as tar:
+            for count, path in enumerate(paths, 1):
+                try:
+                    st = _check_source(path)
+                    f = open(path, "rb")
+                except OSError as e:
+                    pending = count
+                    done(CompressResult(path, False, _describe(e), None, 0))
+                    continue
+                # Erros daqui em diante deixam o tar incompleto: abortam tudo
+                with f:
+                    arcname = os.path.relpath(os.path.abspath(path), base)
+                    info = tar.gettarinfo(arcname=arcname, fileobj=f)
+                    reader = _HashingReader(f)
+                    tar.addfile(info, reader)
+                _check_unchanged(path, st)
+                added[arcname] = (path, st, (reader.size, reader.digest.digest()))
+                pending = count
+                if progress:
+                    progress(count, total)
+        if not added:
+            os.remove(part)
+            return results
+        _fsync(part)
+
+        with tarfile.open(part, "r:" + CODECS[codec][2]) as tar:
+            checked = 0
+            for member in tar:
+                expected = added.get(member.name)
+                stream = tar.extractfile(member)
+                if expected is None or stream is None or _stream_digest(stream) != expected[2]:
+                    raise VerificationError(errno.EIO, "Falha na verificação", member.name)
+                checked += 1
+            if checked != len(added):
+                raise VerificationError(errno.EIO, "Falha na verificação", archive)
+        if os.path.lexists(archive):
+            raise FileExistsError(errno.EEXIST, "Destino já existe", archive)
+        os.rename(part, archive)
+    except OSError as e:
+        if os.path.exists(part):
+            os.remove(part)
+        erro = _describe(e)
+        # Nenhum original foi tocado: os acrescentados, o que estava sendo
+        # acrescentado e os seguintes ficam todos sem compressão
+        for path, _, _ in added.values():
+            done(CompressResult(path, False, erro, None, 0))
+        for path in paths[pending:]:
+            done(CompressResult(path, False, erro, None, 0))
+        return results
+
+    for path, st, _ in added.values():
+        try:
+            os.remove(path)
+        except OSError as e:
+            # O tar está completo; o original apenas continua no disco
+            done(CompressResult(path, False, _describe(e), archive, 0))
+        else:
+            done(CompressResult(path, True, None, archive, disk_usage(entry_from_stat(path, st))))
+    return results
@@ -1,5 +1,16 @@
+import json
 import os
-import shutil
+import time
+from filters import compile_filters
+from scanner import MultiScanner, Scanner, TopK
+
+# Índice, watcher, duplicados e operações são importados sob demanda
+# para manter leve a inicialização da CLI
+
+# Índice persistente compartilhado, aberto na primeira utilização
+_index = None
+# Quarentena compartilhada, criada na primeira utilização
+_quarantine = None
 
 def validate_path(path):
     """
@@ -51,76 +62,350 @@ def validate_size_limit(limit_mb):
     except (ValueError, TypeError):
         return False, "Digite um número válido"
 
-def find_large_files(folder, limit_mb):
+def validate_top_k(top_k):
     """
-    Encontra arquivos grandes em uma pasta.
-    Agora com validação de entrada.
+    Valida o número máximo de resultados (0 = sem limite).
+    Retorna (is_valid, error_message)
     """
-    # Validar pasta
-    is_valid, error_msg = validate_path(folder)
-    if not is_valid:
-        raise ValueError(f"Erro na pasta: {error_msg}")
+    try:
+        value = int(top_k)
+        if value < 0:
+            return False, "O número de resultados não pode ser negativo"
+        return True, ""
+    except (ValueError, TypeError):
+        return False, "Digite um número inteiro válido"
+
+def configure_categories(categories=None, sniff="off", workers=4):
+    """
+    Define as categorias de arquivo usadas por filtros, estatísticas e
+    consultas. categories é o formato do config.json ({"nome": [".ext"]});
+    sniff ("off", "unknown" ou "all") ativa a identificação pelo conteúdo.
+    """
+    from classifier import configure_classifier
+    return configure_classifier(categories, sniff, workers)
+
+def get_index():
+    """Retorna o índice persistente de varreduras (no cache do usuário)"""
+    global _index
+    if _index is None:
+        import sqlite3
+        from scan_index import ScanIndex
+        try:
+            _index = ScanIndex()
+        except sqlite3.Error as e:
+            raise ValueError(f"Erro no índice: {e}")
+    return _index
+
+def _scan_index(use_index):
+    """Índice para uma varredura; sem ele (banco travado, por exemplo) tudo é listado do disco"""
+    if not use_index:
+        return None
+    try:
+        return get_index()
+    except ValueError:
+        return None
+
+def get_quarantine():
+    """Retorna a quarentena de arquivos excluídos (diário no cache do usuário)"""
+    global _quarantine
+    if _quarantine is None:
+        from quarantine import Quarantine
+        _quarantine = Quarantine()
+    return _quarantine
+
+def create_scanner(folder, limit_mb, workers=1, filters=None, use_index=False, aggregate_dirs=False,
+                   revalidate=False):
+    """
+    Valida a entrada e cria o Scanner para uma pasta.
+    folder também pode ser uma lista de pastas, varridas ao mesmo tempo
+    por um MultiScanner (uma pasta dentro de outra é varrida uma vez).
+    Com workers > 1 a travessia usa um pool de threads.
+    filters usa o formato do config.json e é aplicado durante a varredura.
+    Com use_index, só pastas alteradas desde a última varredura são relidas;
+    arquivos que cresceram sem alterar a pasta mantêm o tamanho do índice.
+    Com revalidate, todas as pastas são relidas e o índice é reconstruído.
+    Com aggregate_dirs, o scanner também acumula o tamanho de cada pasta.
+    """
+    folders = [folder] if isinstance(folder, str) else list(folder)
+    if not folders:
+        raise ValueError("Erro na pasta: Caminho não pode estar vazio")
+
+    # Validar pastas
+    for pasta in folders:
+        is_valid, error_msg = validate_path(pasta)
+        if not is_valid:
+            raise ValueError(f"Erro na pasta: {error_msg}" if len(folders) == 1
+                             else f"Erro na pasta {pasta}: {error_msg}")
     
     # Validar limite
     is_valid, error_msg = validate_size_limit(limit_mb)
     if not is_valid:
         raise ValueError(f"Erro no limite de tamanho: {error_msg}")
     
-    result = []
     limit_bytes = float(limit_mb) * 1024 * 1024
-    
-    for root, _, files in os.walk(folder):
-        for file in files:
-            path = os.path.join(root, file)
-            try:
-                size = os.path.getsize(path)
-                if size >= limit_bytes:
-                    result.append((path, size))
-            except (OSError, PermissionError) as e:
-                print(f"Erro ao acessar {path}: {e}")
-    
-    return sorted(result, key=lambda x: x[1], reverse=True)
+    index = _scan_index(use_index or revalidate)
+    if len(folders) > 1:
+        return MultiScanner(folders, limit_bytes, workers=workers, file_filter=compile_filters(filters),
+                            index=index, aggregate_dirs=aggregate_dirs, revalidate=revalidate)
+    return Scanner(folders[0], limit_bytes, workers=workers, file_filter=compile_filters(filters), index=index,
+                   aggregate_dirs=aggregate_dirs, revalidate=revalidate)
 
-def excluir_arquivos(arquivos):
+def iter_large_files(folder, limit_mb, workers=1, filters=None, use_index=False):
     """
-    Exclui arquivos com validação prévia de permissões.
+    Gera os arquivos grandes de uma pasta à medida que são encontrados.
+    Cada item é um FileEntry (path, size, mtime, uid).
     """
-    # Validar permissões antes de tentar excluir
-    problematic_files = validate_file_permissions(arquivos)
-    if problematic_files:
-        return problematic_files
-    
-    erros = []
-    for path in arquivos:
+    return create_scanner(folder, limit_mb, workers, filters, use_index).scan()
+
+def find_large_files(folder, limit_mb, workers=1, top_k=None, filters=None, use_index=False):
+    """
+    Encontra arquivos grandes em uma pasta (ou numa lista de pastas).
+    Retorna um ResultSet ordenado do maior para o menor; cada item é um
+    FileEntry, que começa com path e size.
+    Com top_k, mantém apenas os top_k maiores durante a varredura.
+    """
+    from resultset import ResultSet
+    if top_k:
+        is_valid, error_msg = validate_top_k(top_k)
+        if not is_valid:
+            raise ValueError(f"Erro no limite de resultados: {error_msg}")
+
+    scanner = create_scanner(folder, limit_mb, workers, filters, use_index)
+    if top_k:
+        maiores = TopK(int(top_k)).extend(scanner.scan())
+        with scanner.metrics.phase("sort"):
+            return ResultSet(maiores.items())
+
+    result = ResultSet(scanner.scan())
+    with scanner.metrics.phase("sort"):
+        result.sort_by_size()
+    return result
+
+def scan_report(scanner, indent=2):
+    """
+    Relatório JSON de uma varredura: pastas e arquivos visitados, chamadas
+    de stat, erros agrupados por errno com caminhos de exemplo, arquivos
+    e bytes aceitos e o tempo de cada fase.
+    """
+    return json.dumps(scanner.stats(), ensure_ascii=False, indent=indent)
+
+def directory_tree(folder, workers=1, filters=None, use_index=False, revalidate=False):
+    """
+    Calcula o uso de disco acumulado de cada pasta (como o du).
+    Retorna o DirNode da raiz; os filhos estão ordenados por tamanho.
+    use_index e revalidate funcionam como em create_scanner.
+    """
+    is_valid, error_msg = validate_path(folder)
+    if not is_valid:
+        raise ValueError(f"Erro na pasta: {error_msg}")
+
+    # Sem limite alcançável o scanner não entrega arquivos, só soma
+    index = _scan_index(use_index or revalidate)
+    scanner = Scanner(folder, float("inf"), workers=workers, file_filter=compile_filters(filters),
+                      index=index, aggregate_dirs=True, revalidate=revalidate)
+    for _ in scanner.scan():
+        pass
+    return scanner.dir_tree()
+
+def save_snapshot(destino, entries, scanner=None):
+    """
+    Grava um snapshot de uma varredura: os arquivos encontrados (FileEntry)
+    e, se o scanner acumulou o tamanho das pastas, o total de cada pasta.
+    Retorna o número de registros gravados.
+    """
+    from snapshot import scan_records, write_snapshot
+    pasta = os.path.dirname(os.path.abspath(destino))
+    is_valid, error_msg = validate_path(pasta)
+    if not is_valid:
+        raise ValueError(f"Erro no destino: {error_msg}")
+    if not os.access(pasta, os.W_OK):
+        raise ValueError("Erro no destino: Sem permissão de escrita")
+
+    meta = {}
+    dir_tree = None
+    if scanner is not None:
+        meta = {"roots": list(getattr(scanner, "roots", None) or [scanner.root]), "min_bytes": scanner.min_bytes}
+        if scanner.dir_totals:
+            dir_tree = scanner.dir_tree()
+    return write_snapshot(destino, scan_records(entries, dir_tree), meta)
+
+def compare_snapshots(antigo, novo, limit=20):
+    """
+    Compara dois snapshots (caminhos de arquivo) intercalando os registros
+    em ordem, sem carregá-los na memória.
+    Retorna um snapshot.SnapshotDiff com os limit maiores arquivos e pastas
+    novos, removidos, que cresceram e que diminuíram.
+    """
+    from snapshot import diff, read_meta, read_snapshot
+    for path in (antigo, novo):
         try:
-            if os.path.isfile(path):
-                os.remove(path)
-        except Exception as e:
-            erros.append((path, str(e)))
-    return erros
+            read_meta(path)
+        except (OSError, ValueError) as e:
+            raise ValueError(f"Erro no snapshot {path}: {e}")
+    return diff(read_snapshot(antigo), read_snapshot(novo), limit)
 
-def mover_arquivos(arquivos, destino):
+def file_statistics(folder, limit_mb, workers=1, filters=None, use_index=False):
     """
-    Move arquivos com validação de destino e permissões.
+    Varre uma pasta e agrupa os arquivos grandes por categoria, extensão,
+    dono, idade e faixa de tamanho.
+    Retorna um stats.ScanStats.
+    """
+    from stats import collect_stats
+    return collect_stats(iter_large_files(folder, limit_mb, workers, filters, use_index))
+
+def watch_large_files(folder, limit_mb, on_event, filters=None, initial=None, poll_interval=30):
+    """
+    Acompanha os arquivos grandes de uma pasta após uma varredura.
+    initial são os FileEntry do resultado já conhecido.
+    on_event(kind, entry) recebe "add", "update" ou "remove" e o FileEntry.
+    Retorna o TreeWatcher já iniciado; use stop() para encerrar.
+    """
+    from watcher import TreeWatcher
+    scanner = create_scanner(folder, limit_mb, filters=filters)
+    watcher = TreeWatcher(scanner.root, scanner.min_bytes, on_event,
+                          file_filter=scanner.file_filter, initial=initial,
+                          poll_interval=poll_interval)
+    return watcher.start()
+
+def find_duplicate_files(arquivos, workers=4, progress=None, use_cache=True):
+    """
+    Encontra cópias idênticas entre arquivos, uma lista de (path, size)
+    ou FileEntry, ou o ResultSet retornado por find_large_files. Os hashes ficam em cache
+    entre execuções.
+    Retorna lista de DuplicateGroup (size, digest, paths); o primeiro
+    caminho de cada grupo é o mais antigo.
+    """
+    from duplicates import HashCache, find_duplicates
+    cache = HashCache() if use_cache else None
+    try:
+        return find_duplicates(arquivos, workers=workers, cache=cache, progress=progress)
+    finally:
+        if cache is not None:
+            cache.close()
+
+def query_index(folder, min_mb=0, max_mb=0, days_old=0, file_types=None, limit=None):
+    """
+    Consulta o índice persistente sem percorrer o disco.
+    Só conhece as pastas já varridas com use_index=True.
+    Retorna lista de FileEntry do maior para o menor.
+    """
+    older_than = time.time() - days_old * 86400 if days_old > 0 else None
+    return get_index().query(
+        folder,
+        min_bytes=min_mb * 1024 * 1024,
+        max_bytes=max_mb * 1024 * 1024 if max_mb > 0 else 0,
+        older_than=older_than,
+        file_types=file_types,
+        limit=limit,
+    )
+
+def excluir_arquivos(arquivos, workers=8, progress=None, on_result=None):
+    """
+    Exclui arquivos em paralelo; cada arquivo é tratado separadamente.
+    progress(feitos, total) e on_result(FileResult) acompanham o andamento.
+    Retorna lista de (path, erro) dos arquivos que não foram excluídos.
+    """
+    from operations import delete_files
+    results = delete_files(arquivos, workers=workers, progress=progress, on_result=on_result)
+    return [(r.path, r.error) for r in results if not r.ok]
+
+def quarentenar_arquivos(arquivos, progress=None, on_result=None):
+    """
+    Exclui arquivos movendo-os para a quarentena do mesmo disco, de onde
+    podem ser restaurados até serem eliminados (limpar_quarentena).
+    Retorna lista de (path, erro) dos arquivos que não foram movidos.
+    """
+    results = get_quarantine().quarantine(arquivos, progress=progress, on_result=on_result)
+    return [(r.path, r.error) for r in results if not r.ok]
+
+def listar_quarentena():
+    """Arquivos em quarentena (QuarantineEntry), do mais recente ao mais antigo"""
+    return sorted(get_quarantine().entries().values(), key=lambda e: e.time, reverse=True)
+
+def restaurar_arquivos(ids=None, ultimo_lote=False, progress=None, on_result=None):
+    """
+    Devolve arquivos da quarentena ao lugar original: os ids indicados, a
+    última exclusão (ultimo_lote) ou, sem nenhum dos dois, todos.
+    Retorna (caminhos restaurados, lista de (path, erro)).
+    """
+    quarantine = get_quarantine()
+    if ultimo_lote:
+        ids = quarantine.last_batch()
+    elif ids is None:
+        ids = list(quarantine.entries())
+    results = quarantine.restore(ids, progress=progress, on_result=on_result)
+    return [r.path for r in results if r.ok], [(r.path, r.error) for r in results if not r.ok]
+
+def limpar_quarentena(dias=0, progress=None, em_segundo_plano=False, on_done=None):
+    """
+    Elimina de vez os arquivos há mais de dias dias na quarentena
+    (0 = todos). Retorna (lista de (path, erro), bytes liberados); com
+    em_segundo_plano, roda numa thread, chama on_done(erros, liberado)
+    ao final e retorna a thread.
+    """
+    quarantine = get_quarantine()
+    if em_segundo_plano:
+        def finished(results, freed):
+            if on_done:
+                on_done([(r.path, r.error) for r in results if not r.ok], freed)
+        return quarantine.purge_in_background(dias, on_done=finished)
+    older_than = time.time() - dias * 86400 if dias > 0 else None
+    results, freed = quarantine.purge(older_than=older_than, progress=progress)
+    return [(r.path, r.error) for r in results if not r.ok], freed
+
+def mover_arquivos(arquivos, destino, workers=4, progress=None, verify=False, on_result=None):
+    """
+    Move arquivos com validação de destino; cada arquivo é tratado
+    separadamente. Entre dispositivos a cópia pode ser conferida por hash
+    (verify) antes de remover a origem.
+    Retorna lista de (path, erro) dos arquivos que não foram movidos.
     """
     # Validar destino
     is_valid, error_msg = validate_path(destino)
     if not is_valid:
         return [(destino, f"Erro no destino: {error_msg}")]
     
-    # Validar permissões dos arquivos
-    problematic_files = validate_file_permissions(arquivos)
-    if problematic_files:
-        return problematic_files
-    
     # Verificar se destino tem permissão de escrita
     if not os.access(destino, os.W_OK):
         return [(destino, "Sem permissão de escrita no destino")]
     
-    erros = []
-    for path in arquivos:
-        try:
-            shutil.move(path, destino)
-        except Exception as e:
-            erros.append((path, str(e)))
-    return erros
+    from operations import move_files
+    results = move_files(arquivos, destino, workers=workers, progress=progress, verify=verify,
+                         on_result=on_result)
+    return [(r.path, r.error) for r in results if not r.ok]
+
+def comprimir_arquivos(arquivos, formato="gzip", workers=None, progress=None, on_result=None,
+                       destino_tar=None, nivel=None):
+    """
+    Comprime arquivos com gzip, bz2 ou xz num pool de processos (um por
+    núcleo, por padrão); cada arquivo vira arquivo.gz/.bz2/.xz ao lado do
+    original. Com destino_tar, todos vão para um único tar comprimido.
+    O original só é removido depois que o resultado é conferido.
+    Retorna (lista de (path, erro), bytes liberados em disco).
+    """
+    from compression import CODECS, archive_files, compress_files
+    if formato not in CODECS:
+        raise ValueError(f"Erro no formato: use {', '.join(CODECS)}")
+
+    if destino_tar is None:
+        results = compress_files(arquivos, formato, workers=workers, level=nivel, progress=progress,
+                                 on_result=on_result)
+        return [(r.path, r.error) for r in results if not r.ok], sum(r.saved for r in results)
+
+    # Validar destino do tar
+    pasta = os.path.dirname(os.path.abspath(destino_tar))
+    is_valid, error_msg = validate_path(pasta)
+    if not is_valid:
+        return [(destino_tar, f"Erro no destino: {error_msg}")], 0
+    if not os.access(pasta, os.W_OK):
+        return [(destino_tar, "Sem permissão de escrita no destino")], 0
+    if os.path.lexists(destino_tar):
+        return [(destino_tar, "Já existe um arquivo com esse nome no destino")], 0
+
+    results = archive_files(arquivos, destino_tar, formato, progress=progress, on_result=on_result)
+    economizado = sum(r.saved for r in results)
+    if os.path.exists(destino_tar):
+        # O tar ocupa espaço mesmo que nenhum original tenha sido removido
+        from scanner import disk_usage, entry_from_stat
+        economizado -= disk_usage(entry_from_stat(destino_tar, os.stat(destino_tar)))
+    return [(r.path, r.error) for r in results if not r.ok], economizado
@@ -0,0 +1,73 @@
+import os
+
+
+class DirNode:
+    """Pasta da árvore de uso de disco, com totais próprios e da subárvore"""
+
+    __slots__ = ("path", "own_bytes", "own_files", "total_bytes", "total_files", "children")
+
+    def __init__(self, path, own_bytes=0, own_files=0):
+        self.path = path
+        self.own_bytes = own_bytes
+        self.own_files = own_files
+        self.total_bytes = own_bytes
+        self.total_files = own_files
+        self.children = []
+
+    @property
+    def name(self):
+        return os.path.basename(self.path.rstrip(os.sep)) or self.path
+
+    def __repr__(self):
+        return f"DirNode({self.path!r}, total_bytes={self.total_bytes}, total_files={self.total_files})"
+
+    def walk(self):
+        """Percorre a subárvore em pré-ordem"""
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(reversed(node.children))
+
+    def to_dict(self, max_depth=None):
+        """Representação serializável (JSON) da subárvore"""
+        result = {
+            "path": self.path,
+            "total_bytes": self.total_bytes,
+            "total_files": self.total_files,
+            "own_bytes": self.own_bytes,
+            "own_files": self.own_files,
+        }
+        if max_depth is None or max_depth > 0:
+            next_depth = None if max_depth is None else max_depth - 1
+            result["children"] = [child.to_dict(next_depth) for child in self.children]
+        return result
+
+
+def build_dir_tree(root, dir_totals):
+    """
+    Monta a árvore a partir de {path: (bytes, arquivos)} de cada pasta
+    listada. Os totais de cada subárvore são acumulados de baixo para
+    cima e os filhos ficam ordenados do maior para o menor.
+    """
+    nodes = {path: DirNode(path, size, count) for path, (size, count) in dir_totals.items()}
+    if root not in nodes:
+        nodes[root] = DirNode(root)
+    # Os filhos de "/dados/" têm dirname "/dados"
+    parents = dict(nodes)
+    parents[root.rstrip(os.sep) or root] = nodes[root]
+
+    # Mais profundos primeiro: cada pasta soma no pai já com seus totais
+    for path in sorted(nodes, key=lambda p: p.count(os.sep), reverse=True):
+        if path == root:
+            continue
+        node = nodes[path]
+        parent = parents.get(os.path.dirname(path))
+        if parent is not None:
+            parent.children.append(node)
+            parent.total_bytes += node.total_bytes
+            parent.total_files += node.total_files
+
+    for node in nodes.values():
+        node.children.sort(key=lambda n: n.total_bytes, reverse=True)
+    return nodes[root]
@@ -0,0 +1,201 @@
+import hashlib
+import mmap
+import os
+import sqlite3
+from collections import defaultdict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from utils import get_cache_dir
+
+# Bytes lidos do início e do fim de cada arquivo na etapa parcial
+PARTIAL_BYTES = 8 * 1024
+# Leitura em blocos quando mmap não é possível
+READ_BUFFER = 1024 * 1024
+# Fatia do mmap entregue ao hash por vez
+MMAP_CHUNK = 16 * 1024 * 1024
+
+DuplicateGroup = namedtuple("DuplicateGroup", ["size", "digest", "paths"])
+
+
+def default_cache_path():
+    return os.path.join(get_cache_dir(), "hashes.sqlite")
+
+
+class HashCache:
+    """
+    Cache persistente de hashes indexado por (dev, inode, size, mtime).
+    Um arquivo alterado muda de chave e é recalculado.
+    """
+
+    def __init__(self, path=None):
+        self.conn = sqlite3.connect(path or default_cache_path())
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS hashes (
+                dev INTEGER NOT NULL,
+                ino INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                kind TEXT NOT NULL,
+                digest TEXT NOT NULL,
+                PRIMARY KEY (dev, ino, size, mtime_ns, kind)
+            )
+        """)
+
+    def get(self, key, kind):
+        row = self.conn.execute(
+            "SELECT digest FROM hashes WHERE dev = ? AND ino = ? AND size = ? AND mtime_ns = ? AND kind = ?",
+            (*key, kind),
+        ).fetchone()
+        return row[0] if row else None
+
+    def put_many(self, items, kind):
+        """items é uma lista de (key, digest)"""
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO hashes VALUES (?, ?, ?, ?, ?, ?)",
+            [(*key, kind, digest) for key, digest in items],
+        )
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+
+def partial_hash(path, size):
+    """Hash do tamanho, dos primeiros e dos últimos PARTIAL_BYTES"""
+    h = hashlib.blake2b(str(size).encode())
+    with open(path, "rb") as f:
+        h.update(f.read(PARTIAL_BYTES))
+        if size > PARTIAL_BYTES:
+            f.seek(max(PARTIAL_BYTES, size - PARTIAL_BYTES))
+            h.update(f.read(PARTIAL_BYTES))
+    return h.hexdigest()
+
+
+def full_hash(path):
+    """Hash do conteúdo inteiro, via mmap quando possível"""
+    h = hashlib.blake2b()
+    with open(path, "rb") as f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError):
+            mm = None
+        if mm is not None:
+            with mm:
+                view = memoryview(mm)
+                try:
+                    for offset in range(0, len(mm), MMAP_CHUNK):
+                        h.update(view[offset:offset + MMAP_CHUNK])
+                finally:
+                    view.release()
+        else:
+            for chunk in iter(lambda: f.read(READ_BUFFER), b""):
+                h.update(chunk)
+    return h.hexdigest()
+
+
+def _file_key(path):
+    st = os.stat(path)
+    return (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns), st.st_mtime
+
+
+def _hash_stage(candidates, kind, hash_func, cache, executor, progress):
+    """
+    Calcula (ou busca no cache) o hash de cada candidato.
+    candidates é uma lista de (path, size, key). Retorna {path: digest}.
+    """
+    digests = {}
+    missing = []
+    for path, size, key in candidates:
+        cached = cache.get(key, kind) if cache is not None else None
+        if cached is not None:
+            digests[path] = cached
+        else:
+            missing.append((path, size, key))
+
+    if progress:
+        progress(kind, len(digests), len(candidates))
+
+    if kind == "partial":
+        futures = [(path, key, executor.submit(hash_func, path, size)) for path, size, key in missing]
+    else:
+        futures = [(path, key, executor.submit(hash_func, path)) for path, size, key in missing]
+
+    computed = []
+    for path, key, future in futures:
+        try:
+            digest = future.result()
+        except OSError:
+            continue
+        digests[path] = digest
+        computed.append((key, digest))
+        if progress:
+            progress(kind, len(digests), len(candidates))
+
+    if cache is not None and computed:
+        cache.put_many(computed, kind)
+    return digests
+
+
+def _regroup(groups, digests):
+    """Divide cada grupo pelos hashes calculados, descartando grupos unitários"""
+    result = []
+    for group in groups:
+        by_digest = defaultdict(list)
+        for item in group:
+            digest = digests.get(item[0])
+            if digest is not None:
+                by_digest[digest].append(item)
+        result.extend(g for g in by_digest.values() if len(g) > 1)
+    return result
+
+
+def find_duplicates(files, workers=4, cache=None, progress=None):
+    """
+    Encontra arquivos com conteúdo idêntico entre files, uma lista de
+    (path, size) ou FileEntry. As etapas são: agrupar por tamanho, hash parcial
+    (início e fim) e hash completo apenas dos candidatos restantes.
+    Links físicos para o mesmo inode não contam como cópias.
+
+    progress(stage, done, total) é chamado durante as etapas de hash.
+    Retorna lista de DuplicateGroup com o arquivo mais antigo primeiro,
+    ordenada pelo espaço recuperável.
+    """
+    by_size = defaultdict(list)
+    for item in files:
+        path, size = item[0], item[1]
+        if size > 0:
+            by_size[size].append(path)
+
+    groups = []
+    mtimes = {}
+    for size, paths in by_size.items():
+        if len(paths) < 2:
+            continue
+        group = []
+        seen_inodes = set()
+        for path in paths:
+            try:
+                key, mtime = _file_key(path)
+            except OSError:
+                continue
+            if key[:2] in seen_inodes:
+                continue
+            seen_inodes.add(key[:2])
+            mtimes[path] = mtime
+            group.append((path, size, key))
+        if len(group) > 1:
+            groups.append(group)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        for kind, hash_func in (("partial", partial_hash), ("full", full_hash)):
+            if not groups:
+                break
+            candidates = [item for group in groups for item in group]
+            digests = _hash_stage(candidates, kind, hash_func, cache, executor, progress)
+            groups = _regroup(groups, digests)
+
+    result = []
+    for group in groups:
+        paths = sorted((item[0] for item in group), key=lambda p: (mtimes[p], p))
+        result.append(DuplicateGroup(group[0][1], digests[group[0][0]], paths))
+    result.sort(key=lambda g: g.size * (len(g.paths) - 1), reverse=True)
+    return result
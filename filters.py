@@ -0,0 +1,224 @@
+import os
+import re
+import time
+from classifier import SNIFF_OFF, get_classifier
+from scanner import disk_usage
+
+
+
+def get_file_category(path):
+    """Determina a categoria de um arquivo com o classificador em uso"""
+    return get_classifier().category(path)
+
+
+def _translate_glob(pattern):
+    """Converte um padrão estilo gitignore (sem barras nas pontas) em regex"""
+    parts = []
+    i = 0
+    while i < len(pattern):
+        c = pattern[i]
+        if pattern.startswith("**/", i):
+            parts.append("(?:.*/)?")
+            i += 3
+            continue
+        if pattern.startswith("/**", i) and i + 3 == len(pattern):
+            parts.append("/.*")
+            i += 3
+            continue
+        if pattern.startswith("**", i):
+            parts.append(".*")
+            i += 2
+            continue
+        if c == "*":
+            parts.append("[^/]*")
+        elif c == "?":
+            parts.append("[^/]")
+        elif c == "[":
+            end = pattern.find("]", i + 1)
+            if end == -1:
+                parts.append(re.escape(c))
+            else:
+                body = pattern[i + 1:end]
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                parts.append(f"[{body}]")
+                i = end
+        elif c == "\\" and i + 1 < len(pattern):
+            i += 1
+            parts.append(re.escape(pattern[i]))
+        else:
+            parts.append(re.escape(c))
+        i += 1
+    return "".join(parts)
+
+
+class ExcludeRules:
+    """
+    Padrões de exclusão no estilo .gitignore, avaliados sobre o caminho
+    relativo à raiz da varredura:
+
+    - "node_modules/" só casa com pastas; uma pasta excluída não é listada
+    - padrões sem barra ("*.iso", ".git") casam com o nome em qualquer nível
+    - padrões com barra ("/build", "docs/tmp") são relativos à raiz
+    - "**" atravessa pastas; "!padrão" reinclui; "#" inicia comentário
+
+    Como no git, a última regra que casa decide.
+    """
+
+    def __init__(self, patterns):
+        self.patterns = []
+        self._rules = []
+        for pattern in patterns:
+            pattern = pattern.strip()
+            if not pattern or pattern.startswith("#"):
+                continue
+            self.patterns.append(pattern)
+            negate = pattern.startswith("!")
+            if negate:
+                pattern = pattern[1:]
+            dir_only = pattern.endswith("/")
+            pattern = pattern.rstrip("/")
+            anchored = "/" in pattern
+            regex = _translate_glob(pattern.lstrip("/"))
+            if not anchored:
+                regex = "(?:.*/)?" + regex
+            self._rules.append((re.compile(regex + r"\Z", re.DOTALL), negate, dir_only))
+        # Do último para o primeiro: a primeira regra que casar decide
+        self._rules.reverse()
+
+    def __bool__(self):
+        return bool(self._rules)
+
+    def excluded(self, relpath, is_dir):
+        """True se relpath (relativo à raiz) deve ser ignorado"""
+        if os.sep != "/":
+            relpath = relpath.replace(os.sep, "/")
+        for regex, negate, dir_only in self._rules:
+            if dir_only and not is_dir:
+                continue
+            if regex.match(relpath):
+                return not negate
+        return False
+
+
+class FileFilter:
+    """
+    Filtros já compilados para uso dentro do scanner.
+    include_name decide pelo nome, antes de qualquer stat, e também poda
+    diretórios; match decide pelo FileEntry já obtido e select faz o
+    mesmo para um lote, lendo os cabeçalhos em paralelo quando o
+    classificador identifica arquivos pelo conteúdo.
+
+    exclude_patterns (ExcludeRules) podam subárvores inteiras antes da
+    listagem. one_file_system e follow_symlinks controlam a travessia:
+    não entrar em outros sistemas de arquivos e seguir links para pastas,
+    com proteção contra ciclos.
+    """
+
+    def __init__(self, file_types=(), max_bytes=0, cutoff_mtime=None, include_hidden=True,
+                 classifier=None, exclude_patterns=(), one_file_system=False, follow_symlinks=False):
+        self.file_types = frozenset(file_types)
+        self.max_bytes = max_bytes
+        self.cutoff_mtime = cutoff_mtime
+        self.include_hidden = include_hidden
+        self.classifier = classifier or get_classifier()
+        self.excludes = ExcludeRules(exclude_patterns) or None
+        self.one_file_system = one_file_system
+        self.follow_symlinks = follow_symlinks
+        self.match = self._compile()
+
+    def include_name(self, name):
+        """Retorna False para nomes que devem ser ignorados (arquivos ou pastas)"""
+        return self.include_hidden or not name.startswith(".")
+
+    def path_checker(self, root):
+        """
+        Retorna include(path, name, is_dir) para caminhos sob root, que
+        combina include_name com os padrões de exclusão.
+        """
+        include_name = self.include_name
+        excludes = self.excludes
+        if excludes is None:
+            return lambda path, name, is_dir: include_name(name)
+        prefix_len = len(root.rstrip(os.sep)) + 1
+
+        def include(path, name, is_dir):
+            return include_name(name) and not excludes.excluded(path[prefix_len:], is_dir)
+
+        return include
+
+    def _compile(self):
+        file_types = self.file_types
+        max_bytes = self.max_bytes
+        cutoff = self.cutoff_mtime
+        category_of = self.classifier.by_extension.get
+        splitext = os.path.splitext
+
+        if not file_types and not max_bytes and cutoff is None:
+            return None
+
+        if self.sniffs:
+            category = self.classifier.category
+
+            def match(entry):
+                if max_bytes and disk_usage(entry) > max_bytes:
+                    return False
+                if cutoff is not None and entry.mtime > cutoff:
+                    return False
+                return category(entry.path) in file_types
+
+            return match
+
+        def match(entry):
+            if max_bytes and disk_usage(entry) > max_bytes:
+                return False
+            if cutoff is not None and entry.mtime > cutoff:
+                return False
+            if file_types and category_of(splitext(entry.path)[1].lower(), "other") not in file_types:
+                return False
+            return True
+
+        return match
+
+    @property
+    def sniffs(self):
+        """True se o filtro de tipos depende do conteúdo dos arquivos"""
+        return bool(self.file_types) and self.classifier.sniff != SNIFF_OFF
+
+    def select(self, entries):
+        """Retorna os FileEntry de um lote que passam no filtro"""
+        match = self.match
+        if match is None:
+            return entries
+        if not self.sniffs:
+            return [entry for entry in entries if match(entry)]
+        max_bytes = self.max_bytes
+        cutoff = self.cutoff_mtime
+        entries = [entry for entry in entries
+                   if not (max_bytes and disk_usage(entry) > max_bytes)
+                   and not (cutoff is not None and entry.mtime > cutoff)]
+        categories = self.classifier.classify_many([entry.path for entry in entries])
+        return [entry for entry, category in zip(entries, categories) if category in self.file_types]
+
+
+def compile_filters(filters, now=None):
+    """
+    Converte a configuração de filtros (formato do config.json) num FileFilter.
+    Arquivos ocultos só são ignorados com "include_hidden": false.
+    Retorna None quando não há filtros.
+    """
+    if not filters:
+        return None
+    now = time.time() if now is None else now
+
+    max_size_mb = filters.get("max_size_mb", 0) or 0
+    days_old = filters.get("days_old", 0) or 0
+    return FileFilter(
+        file_types=filters.get("file_types", []),
+        max_bytes=max_size_mb * 1024 * 1024 if max_size_mb > 0 else 0,
+        cutoff_mtime=now - days_old * 86400 if days_old > 0 else None,
+        include_hidden=filters.get("include_hidden", True),
+        exclude_patterns=filters.get("exclude_patterns", []),
+        one_file_system=filters.get("one_file_system", False),
+        follow_symlinks=filters.get("follow_symlinks", False),
+    )
@@ -1,13 +1,53 @@
 import os
+import queue
+import tempfile
 import threading
+import time
 import json
-import datetime
 import customtkinter as ctk
-from tkinter import filedialog, messagebox
-from controller import find_large_files, excluir_arquivos, mover_arquivos, validate_path
+from tkinter import filedialog, messagebox, ttk
+from classifier import DEFAULT_CATEGORIES, get_classifier
+from controller import (compare_snapshots, comprimir_arquivos, configure_categories, create_scanner,
+                        excluir_arquivos, find_duplicate_files, limpar_quarentena, listar_quarentena, mover_arquivos,
+                        quarentenar_arquivos, restaurar_arquivos, save_snapshot, scan_report, validate_path,
+                        validate_top_k, watch_large_files)
+from scanner import FileEntry, MultiScanner, TopK, disk_usage, entry_from_stat
+from selection import SelectionModel
+from snapshot import DIR, FILE
+from stats import ScanStats, collect_stats, owner_name, size_bucket_label
 from utils import format_size
+from widgets import VirtualList
+
+# Checkbox do painel de filtros -> categoria
+TYPE_WIDGETS = {
+    "videos": "video",
+    "images": "image",
+    "documents": "document",
+    "archives": "archive",
+    "others": "other",
+}
+
+# Opções de compressão -> codec
+COMPRESS_FORMATS = {
+    "gzip": "gzip",
+    "bz2": "bz2",
+    "xz": "xz",
+    "tar.gz": "gzip",
+    "tar.bz2": "bz2",
+    "tar.xz": "xz",
+}
 
 class LimpadorApp(ctk.CTk):
+    # Intervalo de leitura da fila da análise e tamanho máximo de cada lote
+    POLL_INTERVAL_MS = 100
+    BATCH_SIZE = 500
+    MAX_BATCHES_PER_POLL = 10
+    WATCH_POLL_MS = 500
+    # Arquivos listados na janela da quarentena
+    QUARANTINE_LIST_LIMIT = 200
+    # Itens de cada lista na comparação de snapshots
+    SNAPSHOT_DIFF_LIMIT = 20
+
     def __init__(self):
         # Configurações persistentes
         self.config_file = "config.json"
@@ -21,10 +61,25 @@ class LimpadorApp(ctk.CTk):
         self.title("Limpador de Arquivos ")
         self.geometry("950x800")
         ctk.set_appearance_mode("light")
-        self.checkboxes = []
+        # Totais em espaço em disco, com links físicos contados uma vez
+        self.selection = SelectionModel(weight=disk_usage)
+        # Estatísticas agrupadas dos arquivos listados
+        self.stats = ScanStats()
+        self.top_k_progress = None
+        self.scanner = None
+        self.analysis_queue = None
+        self.scan_params = None
+        self.watcher = None
+        self.watch_queue = queue.Queue()
+        self.task_queue = None
+        self.task_done = None
 
         self._build_interface()
 
+        # Arquivos antigos da quarentena são eliminados em segundo plano
+        if self.config.get("quarantine_days", 0) > 0:
+            limpar_quarentena(self.config["quarantine_days"], em_segundo_plano=True)
+
     def _build_interface(self):
         # Header com título e botão de tema
         header_frame = ctk.CTkFrame(self)
@@ -55,6 +110,9 @@ class LimpadorApp(ctk.CTk):
         self.pasta_entry = ctk.CTkEntry(entrada_frame, width=500)
         self.pasta_entry.grid(row=0, column=1, padx=5, pady=5)
         ctk.CTkButton(entrada_frame, text="Selecionar", command=self.selecionar_pasta).grid(row=0, column=2, padx=5)
+        self.watch_button = ctk.CTkButton(entrada_frame, text="👁️ Monitorar", command=self.toggle_watch)
+        self.watch_button.grid(row=0, column=3, padx=5)
+        ctk.CTkButton(entrada_frame, text="➕", width=40, command=self.adicionar_pasta).grid(row=0, column=4, padx=5)
 
         # Linha 2 – Limite
         ctk.CTkLabel(entrada_frame, text="Tamanho mínimo (MB):").grid(row=1, column=0, sticky="e", padx=5, pady=5)
@@ -63,6 +121,25 @@ class LimpadorApp(ctk.CTk):
         self.limite_entry.grid(row=1, column=1, sticky="w", padx=5, pady=5)
         ctk.CTkButton(entrada_frame, text="Analisar", command=self.analisar).grid(row=1, column=2, padx=5)
 
+        # Linha 3 – Limite de resultados
+        ctk.CTkLabel(entrada_frame, text="Máx. de resultados:").grid(row=2, column=0, sticky="e", padx=5, pady=5)
+        self.top_k_entry = ctk.CTkEntry(entrada_frame, width=100, placeholder_text="0 = todos")
+        if self.config.get("top_k", 0) > 0:
+            self.top_k_entry.insert(0, str(self.config["top_k"]))
+        self.top_k_entry.grid(row=2, column=1, sticky="w", padx=5, pady=5)
+        # O índice só relê pastas alteradas: um arquivo que cresceu sem
+        # mudar a pasta fica com o tamanho antigo até revalidar
+        self.use_index_check = ctk.CTkCheckBox(
+            entrada_frame, text="Reanálise incremental (índice; não vê arquivos que só cresceram)")
+        if self.config.get("use_index", False):
+            self.use_index_check.select()
+        self.use_index_check.grid(row=2, column=2, sticky="w", padx=5, pady=5)
+        self.revalidate_check = ctk.CTkCheckBox(entrada_frame, text="Revalidar tudo")
+        self.revalidate_check.grid(row=2, column=3, sticky="w", padx=5, pady=5)
+        self.cancel_button = ctk.CTkButton(entrada_frame, text="Cancelar", state="disabled",
+                                           fg_color="gray", command=self.cancelar_analise)
+        self.cancel_button.grid(row=1, column=3, padx=5)
+
         # Frame de filtros (inicialmente oculto)
         self.filters_frame = ctk.CTkFrame(self)
         self._build_filters()
@@ -79,8 +156,9 @@ class LimpadorApp(ctk.CTk):
         self.progress_bar.set(0)
 
         # Lista de arquivos (scrollable)
-        self.scroll_frame = ctk.CTkScrollableFrame(self, width=800, height=400)
-        self.scroll_frame.pack(padx=20, pady=10, fill='both', expand=True)
+        self.result_list = VirtualList(self, self.selection, on_change=self.update_selection_status,
+                                       width=800, height=400)
+        self.result_list.pack(padx=20, pady=10, fill='both', expand=True)
 
         # Label para status
         self.status_label = ctk.CTkLabel(self, text="Selecione uma pasta e clique em Analisar", text_color="gray")
@@ -97,8 +175,14 @@ class LimpadorApp(ctk.CTk):
         ctk.CTkButton(botoes_container, text="✅ Selecionar Todos", command=self.selecionar_todos).grid(row=0, column=0, padx=5)
         ctk.CTkButton(botoes_container, text="❌ Desmarcar Todos", command=self.desmarcar_todos).grid(row=0, column=1, padx=5)
         ctk.CTkButton(botoes_container, text="🗑️ Excluir Selecionados", fg_color="red", command=self.excluir).grid(row=0, column=2, padx=5)
-        ctk.CTkButton(botoes_container, text="📁 Mover Selecionados", command=self.mover).grid(row=0, column=3, padx=5)
-        ctk.CTkButton(botoes_container, text="📊 Estatísticas", command=self.show_stats).grid(row=0, column=4, padx=5)
+        ctk.CTkButton(botoes_container, text="♻️ Quarentena", command=self.show_quarantine).grid(row=0, column=3, padx=5)
+        ctk.CTkButton(botoes_container, text="📁 Mover Selecionados", command=self.mover).grid(row=0, column=4, padx=5)
+        ctk.CTkButton(botoes_container, text="🗜️ Comprimir", command=self.comprimir).grid(row=0, column=5, padx=5)
+        ctk.CTkButton(botoes_container, text="📊 Estatísticas", command=self.show_stats).grid(row=0, column=6, padx=5)
+        ctk.CTkButton(botoes_container, text="🧬 Duplicados", command=self.buscar_duplicados).grid(row=0, column=7, padx=5)
+        ctk.CTkButton(botoes_container, text="📂 Pastas", command=self.show_dir_tree).grid(row=0, column=8, padx=5)
+        ctk.CTkButton(botoes_container, text="📋 Relatório", command=self.salvar_relatorio).grid(row=0, column=9, padx=5)
+        ctk.CTkButton(botoes_container, text="📸 Snapshots", command=self.show_snapshots).grid(row=0, column=10, padx=5)
 
 
     def _build_filters(self):
@@ -132,6 +216,12 @@ class LimpadorApp(ctk.CTk):
         self.filter_widgets["archives"] = ctk.CTkCheckBox(types_frame, text="📦 Arquivos")
         self.filter_widgets["archives"].pack(side="left", padx=5)
         
+        # Categorias definidas pelo usuário no config.json
+        for category in get_classifier().categories:
+            if category not in DEFAULT_CATEGORIES and category not in TYPE_WIDGETS.values():
+                self.filter_widgets["cat:" + category] = ctk.CTkCheckBox(types_frame, text=category)
+                self.filter_widgets["cat:" + category].pack(side="left", padx=5)
+
         self.filter_widgets["others"] = ctk.CTkCheckBox(types_frame, text="📁 Outros")
         self.filter_widgets["others"].pack(side="left", padx=5)
         
@@ -149,6 +239,18 @@ class LimpadorApp(ctk.CTk):
         # Linha 4: Arquivos ocultos
         self.filter_widgets["hidden"] = ctk.CTkCheckBox(main_filter_frame, text="Incluir arquivos ocultos")
         self.filter_widgets["hidden"].grid(row=3, column=0, columnspan=2, sticky="w", padx=5, pady=5)
+
+        # Linha 5: Pastas e padrões ignorados (estilo .gitignore)
+        ctk.CTkLabel(main_filter_frame, text="Ignorar (padrões):").grid(row=4, column=0, sticky="w", padx=5, pady=5)
+        self.filter_widgets["exclude"] = ctk.CTkEntry(main_filter_frame, width=300,
+                                                      placeholder_text="Ex: node_modules/, .git/, *.tmp")
+        self.filter_widgets["exclude"].grid(row=4, column=1, columnspan=3, sticky="w", padx=5, pady=5)
+
+        # Linha 6: Limites da travessia
+        self.filter_widgets["one_fs"] = ctk.CTkCheckBox(main_filter_frame, text="Não sair do sistema de arquivos")
+        self.filter_widgets["one_fs"].grid(row=5, column=0, columnspan=2, sticky="w", padx=5, pady=5)
+        self.filter_widgets["follow_links"] = ctk.CTkCheckBox(main_filter_frame, text="Seguir links de pastas")
+        self.filter_widgets["follow_links"].grid(row=5, column=2, columnspan=2, sticky="w", padx=5, pady=5)
         
         # Botões de ação
         actions_frame = ctk.CTkFrame(self.filters_frame)
@@ -194,133 +296,387 @@ class LimpadorApp(ctk.CTk):
             self.save_config()
             self.status_label.configure(text=f"Pasta selecionada: {os.path.basename(pasta)}")
 
+    def adicionar_pasta(self):
+        """Acrescenta outra pasta à análise (separadas por os.pathsep)"""
+        pasta = filedialog.askdirectory(initialdir=self.config.get("last_folder", ""))
+        if not pasta:
+            return
+        is_valid, error_msg = validate_path(pasta)
+        if not is_valid:
+            messagebox.showerror("Erro de Validação", f"Pasta inválida: {error_msg}")
+            return
+        pastas = self._pastas()
+        if pasta not in pastas:
+            pastas.append(pasta)
+        self.pasta_entry.delete(0, 'end')
+        self.pasta_entry.insert(0, os.pathsep.join(pastas))
+        self.status_label.configure(text=f"{len(pastas)} pastas selecionadas")
+
+    def _pastas(self):
+        """Pastas digitadas no campo, separadas por os.pathsep"""
+        return [pasta.strip() for pasta in self.pasta_entry.get().split(os.pathsep) if pasta.strip()]
+
     def analisar(self):
-        pasta = self.pasta_entry.get()
+        pastas = self._pastas()
         limite_str = self.limite_entry.get()
 
+        if self.is_analyzing:
+            messagebox.showinfo("Aguarde", "Já existe uma análise em andamento.")
+            return
+
         # Validar entrada antes de prosseguir
-        if not pasta.strip():
+        if not pastas:
             messagebox.showerror("Erro", "Selecione uma pasta primeiro.")
             return
 
         try:
-            # A validação agora é feita dentro de find_large_files
-            self.status_label.configure(text="Analisando... Por favor, aguarde.", text_color="blue")
-            self.update()  # Atualizar a interface
-            
-            arquivos = find_large_files(pasta, limite_str)
-            
-            # Limpar resultados anteriores
-            for widget in self.scroll_frame.winfo_children():
-                widget.destroy()
-            self.checkboxes.clear()
-
-            if not arquivos:
-                ctk.CTkLabel(self.scroll_frame, text="Nenhum arquivo grande encontrado.").pack()
-                self.status_label.configure(text="Análise concluída - Nenhum arquivo encontrado", text_color="green")
-                return
-
-            # Aplicar filtros se ativados
-            if self.show_filters:
-                arquivos = self.apply_file_filters(arquivos)
-            
-            # Mostrar resultados
-            for path, size in arquivos:
-                var = ctk.BooleanVar()
-                texto = f"{path} ({format_size(size)})"
-                check = ctk.CTkCheckBox(self.scroll_frame, text=texto, variable=var)
-                check.pack(anchor="w", pady=2)
-                self.checkboxes.append((var, path))
-
-            total_size = sum(size for _, size in arquivos)
-            filter_info = self.get_filter_info()
-            status_text = f"Encontrados {len(arquivos)} arquivos - Total: {format_size(total_size)}"
-            if filter_info:
-                status_text += f" | Filtros: {filter_info}"
-            
-            self.status_label.configure(
-                text=status_text, 
-                text_color="green"
-            )
-
+            # A validação é feita ao criar o scanner
+            top_k_str = self.top_k_entry.get().strip() or "0"
+            is_valid, error_msg = validate_top_k(top_k_str)
+            if not is_valid:
+                raise ValueError(f"Erro no limite de resultados: {error_msg}")
+            top_k = int(top_k_str)
+            workers = self.config.get("scan_workers", 1)
+            # Filtros são compilados e aplicados dentro do scanner
+            filters = self.config.get("filters", {}) if self.show_filters else None
+            use_index = bool(self.use_index_check.get())
+            revalidate = bool(self.revalidate_check.get())
+            self.scanner = create_scanner(pastas, limite_str, workers=workers, filters=filters,
+                                          use_index=use_index, aggregate_dirs=True, revalidate=revalidate)
         except ValueError as e:
             messagebox.showerror("Erro de Validação", str(e))
             self.status_label.configure(text="Erro na análise", text_color="red")
+            return
+
+        # Resultados antigos deixam de ser monitorados
+        self.stop_watch()
+        self.scan_params = (pastas, limite_str, filters)
+
+        # Limpar resultados anteriores
+        self.selection.clear()
+        self.top_k_progress = None
+        self.result_list.empty_text = ""
+        self.result_list.refresh()
+        self.stats = ScanStats()
+
+        self.config["top_k"] = top_k
+        self.config["use_index"] = use_index
+        self.save_config()
+        # A revalidação vale para uma análise; as seguintes voltam a usar o índice
+        self.revalidate_check.deselect()
+
+        self.is_analyzing = True
+        self.cancel_analysis = False
+        self.analysis_queue = queue.Queue()
+        self.cancel_button.configure(state="normal")
+        if isinstance(self.scanner, MultiScanner):
+            # Uma etapa da barra por pasta concluída
+            self.progress_bar.configure(mode="determinate")
+            self.progress_bar.set(0)
+        else:
+            self.progress_bar.configure(mode="indeterminate")
+            self.progress_bar.start()
+        self.status_label.configure(text="Analisando... Por favor, aguarde.", text_color="blue")
+
+        threading.Thread(
+            target=self._run_analysis,
+            args=(self.scanner, self.analysis_queue, top_k),
+            daemon=True,
+        ).start()
+        self.after(self.POLL_INTERVAL_MS, self._poll_analysis)
+
+    def cancelar_analise(self):
+        """Interrompe a análise em andamento mantendo os resultados parciais"""
+        if self.is_analyzing:
+            self.cancel_analysis = True
+            self.scanner.cancel()
+            self.progress_label.configure(text="Cancelando...")
+
+    def _run_analysis(self, scanner, fila, top_k):
+        """
+        Executa a varredura numa thread e envia os resultados em lotes.
+        Com top_k, guarda só os maiores e envia o progresso até o fim.
+        As estatísticas são acumuladas aqui e enviadas com "done".
+        """
+        try:
+            lote = []
+            estatisticas = ScanStats()
+            maiores = TopK(top_k) if top_k else None
+            encontrados = 0
+            total = 0
+            ultimo_envio = time.monotonic()
+            for entry in scanner.scan():
+                if maiores is not None:
+                    maiores.push(entry)
+                    encontrados += 1
+                    total += disk_usage(entry)
+                else:
+                    lote.append(entry)
+                agora = time.monotonic()
+                if len(lote) >= self.BATCH_SIZE or agora - ultimo_envio >= 0.1:
+                    if maiores is not None:
+                        fila.put(("progress", (encontrados, total)))
+                    else:
+                        estatisticas.add_many(lote)
+                        fila.put(("batch", lote))
+                        lote = []
+                    ultimo_envio = agora
+            if maiores is not None:
+                lote = maiores.items()
+            estatisticas.add_many(lote)
+            if lote:
+                fila.put(("batch", lote))
+            fila.put(("done", estatisticas))
         except Exception as e:
-            messagebox.showerror("Erro", f"Erro inesperado: {str(e)}")
+            fila.put(("error", e))
+
+    def _poll_analysis(self):
+        """Consome a fila da análise no thread da interface"""
+        finished = False
+        error = None
+        try:
+            # Limitar o trabalho por ciclo para a janela continuar responsiva
+            for _ in range(self.MAX_BATCHES_PER_POLL):
+                kind, payload = self.analysis_queue.get_nowait()
+                if kind == "batch":
+                    self._add_results(payload)
+                elif kind == "progress":
+                    self.top_k_progress = payload
+                elif kind == "done":
+                    self.stats = payload
+                    finished = True
+                    break
+                else:
+                    error = payload
+                    finished = True
+                    break
+        except queue.Empty:
+            pass
+
+        encontrados, total = self.top_k_progress or (len(self.selection), self.selection.total_bytes())
+        progresso = f"{self.scanner.dirs_visited} pastas | {encontrados} arquivos | {format_size(total)}"
+        if isinstance(self.scanner, MultiScanner):
+            progresso += self._roots_progress()
+        elif self.scanner.metrics.error_count:
+            progresso += f" | {self.scanner.metrics.error_count} erros"
+        self.progress_label.configure(text=progresso)
+
+        if finished:
+            self._finish_analysis(error)
+        else:
+            self.after(self.POLL_INTERVAL_MS, self._poll_analysis)
+
+    def _roots_progress(self):
+        """Andamento de cada pasta de uma análise com várias pastas"""
+        raizes = self.scanner.progress()
+        concluidas = sum(1 for _, _, done in raizes if done)
+        self.progress_bar.set(concluidas / len(raizes))
+        partes = [f"{os.path.basename(raiz.rstrip(os.sep)) or raiz}: {pastas}{' ✓' if done else ''}"
+                  for raiz, pastas, done in raizes]
+        return f" | {concluidas}/{len(raizes)} pastas concluídas ({', '.join(partes)})"
+
+    def _add_results(self, arquivos):
+        """Exibe um lote de resultados"""
+        with self.scanner.metrics.phase("render"):
+            self.selection.extend(arquivos)
+            self.result_list.refresh()
+
+    def _finish_analysis(self, error):
+        """Finaliza a análise e ordena os resultados do maior para o menor"""
+        self.is_analyzing = False
+        self.cancel_button.configure(state="disabled")
+        self.progress_bar.stop()
+        self.progress_bar.configure(mode="determinate")
+        self.progress_bar.set(1)
+
+        if error is not None:
+            messagebox.showerror("Erro", f"Erro inesperado: {str(error)}")
             self.status_label.configure(text="Erro na análise", text_color="red")
+            return
 
+        metrics = self.scanner.metrics
+        if len(self.selection):
+            with metrics.phase("sort"):
+                self.selection.sort_by_size()
+            with metrics.phase("render"):
+                self.result_list.refresh()
+        self.progress_label.configure(text=self._metrics_summary(metrics))
+
+        if not len(self.selection):
+            self.result_list.empty_text = "Nenhum arquivo grande encontrado."
+            self.result_list.refresh()
+            self.status_label.configure(text="Análise concluída - Nenhum arquivo encontrado", text_color="green")
+            return
 
-    def apply_file_filters(self, arquivos):
-        """Aplica filtros aos arquivos encontrados"""
-        if not arquivos:
-            return arquivos
-        
-        filters = self.config.get("filters", {})
-        filtered_files = []
-        
-        for path, size in arquivos:
-            # Verificar se deve incluir o arquivo
-            if self.should_include_file(path, size, filters):
-                filtered_files.append((path, size))
-        
-        return filtered_files
+        status_text = f"Encontrados {len(self.selection)} arquivos - Total: {format_size(self.selection.total_bytes())}"
+        if self.cancel_analysis:
+            status_text = "Análise cancelada - " + status_text + " (parcial)"
+        if metrics.error_count:
+            status_text += f" | {metrics.error_count} erros de acesso (veja o relatório)"
+        filter_info = self.get_filter_info()
+        if filter_info:
+            status_text += f" | Filtros: {filter_info}"
+
+        self.status_label.configure(
+            text=status_text,
+            text_color="orange" if self.cancel_analysis or metrics.error_count else "green"
+        )
 
-    def should_include_file(self, path, size, filters):
-        """Verifica se um arquivo deve ser incluído baseado nos filtros"""
+    def _metrics_summary(self, metrics):
+        """Resumo das métricas da varredura para a barra de progresso"""
+        fases = metrics.phases
+        return (
+            f"{metrics.dirs} pastas | {metrics.files} arquivos | {metrics.stat_calls} stats | "
+            f"{metrics.error_count} erros | varredura {fases.get('scan', 0):.1f}s "
+            f"(listagem {fases.get('walk', 0):.1f}s, filtros {fases.get('filter', 0):.1f}s) | "
+            f"ordenação {fases.get('sort', 0):.2f}s | exibição {fases.get('render', 0):.2f}s"
+        )
+
+    def salvar_relatorio(self):
+        """Salva o relatório JSON da última análise"""
+        if self.scanner is None or self.is_analyzing or self.scanner.started_at is None:
+            messagebox.showinfo("Relatório", "Conclua uma análise primeiro.")
+            return
+        destino = filedialog.asksaveasfilename(title="Salvar relatório da análise", defaultextension=".json",
+                                               filetypes=[("JSON", "*.json")])
+        if not destino:
+            return
         try:
-            # Filtro de tamanho máximo
-            max_size_mb = filters.get("max_size_mb", 0)
-            if max_size_mb > 0:
-                max_size_bytes = max_size_mb * 1024 * 1024
-                if size > max_size_bytes:
-                    return False
-            
-            # Filtro de tipos de arquivo
-            file_types = filters.get("file_types", [])
-            if file_types:
-                file_category = self.get_file_category(path)
-                if file_category not in file_types:
-                    return False
-            
-            # Filtro de idade
-            days_old = filters.get("days_old", 0)
-            if days_old > 0:
-                file_time = os.path.getmtime(path)
-                file_date = datetime.datetime.fromtimestamp(file_time)
-                cutoff_date = datetime.datetime.now() - datetime.timedelta(days=days_old)
-                if file_date > cutoff_date:
-                    return False
-            
-            # Filtro de arquivos ocultos
-            include_hidden = filters.get("include_hidden", False)
-            if not include_hidden:
-                filename = os.path.basename(path)
-                if filename.startswith("."):
-                    return False
-            
-            return True
-            
-        except Exception:
-            # Em caso de erro, incluir o arquivo
-            return True
-
-    def get_file_category(self, path):
-        """Determina a categoria de um arquivo baseado na extensão"""
-        ext = os.path.splitext(path)[1].lower()
-        
-        if ext in [".mp4", ".avi", ".mkv", ".mov", ".wmv", ".flv", ".webm", ".m4v"]:
-            return "video"
-        elif ext in [".jpg", ".jpeg", ".png", ".gif", ".bmp", ".tiff", ".svg", ".webp"]:
-            return "image"
-        elif ext in [".pdf", ".doc", ".docx", ".txt", ".rtf", ".odt", ".xls", ".xlsx", ".ppt", ".pptx"]:
-            return "document"
-        elif ext in [".zip", ".rar", ".7z", ".tar", ".gz", ".bz2", ".xz"]:
-            return "archive"
+            with open(destino, "w", encoding="utf-8") as f:
+                f.write(scan_report(self.scanner))
+        except OSError as e:
+            messagebox.showerror("Erro", f"Não foi possível salvar o relatório: {e}")
+            return
+        self.status_label.configure(text=f"Relatório salvo em {destino}", text_color="green")
+
+    def show_snapshots(self):
+        """Salvar a análise como snapshot ou comparar snapshots"""
+        janela = ctk.CTkToplevel(self)
+        janela.title("Snapshots")
+        janela.geometry("420x230")
+        janela.grab_set()
+
+        ctk.CTkLabel(janela, text="📸 Snapshots da análise", font=("Arial", 14, "bold")).pack(pady=10)
+
+        def executar(acao):
+            janela.destroy()
+            acao()
+
+        ctk.CTkButton(janela, text="💾 Salvar snapshot da análise",
+                      command=lambda: executar(self.salvar_snapshot)).pack(pady=5)
+        ctk.CTkButton(janela, text="📈 Comparar com a análise atual",
+                      command=lambda: executar(lambda: self.comparar_snapshots(atual=True))).pack(pady=5)
+        ctk.CTkButton(janela, text="📂 Comparar dois snapshots",
+                      command=lambda: executar(self.comparar_snapshots)).pack(pady=5)
+
+    def _analise_concluida(self):
+        return (self.scanner is not None and not self.is_analyzing
+                and self.scanner.started_at is not None and self.scanner.finished_at is not None)
+
+    def salvar_snapshot(self):
+        """Grava os arquivos e o total das pastas da última análise"""
+        if not self._analise_concluida():
+            messagebox.showinfo("Snapshot", "Conclua uma análise primeiro.")
+            return
+        destino = filedialog.asksaveasfilename(title="Salvar snapshot da análise", defaultextension=".snap",
+                                               filetypes=[("Snapshot", "*.snap")])
+        if not destino:
+            return
+        arquivos = self.selection.rows[:]
+        scanner = self.scanner
+        self.status_label.configure(text="Salvando snapshot...", text_color="blue")
+
+        def concluir(registros):
+            self.status_label.configure(text=f"Snapshot salvo em {destino} ({registros} registros)",
+                                        text_color="green")
+
+        self._start_task(lambda progress: save_snapshot(destino, arquivos, scanner), concluir)
+
+    def comparar_snapshots(self, atual=False):
+        """
+        Compara um snapshot anterior com a análise atual (atual=True) ou
+        com outro snapshot e mostra o que apareceu, sumiu ou cresceu.
+        """
+        if atual and not self._analise_concluida():
+            messagebox.showinfo("Snapshot", "Conclua uma análise primeiro.")
+            return
+        tipos = [("Snapshot", "*.snap"), ("Todos", "*")]
+        antigo = filedialog.askopenfilename(title="Snapshot anterior", filetypes=tipos)
+        if not antigo:
+            return
+        if atual:
+            arquivos = self.selection.rows[:]
+            scanner = self.scanner
+
+            def tarefa(progress):
+                # A análise atual vira um snapshot temporário, comparado em fluxo
+                fd, novo = tempfile.mkstemp(suffix=".snap")
+                os.close(fd)
+                try:
+                    save_snapshot(novo, arquivos, scanner)
+                    return compare_snapshots(antigo, novo, self.SNAPSHOT_DIFF_LIMIT)
+                finally:
+                    os.remove(novo)
+            titulo = f"{os.path.basename(antigo)} → análise atual"
         else:
-            return "other"
+            novo = filedialog.askopenfilename(title="Snapshot mais recente", filetypes=tipos)
+            if not novo:
+                return
 
+            def tarefa(progress):
+                return compare_snapshots(antigo, novo, self.SNAPSHOT_DIFF_LIMIT)
+            titulo = f"{os.path.basename(antigo)} → {os.path.basename(novo)}"
+
+        self.status_label.configure(text="Comparando snapshots...", text_color="blue")
+        self._start_task(tarefa, lambda resultado: self._show_snapshot_diff(resultado, titulo))
+
+    def _show_snapshot_diff(self, resultado, titulo):
+        """Janela com as maiores diferenças entre dois snapshots"""
+        variacao = resultado.growth
+        sinal = "+" if variacao > 0 else ""
+        self.status_label.configure(text=f"Comparação concluída: {sinal}{format_size(variacao)}",
+                                    text_color="green")
+        secoes = [
+            ("📈 Pastas que mais cresceram", DIR, "grown"),
+            ("🆕 Arquivos novos", FILE, "added"),
+            ("📈 Arquivos que mais cresceram", FILE, "grown"),
+            ("🆕 Pastas novas", DIR, "added"),
+            ("🗑️ Arquivos que sumiram", FILE, "removed"),
+            ("🗑️ Pastas que sumiram", DIR, "removed"),
+            ("📉 Arquivos que diminuíram", FILE, "shrunk"),
+            ("📉 Pastas que diminuíram", DIR, "shrunk"),
+        ]
+
+        janela = ctk.CTkToplevel(self)
+        janela.title("Comparação de snapshots")
+        janela.geometry("750x600")
+
+        ctk.CTkLabel(janela, text=f"📸 {titulo}", font=("Arial", 14, "bold")).pack(pady=10)
+        ctk.CTkLabel(janela, text=f"Variação dos arquivos: {sinal}{format_size(variacao)}",
+                     font=("Arial", 12, "bold")).pack(pady=2)
+
+        grupos_frame = ctk.CTkScrollableFrame(janela)
+        grupos_frame.pack(fill="both", expand=True, padx=20, pady=10)
+
+        for titulo_secao, tipo, grupo in secoes:
+            itens = resultado.top(tipo, grupo)
+            if not itens:
+                continue
+            total = f"{resultado.counts[tipo][grupo]} itens - {format_size(resultado.bytes[tipo][grupo])}"
+            ctk.CTkLabel(grupos_frame, text=f"{titulo_secao} ({total}):",
+                         font=("Arial", 12, "bold")).pack(anchor="w", padx=10, pady=5)
+            for item in itens:
+                if item.old is None:
+                    texto = f"{item.path}: {format_size(item.new)}"
+                elif item.new is None:
+                    texto = f"{item.path}: {format_size(item.old)}"
+                else:
+                    diferenca = item.new - item.old
+                    texto = (f"{item.path}: {format_size(item.old)} → {format_size(item.new)} "
+                             f"({'+' if diferenca > 0 else ''}{format_size(diferenca)})")
+                ctk.CTkLabel(grupos_frame, text=texto).pack(anchor="w", padx=20, pady=2)
 
+        ctk.CTkButton(janela, text="Fechar", command=janela.destroy).pack(pady=10)
 
     def get_filter_info(self):
         """Retorna informação resumida dos filtros ativos"""
@@ -356,25 +712,138 @@ class LimpadorApp(ctk.CTk):
         # Arquivos ocultos
         if filters.get("include_hidden", False):
             info_parts.append("+ Ocultos")
+
+        # Exclusões e limites da travessia
+        if filters.get("exclude_patterns"):
+            info_parts.append(f"Ignorando {len(filters['exclude_patterns'])} padrões")
+        if filters.get("one_file_system", False):
+            info_parts.append("Mesmo disco")
+        if filters.get("follow_symlinks", False):
+            info_parts.append("+ Links")
         
         return " | ".join(info_parts) if info_parts else "Nenhum filtro ativo"
 
 
     def get_selecionados(self):
-        return [path for var, path in self.checkboxes if var.get()]
+        return self.selection.selected_paths()
 
     def calcular_tamanho_selecionados(self):
-        """Calcula o tamanho total dos arquivos selecionados"""
-        arquivos = self.get_selecionados()
-        total_size = 0
-        for arquivo in arquivos:
+        """Tamanho total dos arquivos selecionados, mantido pelo modelo"""
+        return self.selection.selected_bytes()
+
+    def _start_task(self, func, on_done):
+        """
+        Executa func(progress) numa thread. progress(texto, feito, total)
+        atualiza a barra de progresso; on_done(resultado) roda no thread
+        da interface ao final.
+        """
+        self.is_analyzing = True
+        self.task_queue = queue.Queue()
+        self.task_done = on_done
+        self.progress_bar.set(0)
+        fila = self.task_queue
+
+        def runner():
             try:
-                total_size += os.path.getsize(arquivo)
-            except:
-                pass
-        return total_size
+                result = func(lambda texto, feito, total: fila.put(("progress", (texto, feito, total))))
+            except Exception as e:
+                fila.put(("error", e))
+            else:
+                fila.put(("done", result))
+
+        threading.Thread(target=runner, daemon=True).start()
+        self.after(self.POLL_INTERVAL_MS, self._poll_task)
+
+    def _poll_task(self):
+        progresso = None
+        try:
+            while True:
+                kind, payload = self.task_queue.get_nowait()
+                if kind == "progress":
+                    progresso = payload
+                    continue
+                self.is_analyzing = False
+                self.progress_bar.set(1)
+                if kind == "error":
+                    messagebox.showerror("Erro", f"Erro inesperado: {str(payload)}")
+                    self.status_label.configure(text="Erro na operação", text_color="red")
+                else:
+                    self.task_done(payload)
+                return
+        except queue.Empty:
+            pass
+
+        if progresso is not None:
+            texto, feito, total = progresso
+            self.progress_bar.set(feito / total if total else 0)
+            self.progress_label.configure(text=f"{texto}: {feito}/{total}")
+        self.after(self.POLL_INTERVAL_MS, self._poll_task)
+
+    def buscar_duplicados(self):
+        """Procura cópias idênticas entre os resultados da análise"""
+        if self.is_analyzing:
+            messagebox.showinfo("Aguarde", "Já existe uma operação em andamento.")
+            return
+        if not len(self.selection):
+            messagebox.showinfo("Duplicados", "Faça uma análise primeiro.")
+            return
+
+        self.stop_watch()
+        arquivos = self.selection.rows[:]
+        workers = self.config.get("hash_workers", 4)
+        etapas = {"partial": "Hash parcial", "full": "Hash completo"}
+        self.status_label.configure(text="Procurando duplicados...", text_color="blue")
+
+        def tarefa(progress):
+            return find_duplicate_files(
+                arquivos, workers=workers,
+                progress=lambda etapa, feito, total: progress(etapas[etapa], feito, total),
+            )
+
+        self._start_task(tarefa, lambda grupos: self._show_duplicates(grupos, arquivos))
+
+    def _show_duplicates(self, grupos, arquivos_analisados):
+        """Exibe os grupos de duplicados com as cópias extras já selecionadas"""
+        self.selection.clear()
+        self.stats = ScanStats()
+        if not grupos:
+            self.result_list.empty_text = "Nenhum arquivo duplicado encontrado."
+            self.result_list.refresh()
+            self.status_label.configure(text="Nenhum duplicado encontrado", text_color="green")
+            return
+
+        # Linhas da análise, para manter mtime, dono e espaço em disco
+        linhas = {row.path: row for row in arquivos_analisados}
+
+        def linha(path, size):
+            row = linhas.get(path)
+            if row is None:
+                # Caminho fora da análise: dados do disco, se ainda existir
+                try:
+                    row = entry_from_stat(path, os.stat(path))
+                except OSError:
+                    row = FileEntry(path, size, 0.0)
+            return row
+
+        for grupo in grupos:
+            inicio = len(self.selection)
+            self.selection.extend([linha(path, grupo.size) for path in grupo.paths])
+            # Mantém o mais antigo de cada grupo, marca as cópias
+            for index in range(inicio + 1, len(self.selection)):
+                self.selection.set_selected(index, True)
+        recuperavel = self.selection.selected_bytes()
+        self.stats = collect_stats(self.selection.rows)
+        self.result_list.refresh()
+        self.status_label.configure(
+            text=f"{len(grupos)} grupos de duplicados - {format_size(recuperavel)} recuperáveis "
+                 f"(cópias extras selecionadas)",
+            text_color="green"
+        )
 
     def excluir(self):
+        if self.is_analyzing:
+            messagebox.showinfo("Aguarde", "Já existe uma operação em andamento.")
+            return
         arquivos = self.get_selecionados()
         if not arquivos:
             messagebox.showinfo("Nada selecionado", "Selecione ao menos um arquivo.")
@@ -382,6 +851,26 @@ class LimpadorApp(ctk.CTk):
 
         # Calcular tamanho total que será liberado
         tamanho_total = self.calcular_tamanho_selecionados()
+
+        if self.config.get("use_quarantine", True):
+            dias = self.config.get("quarantine_days", 0)
+            msg_quarentena = (
+                f"Mover {len(arquivos)} arquivo(s) para a quarentena?\n"
+                f"Espaço a ser liberado: {format_size(tamanho_total)}\n\n"
+                f"Eles podem ser restaurados pelo botão ♻️ Quarentena"
+                + (f" por {dias} dias." if dias > 0 else ".")
+            )
+            if not messagebox.askyesno("Confirmar Exclusão", msg_quarentena):
+                return
+            self.stop_watch()
+            self.status_label.configure(text="Movendo para a quarentena...", text_color="red")
+
+            def tarefa(progress):
+                return quarentenar_arquivos(
+                    arquivos, progress=lambda feitos, total: progress("Excluindo", feitos, total))
+
+            self._start_task(tarefa, lambda erros: self._finish_excluir(arquivos, erros, quarentena=True))
+            return
         
         # PRIMEIRA CONFIRMAÇÃO - Mais detalhada
         msg_primeira = (
@@ -424,32 +913,141 @@ class LimpadorApp(ctk.CTk):
         if not messagebox.askyesno("🚨 Confirmação Final", msg_segunda, icon="warning"):
             return
 
-        # Executar exclusão
+        # Executar exclusão em segundo plano
+        self.stop_watch()
         self.status_label.configure(text="Excluindo arquivos...", text_color="red")
-        self.update()
-        
-        try:
-            erros = excluir_arquivos(arquivos)
-            if erros:
-                erro_msg = "Alguns arquivos não foram excluídos:\n\n"
-                for arquivo, erro in erros[:5]:  # Mostrar apenas os primeiros 5 erros
-                    erro_msg += f"• {os.path.basename(arquivo)}: {erro}\n"
-                if len(erros) > 5:
-                    erro_msg += f"\n... e mais {len(erros) - 5} erros."
-                messagebox.showwarning("Erros na Exclusão", erro_msg)
-                self.status_label.configure(text=f"Exclusão com erros - {len(erros)} falhas", text_color="orange")
-            else:
-                messagebox.showinfo("Sucesso", f"✅ {len(arquivos)} arquivo(s) excluído(s) com sucesso!\nEspaço liberado: {format_size(tamanho_total)}")
-                self.status_label.configure(text=f"Exclusão concluída - {len(arquivos)} arquivos removidos", text_color="green")
-            
-            # Atualizar a lista
-            self.analisar()
-            
-        except Exception as e:
-            messagebox.showerror("Erro", f"Erro durante a exclusão: {str(e)}")
-            self.status_label.configure(text="Erro na exclusão", text_color="red")
+        workers = self.config.get("delete_workers", 8)
+
+        def tarefa(progress):
+            return excluir_arquivos(
+                arquivos, workers=workers,
+                progress=lambda feitos, total: progress("Excluindo", feitos, total),
+            )
+
+        self._start_task(tarefa, lambda erros: self._finish_excluir(arquivos, erros))
+
+    def _finish_excluir(self, arquivos, erros, quarentena=False):
+        """Mostra o resultado da exclusão e retira da lista o que foi excluído"""
+        falhas = {arquivo for arquivo, _ in erros}
+        removidos = self.selection.remove_paths(p for p in arquivos if p not in falhas)
+        for entry in removidos:
+            self.stats.remove(entry)
+        liberado = sum(disk_usage(entry) for entry in removidos)
+        self.result_list.refresh()
+
+        if erros:
+            erro_msg = "Alguns arquivos não foram excluídos:\n\n"
+            for arquivo, erro in erros[:5]:  # Mostrar apenas os primeiros 5 erros
+                erro_msg += f"• {os.path.basename(arquivo)}: {erro}\n"
+            if len(erros) > 5:
+                erro_msg += f"\n... e mais {len(erros) - 5} erros."
+            messagebox.showwarning("Erros na Exclusão", erro_msg)
+            self.status_label.configure(text=f"Exclusão com erros - {len(erros)} falhas", text_color="orange")
+        elif quarentena:
+            messagebox.showinfo("Sucesso", f"✅ {len(arquivos)} arquivo(s) movido(s) para a quarentena!\n"
+                                           f"Espaço liberado ao esvaziar a quarentena: {format_size(liberado)}")
+            self.status_label.configure(text=f"Exclusão concluída - {len(arquivos)} arquivos na quarentena "
+                                             f"(♻️ para desfazer)", text_color="green")
+        else:
+            messagebox.showinfo("Sucesso", f"✅ {len(arquivos)} arquivo(s) excluído(s) com sucesso!\nEspaço liberado: {format_size(liberado)}")
+            self.status_label.configure(text=f"Exclusão concluída - {len(arquivos)} arquivos removidos", text_color="green")
+
+    def show_quarantine(self):
+        """Mostra a quarentena com as opções de restaurar e esvaziar"""
+        if self.is_analyzing:
+            messagebox.showinfo("Aguarde", "Já existe uma operação em andamento.")
+            return
+        entradas = listar_quarentena()
+        janela = ctk.CTkToplevel(self)
+        janela.title("Quarentena")
+        janela.geometry("600x500")
+
+        total = sum(entrada.disk for entrada in entradas)
+        ctk.CTkLabel(janela, text=f"♻️ {len(entradas)} arquivos na quarentena - {format_size(total)}",
+                     font=("Arial", 14, "bold")).pack(pady=10)
+
+        lista = ctk.CTkScrollableFrame(janela)
+        lista.pack(fill="both", expand=True, padx=20, pady=10)
+        for entrada in entradas[:self.QUARANTINE_LIST_LIMIT]:
+            quando = time.strftime("%d/%m/%Y %H:%M", time.localtime(entrada.time))
+            ctk.CTkLabel(lista, text=f"{quando}  {entrada.path} ({format_size(entrada.size)})").pack(anchor="w", padx=10)
+        if len(entradas) > self.QUARANTINE_LIST_LIMIT:
+            ctk.CTkLabel(lista, text=f"... e mais {len(entradas) - self.QUARANTINE_LIST_LIMIT} arquivos").pack(anchor="w", padx=10)
+
+        acoes = ctk.CTkFrame(janela)
+        acoes.pack(pady=10)
+
+        def executar(acao):
+            janela.destroy()
+            acao()
+
+        ctk.CTkButton(acoes, text="↩️ Desfazer última exclusão",
+                      command=lambda: executar(lambda: self.restaurar(ultimo_lote=True))).pack(side="left", padx=5)
+        ctk.CTkButton(acoes, text="♻️ Restaurar tudo",
+                      command=lambda: executar(self.restaurar)).pack(side="left", padx=5)
+        ctk.CTkButton(acoes, text="🧹 Esvaziar", fg_color="red",
+                      command=lambda: executar(self.esvaziar_quarentena)).pack(side="left", padx=5)
+
+    def restaurar(self, ultimo_lote=False):
+        """Devolve arquivos da quarentena e os recoloca na lista"""
+        self.stop_watch()
+        self.status_label.configure(text="Restaurando arquivos...", text_color="blue")
+
+        def tarefa(progress):
+            return restaurar_arquivos(
+                ultimo_lote=ultimo_lote,
+                progress=lambda feitos, total: progress("Restaurando", feitos, total))
+
+        self._start_task(tarefa, lambda resultado: self._finish_restaurar(*resultado))
+
+    def _finish_restaurar(self, restaurados, erros):
+        novos = []
+        for path in restaurados:
+            try:
+                novos.append(entry_from_stat(path, os.stat(path)))
+            except OSError:
+                pass
+        if novos:
+            self.selection.extend(novos)
+            self.selection.sort_by_size()
+            for entry in novos:
+                self.stats.add(entry)
+            self.result_list.refresh()
+
+        if erros:
+            erro_msg = "Alguns arquivos não foram restaurados:\n\n"
+            for arquivo, erro in erros[:5]:
+                erro_msg += f"• {os.path.basename(arquivo)}: {erro}\n"
+            if len(erros) > 5:
+                erro_msg += f"\n... e mais {len(erros) - 5} erros."
+            messagebox.showwarning("Erros na Restauração", erro_msg)
+            self.status_label.configure(text=f"Restauração com erros - {len(erros)} falhas", text_color="orange")
+        else:
+            self.status_label.configure(text=f"Restauração concluída - {len(restaurados)} arquivos", text_color="green")
+
+    def esvaziar_quarentena(self):
+        """Elimina de vez todos os arquivos da quarentena"""
+        if not messagebox.askyesno("🚨 Esvaziar Quarentena",
+                                   "Excluir permanentemente todos os arquivos da quarentena?\n\n"
+                                   "Esta ação NÃO PODE ser desfeita!", icon="warning"):
+            return
+        self.status_label.configure(text="Esvaziando a quarentena...", text_color="red")
+
+        def tarefa(progress):
+            return limpar_quarentena(0, progress=lambda feitos, total: progress("Eliminando", feitos, total))
+
+        self._start_task(tarefa, lambda resultado: self._finish_esvaziar(*resultado))
+
+    def _finish_esvaziar(self, erros, liberado):
+        if erros:
+            messagebox.showwarning("Erros na Quarentena", f"{len(erros)} arquivos não foram eliminados.")
+        self.status_label.configure(text=f"Quarentena esvaziada - {format_size(liberado)} liberados",
+                                    text_color="orange" if erros else "green")
 
     def mover(self):
+        if self.is_analyzing:
+            messagebox.showinfo("Aguarde", "Já existe uma operação em andamento.")
+            return
         arquivos = self.get_selecionados()
         if not arquivos:
             messagebox.showinfo("Nada selecionado", "Selecione ao menos um arquivo.")
@@ -477,31 +1075,155 @@ class LimpadorApp(ctk.CTk):
         if not messagebox.askyesno("Confirmar Movimentação", msg_confirmacao):
             return
 
+        self.stop_watch()
         self.status_label.configure(text="Movendo arquivos...", text_color="blue")
-        self.update()
-        
-        try:
-            erros = mover_arquivos(arquivos, destino)
-            if erros:
-                erro_msg = "Alguns arquivos não foram movidos:\n\n"
-                for arquivo, erro in erros[:5]:
-                    erro_msg += f"• {os.path.basename(arquivo)}: {erro}\n"
-                if len(erros) > 5:
-                    erro_msg += f"\n... e mais {len(erros) - 5} erros."
-                messagebox.showwarning("Erros na Movimentação", erro_msg)
-                self.status_label.configure(text=f"Movimentação com erros - {len(erros)} falhas", text_color="orange")
-            else:
-                messagebox.showinfo("Sucesso", f"✅ {len(arquivos)} arquivo(s) movido(s) com sucesso!")
-                self.status_label.configure(text=f"Movimentação concluída - {len(arquivos)} arquivos", text_color="green")
-            
-            # Atualizar a lista
-            self.analisar()
-            
-        except Exception as e:
-            messagebox.showerror("Erro", f"Erro durante a movimentação: {str(e)}")
-            self.status_label.configure(text="Erro na movimentação", text_color="red")
+        workers = self.config.get("move_workers", 4)
+        verify = self.config.get("verify_moves", False)
+
+        def tarefa(progress):
+            return mover_arquivos(
+                arquivos, destino, workers=workers, verify=verify,
+                progress=lambda feitos, total: progress("Movendo", feitos, total),
+            )
+
+        self._start_task(tarefa, lambda erros: self._finish_mover(arquivos, destino, erros))
+
+    def _finish_mover(self, arquivos, destino, erros):
+        """Mostra o resultado e atualiza a lista sem varrer a pasta de novo"""
+        falhas = {arquivo for arquivo, _ in erros}
+        movidos = [p for p in arquivos if p not in falhas]
+        removidos = self.selection.remove_paths(movidos)
+        for entry in removidos:
+            self.stats.remove(entry)
+
+        # Se o destino está dentro de uma pasta analisada, os arquivos continuam nela
+        if self.scan_params is not None:
+            destino_abs = os.path.abspath(destino)
+            raizes = [os.path.abspath(pasta) for pasta in self.scan_params[0]]
+            if any(os.path.commonpath([raiz, destino_abs]) == raiz for raiz in raizes):
+                novos = [entry._replace(path=os.path.join(destino, os.path.basename(entry.path)))
+                         for entry in removidos]
+                self.selection.extend(novos)
+                self.selection.sort_by_size()
+                for entry in novos:
+                    self.stats.add(entry)
+        self.result_list.refresh()
+
+        if erros:
+            erro_msg = "Alguns arquivos não foram movidos:\n\n"
+            for arquivo, erro in erros[:5]:
+                erro_msg += f"• {os.path.basename(arquivo)}: {erro}\n"
+            if len(erros) > 5:
+                erro_msg += f"\n... e mais {len(erros) - 5} erros."
+            messagebox.showwarning("Erros na Movimentação", erro_msg)
+            self.status_label.configure(text=f"Movimentação com erros - {len(erros)} falhas", text_color="orange")
+        else:
+            messagebox.showinfo("Sucesso", f"✅ {len(arquivos)} arquivo(s) movido(s) com sucesso!")
+            self.status_label.configure(text=f"Movimentação concluída - {len(arquivos)} arquivos", text_color="green")
+
+
+
+    def comprimir(self, formato=None):
+        """Comprime os selecionados; sem formato, pergunta qual usar"""
+        if self.is_analyzing:
+            messagebox.showinfo("Aguarde", "Já existe uma operação em andamento.")
+            return
+        arquivos = self.get_selecionados()
+        if not arquivos:
+            messagebox.showinfo("Nada selecionado", "Selecione ao menos um arquivo.")
+            return
+        if formato is None:
+            self._escolher_formato()
+            return
+
+        destino_tar = None
+        codec = formato
+        if formato.startswith("tar."):
+            codec = COMPRESS_FORMATS[formato]
+            destino_tar = filedialog.asksaveasfilename(title="Salvar arquivo tar", defaultextension="." + formato,
+                                                       initialfile="arquivos." + formato)
+            if not destino_tar:
+                return
 
+        tamanho_total = self.calcular_tamanho_selecionados()
+        msg_confirmacao = (
+            f"Comprimir {len(arquivos)} arquivo(s) com {formato}?\n\n"
+            f"Tamanho total: {format_size(tamanho_total)}\n\n"
+            f"Os originais são removidos depois que o resultado for conferido."
+        )
+        if not messagebox.askyesno("Confirmar Compressão", msg_confirmacao):
+            return
+
+        self.config["compress_format"] = formato
+        self.save_config()
+        self.stop_watch()
+        self.status_label.configure(text="Comprimindo arquivos...", text_color="blue")
+        workers = self.config.get("compress_workers", 0) or None
+
+        def tarefa(progress):
+            comprimidos = set()
+
+            def on_result(result):
+                if result.ok:
+                    comprimidos.add(result.path)
 
+            erros, economizado = comprimir_arquivos(
+                arquivos, codec, workers=workers, destino_tar=destino_tar,
+                progress=lambda feitos, total: progress("Comprimindo", feitos, total),
+                on_result=on_result,
+            )
+            return erros, economizado, comprimidos
+
+        self._start_task(tarefa, lambda resultado: self._finish_comprimir(arquivos, *resultado))
+
+    def _escolher_formato(self):
+        """Janela com a escolha do formato de compressão"""
+        janela = ctk.CTkToplevel(self)
+        janela.title("Comprimir")
+        janela.geometry("320x160")
+        ctk.CTkLabel(janela, text="Formato:").pack(pady=10)
+        formato = ctk.CTkOptionMenu(janela, values=list(COMPRESS_FORMATS))
+        formato.set(self.config.get("compress_format", "gzip"))
+        formato.pack(pady=5)
+
+        def confirmar():
+            escolhido = formato.get()
+            janela.destroy()
+            self.comprimir(escolhido)
+
+        ctk.CTkButton(janela, text="Comprimir", command=confirmar).pack(pady=10)
+
+    def _finish_comprimir(self, arquivos, erros, economizado, comprimidos):
+        """Retira da lista os arquivos comprimidos e mostra o espaço liberado"""
+        # Só sai da lista o que foi confirmado; um arquivo sem resultado continua nela
+        falhas = {arquivo for arquivo, _ in erros}
+        erros = erros + [(p, "Não foi processado") for p in arquivos
+                         if p not in comprimidos and p not in falhas]
+        if falhas - set(arquivos):
+            # Erro no destino do tar: nenhum arquivo foi tocado
+            erros = [(p, e) for p, e in erros if p in falhas]
+        removidos = self.selection.remove_paths(p for p in arquivos if p in comprimidos)
+        for entry in removidos:
+            self.stats.remove(entry)
+        self.result_list.refresh()
+
+        if erros:
+            erro_msg = "Alguns arquivos não foram comprimidos:\n\n"
+            for arquivo, erro in erros[:5]:
+                erro_msg += f"• {os.path.basename(arquivo)}: {erro}\n"
+            if len(erros) > 5:
+                erro_msg += f"\n... e mais {len(erros) - 5} erros."
+            erro_msg += f"\nEspaço liberado: {format_size(economizado)}"
+            messagebox.showwarning("Erros na Compressão", erro_msg)
+            self.status_label.configure(
+                text=f"Compressão com erros - {len(erros)} falhas | {format_size(economizado)} liberados",
+                text_color="orange")
+        else:
+            messagebox.showinfo("Sucesso", f"✅ {len(removidos)} arquivo(s) comprimido(s)!\n"
+                                           f"Espaço liberado: {format_size(economizado)}")
+            self.status_label.configure(
+                text=f"Compressão concluída - {len(removidos)} arquivos | {format_size(economizado)} liberados",
+                text_color="green")
 
     def toggle_filters(self):
         """Mostra/oculta o painel de filtros"""
@@ -529,12 +1251,12 @@ class LimpadorApp(ctk.CTk):
     def clear_filters(self):
         """Limpa todos os filtros"""
         # Desmarcar checkboxes
-        for name in ["videos", "images", "documents", "archives", "others", "hidden"]:
+        for name in list(self._type_widgets()) + ["hidden", "one_fs", "follow_links"]:
             if name in self.filter_widgets:
                 self.filter_widgets[name].deselect()
         
         # Limpar campos de entrada
-        for name in ["max_size", "days_old"]:
+        for name in ["max_size", "days_old", "exclude"]:
             if name in self.filter_widgets:
                 self.filter_widgets[name].delete(0, "end")
         
@@ -544,7 +1266,10 @@ class LimpadorApp(ctk.CTk):
             "min_size_mb": 0,
             "max_size_mb": 0,
             "days_old": 0,
-            "include_hidden": False
+            "include_hidden": False,
+            "exclude_patterns": [],
+            "one_file_system": False,
+            "follow_symlinks": False
         }
         self.save_config()
 
@@ -555,19 +1280,14 @@ class LimpadorApp(ctk.CTk):
             "min_size_mb": int(self.limite_entry.get() or 0),
             "max_size_mb": 0,
             "days_old": 0,
-            "include_hidden": False
+            "include_hidden": False,
+            "exclude_patterns": [],
+            "one_file_system": False,
+            "follow_symlinks": False
         }
         
         # Tipos de arquivo selecionados
-        type_mapping = {
-            "videos": "video",
-            "images": "image", 
-            "documents": "document",
-            "archives": "archive",
-            "others": "other"
-        }
-        
-        for name, file_type in type_mapping.items():
+        for name, file_type in self._type_widgets().items():
             if name in self.filter_widgets and self.filter_widgets[name].get():
                 filters["file_types"].append(file_type)
         
@@ -592,22 +1312,35 @@ class LimpadorApp(ctk.CTk):
         # Arquivos ocultos
         if "hidden" in self.filter_widgets:
             filters["include_hidden"] = self.filter_widgets["hidden"].get()
+
+        # Padrões de exclusão separados por vírgula
+        if "exclude" in self.filter_widgets:
+            filters["exclude_patterns"] = [pattern.strip() for pattern in self.filter_widgets["exclude"].get().split(",")
+                                           if pattern.strip()]
+
+        # Limites da travessia
+        if "one_fs" in self.filter_widgets:
+            filters["one_file_system"] = bool(self.filter_widgets["one_fs"].get())
+        if "follow_links" in self.filter_widgets:
+            filters["follow_symlinks"] = bool(self.filter_widgets["follow_links"].get())
         
         self.config["filters"] = filters
         self.save_config()
 
+    def _type_widgets(self):
+        """Checkboxes de tipo existentes -> categoria"""
+        widgets = dict(TYPE_WIDGETS)
+        for name in self.filter_widgets:
+            if name.startswith("cat:"):
+                widgets[name] = name[4:]
+        return widgets
+
     def load_saved_filters(self):
         """Carrega filtros salvos na interface"""
         filters = self.config.get("filters", {})
         
         # Restaurar tipos de arquivo
-        type_mapping = {
-            "video": "videos",
-            "image": "images",
-            "document": "documents", 
-            "archive": "archives",
-            "other": "others"
-        }
+        type_mapping = {file_type: name for name, file_type in self._type_widgets().items()}
         
         for file_type in filters.get("file_types", []):
             widget_name = type_mapping.get(file_type)
@@ -626,6 +1359,14 @@ class LimpadorApp(ctk.CTk):
         if filters.get("include_hidden", False):
             self.filter_widgets["hidden"].select()
 
+        # Restaurar exclusões e limites da travessia
+        if filters.get("exclude_patterns"):
+            self.filter_widgets["exclude"].insert(0, ", ".join(filters["exclude_patterns"]))
+        if filters.get("one_file_system", False):
+            self.filter_widgets["one_fs"].select()
+        if filters.get("follow_symlinks", False):
+            self.filter_widgets["follow_links"].select()
+
 
 
     def apply_preset(self, preset_name):
@@ -661,12 +1402,34 @@ class LimpadorApp(ctk.CTk):
             "theme": "light",
             "default_size_mb": 100,
             "last_folder": "",
+            "scan_workers": 8,
+            "top_k": 0,
+            "use_index": False,
+            "hash_workers": 4,
+            "delete_workers": 8,
+            "move_workers": 4,
+            "verify_moves": False,
+            # Exclusão vai para a quarentena, eliminada após quarantine_days
+            # dias (0 = só manualmente)
+            "use_quarantine": True,
+            "quarantine_days": 30,
+            # Compressão: "gzip", "bz2", "xz" ou "tar.gz", "tar.bz2", "tar.xz";
+            # 0 processos = um por núcleo
+            "compress_format": "gzip",
+            "compress_workers": 0,
+            # Categorias extras {"nome": [".ext", ...]} e identificação
+            # pelo conteúdo: "off", "unknown" ou "all"
+            "categories": {},
+            "content_sniffing": "off",
             "filters": {
                 "file_types": [],
                 "min_size_mb": 0,
                 "max_size_mb": 0,
                 "days_old": 0,
-                "include_hidden": False
+                "include_hidden": False,
+                "exclude_patterns": [],
+                "one_file_system": False,
+                "follow_symlinks": False
             }
         }
         
@@ -679,6 +1442,8 @@ class LimpadorApp(ctk.CTk):
                     self.config[key] = value
         except:
             self.config = default_config
+        configure_categories(self.config.get("categories"), self.config.get("content_sniffing", "off"),
+                             workers=self.config.get("hash_workers", 4))
 
     def save_config(self):
         """Salva configurações"""
@@ -688,6 +1453,75 @@ class LimpadorApp(ctk.CTk):
         except:
             pass
 
+    def toggle_watch(self):
+        """Liga/desliga o monitoramento dos resultados"""
+        if self.watcher is not None:
+            self.stop_watch()
+            self.status_label.configure(text="Monitoramento encerrado", text_color="gray")
+            return
+
+        if self.is_analyzing or self.scan_params is None:
+            messagebox.showinfo("Monitorar", "Conclua uma análise primeiro.")
+            return
+
+        pastas, limite_str, filters = self.scan_params
+        if len(pastas) > 1:
+            messagebox.showinfo("Monitorar", "O monitoramento acompanha uma pasta por vez.")
+            return
+        try:
+            self.watcher = watch_large_files(
+                pastas[0], limite_str, self._on_watch_event,
+                filters=filters, initial=self.selection.rows,
+            )
+        except ValueError as e:
+            messagebox.showerror("Erro de Validação", str(e))
+            return
+        self.watch_button.configure(text="👁️ Parar")
+        self.status_label.configure(text="Monitorando alterações...", text_color="blue")
+        self.after(self.WATCH_POLL_MS, self._poll_watch)
+
+    def stop_watch(self):
+        if self.watcher is not None:
+            self.watcher.stop()
+            self.watcher = None
+            self.watch_button.configure(text="👁️ Monitorar")
+
+    def _on_watch_event(self, kind, entry):
+        # Chamado na thread do watcher
+        self.watch_queue.put((kind, entry))
+
+    def _poll_watch(self):
+        """Aplica à lista os eventos recebidos do watcher"""
+        if self.watcher is None:
+            return
+        changed = False
+        try:
+            while True:
+                kind, entry = self.watch_queue.get_nowait()
+                if kind == "remove":
+                    previous = self.selection.remove(entry.path)
+                else:
+                    previous = self.selection.upsert(entry)
+                # A versão anterior sai antes: stats guarda a categoria por caminho
+                if previous is not None:
+                    self.stats.remove(previous)
+                    changed = True
+                if kind != "remove":
+                    self.stats.add(entry)
+                    changed = True
+        except queue.Empty:
+            pass
+
+        if changed:
+            self.selection.sort_by_size()
+            self.result_list.refresh()
+            self.status_label.configure(
+                text=f"Monitorando ({self.watcher.mode}) - {len(self.selection)} arquivos - "
+                     f"Total: {format_size(self.selection.total_bytes())}",
+                text_color="blue"
+            )
+        self.after(self.WATCH_POLL_MS, self._poll_watch)
+
     def apply_theme(self):
         """Aplica o tema atual"""
         theme = self.config.get("theme", "light")
@@ -709,70 +1543,58 @@ class LimpadorApp(ctk.CTk):
         self.apply_theme()
 
     def desmarcar_todos(self):
-        """Desmarca todos os checkboxes"""
-        for var, _ in self.checkboxes:
-            var.set(False)
+        """Desmarca todos os arquivos"""
+        self.selection.clear_selection()
+        self.result_list.refresh()
         self.update_selection_status()
 
     def update_selection_status(self):
         """Atualiza status baseado na seleção"""
-        if self.checkboxes:
-            selected_count = sum(1 for var, _ in self.checkboxes if var.get())
+        if len(self.selection):
+            selected_count = self.selection.selected_count()
             if selected_count > 0:
                 tamanho_total = self.calcular_tamanho_selecionados()
                 self.status_label.configure(
-                    text=f"{selected_count} de {len(self.checkboxes)} arquivos selecionados - Total: {format_size(tamanho_total)}", 
+                    text=f"{selected_count} de {len(self.selection)} arquivos selecionados - Total: {format_size(tamanho_total)}", 
                     text_color="blue"
                 )
             else:
                 self.status_label.configure(
-                    text=f"{len(self.checkboxes)} arquivos disponíveis", 
+                    text=f"{len(self.selection)} arquivos disponíveis", 
                     text_color="gray"
                 )
 
     def selecionar_todos(self):
-        for var, _ in self.checkboxes:
-            var.set(True)
+        self.selection.select_all()
+        self.result_list.refresh()
         self.update_selection_status()
     def show_stats(self):
-        """Mostra estatísticas dos arquivos"""
-        if not self.checkboxes:
+        """Mostra estatísticas dos arquivos, já agrupadas durante a análise"""
+        if not len(self.selection):
             messagebox.showinfo("Estatísticas", "Faça uma análise primeiro.")
             return
 
-        # Calcular estatísticas
-        total_files = len(self.checkboxes)
-        total_size = 0
-        stats_by_type = {}
-        
-        for var, path in self.checkboxes:
-            try:
-                size = os.path.getsize(path)
-                total_size += size
-                
-                ext = os.path.splitext(path)[1].lower()
-                if ext in ['.mp4', '.avi', '.mkv', '.mov', '.wmv']:
-                    category = '🎬 Vídeos'
-                elif ext in ['.jpg', '.jpeg', '.png', '.gif', '.bmp']:
-                    category = '🖼️ Imagens'
-                elif ext in ['.pdf', '.doc', '.docx', '.txt', '.rtf']:
-                    category = '📄 Documentos'
-                elif ext in ['.zip', '.rar', '.7z', '.tar', '.gz']:
-                    category = '📦 Arquivos'
-                else:
-                    category = '📁 Outros'
-                
-                if category not in stats_by_type:
-                    stats_by_type[category] = {'count': 0, 'size': 0}
-                stats_by_type[category]['count'] += 1
-                stats_by_type[category]['size'] += size
-            except:
-                pass
+        stats = self.stats
+        total_size = stats.total_bytes
+        categorias = {
+            "video": "🎬 Vídeos",
+            "image": "🖼️ Imagens",
+            "document": "📄 Documentos",
+            "archive": "📦 Arquivos",
+            "other": "📁 Outros",
+        }
+        secoes = [
+            ("Por tipo de arquivo:", "category", lambda key: categorias.get(key, key)),
+            ("Por extensão:", "extension", str),
+            ("Por dono:", "owner", owner_name),
+            ("Por idade:", "age", str),
+            ("Por tamanho:", "size", lambda key: size_bucket_label(key, format_size)),
+        ]
 
         # Criar janela de estatísticas
         stats_window = ctk.CTkToplevel(self)
         stats_window.title("Estatísticas dos Arquivos")
-        stats_window.geometry("500x400")
+        stats_window.geometry("500x600")
         stats_window.grab_set()
 
         ctk.CTkLabel(stats_window, text="📊 Estatísticas dos Arquivos", font=("Arial", 16, "bold")).pack(pady=10)
@@ -781,18 +1603,65 @@ class LimpadorApp(ctk.CTk):
         general_frame = ctk.CTkFrame(stats_window)
         general_frame.pack(fill="x", padx=20, pady=10)
         
-        ctk.CTkLabel(general_frame, text=f"Total de arquivos: {total_files}", font=("Arial", 12, "bold")).pack(anchor="w", padx=10, pady=2)
+        ctk.CTkLabel(general_frame, text=f"Total de arquivos: {stats.total_files}", font=("Arial", 12, "bold")).pack(anchor="w", padx=10, pady=2)
         ctk.CTkLabel(general_frame, text=f"Tamanho total: {format_size(total_size)}", font=("Arial", 12, "bold")).pack(anchor="w", padx=10, pady=2)
 
-        # Estatísticas por tipo
-        type_frame = ctk.CTkFrame(stats_window)
-        type_frame.pack(fill="both", expand=True, padx=20, pady=10)
-        
-        ctk.CTkLabel(type_frame, text="Por tipo de arquivo:", font=("Arial", 12, "bold")).pack(anchor="w", padx=10, pady=5)
+        # Estatísticas por agrupamento
+        groups_frame = ctk.CTkScrollableFrame(stats_window)
+        groups_frame.pack(fill="both", expand=True, padx=20, pady=10)
 
-        for category, data in stats_by_type.items():
-            percentage = (data['size'] / total_size * 100) if total_size > 0 else 0
-            text = f"{category}: {data['count']} arquivos - {format_size(data['size'])} ({percentage:.1f}%)"
-            ctk.CTkLabel(type_frame, text=text).pack(anchor="w", padx=20, pady=2)
+        for titulo, agrupamento, rotulo in secoes:
+            ctk.CTkLabel(groups_frame, text=titulo, font=("Arial", 12, "bold")).pack(anchor="w", padx=10, pady=5)
+            for key, count, size in stats.top(agrupamento, limit=10):
+                percentage = (size / total_size * 100) if total_size > 0 else 0
+                text = f"{rotulo(key)}: {count} arquivos - {format_size(size)} ({percentage:.1f}%)"
+                ctk.CTkLabel(groups_frame, text=text).pack(anchor="w", padx=20, pady=2)
 
         ctk.CTkButton(stats_window, text="Fechar", command=stats_window.destroy).pack(pady=20)
+
+    def show_dir_tree(self):
+        """Mostra o uso de disco por pasta, do maior para o menor"""
+        if self.scanner is None or self.is_analyzing or not self.scanner.dir_totals:
+            messagebox.showinfo("Pastas", "Conclua uma análise primeiro.")
+            return
+
+        raiz = self.scanner.dir_tree()
+        tree_window = ctk.CTkToplevel(self)
+        tree_window.title("Uso de disco por pasta")
+        tree_window.geometry("700x500")
+
+        ctk.CTkLabel(tree_window, text=f"📂 {raiz.path} - {format_size(raiz.total_bytes)} em {raiz.total_files} arquivos",
+                     font=("Arial", 14, "bold")).pack(pady=10)
+
+        tree = ttk.Treeview(tree_window, columns=("size", "files"))
+        tree.heading("#0", text="Pasta")
+        tree.heading("size", text="Tamanho")
+        tree.heading("files", text="Arquivos")
+        tree.column("size", width=120, anchor="e")
+        tree.column("files", width=90, anchor="e")
+        tree.pack(fill="both", expand=True, padx=20, pady=10)
+
+        # Os filhos de cada pasta só são inseridos quando ela é aberta
+        nodes = {}
+
+        def insert_children(item, node):
+            for child in node.children:
+                child_item = tree.insert(item, "end", text=child.name,
+                                         values=(format_size(child.total_bytes), child.total_files))
+                nodes[child_item] = child
+                if child.children:
+                    tree.insert(child_item, "end", text="...")
+
+        def on_open(event):
+            item = tree.focus()
+            node = nodes.get(item)
+            if node is not None and node.children and tree.get_children(item):
+                first = tree.get_children(item)[0]
+                if first not in nodes:
+                    tree.delete(first)
+                    insert_children(item, node)
+
+        tree.bind("<<TreeviewOpen>>", on_open)
+        insert_children("", raiz)
+
+        ctk.CTkButton(tree_window, text="Fechar", command=tree_window.destroy).pack(pady=10)
@@ -1,5 +1,11 @@
-from gui import LimpadorApp
+import sys
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        # Modo texto: não importa a interface gráfica
+        from cli import main
+        sys.exit(main())
+
+    from gui import LimpadorApp
     app = LimpadorApp()
-    app.mainloop()
\ No newline at end of file
+    app.mainloop()
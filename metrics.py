@@ -0,0 +1,109 @@
+import errno
+import threading
+import time
+from contextlib import contextmanager
+
+# Caminhos de exemplo guardados por código de erro
+ERROR_SAMPLES = 5
+
+
+class ScanMetrics:
+    """
+    Contadores de uma varredura, atualizados pelas threads do scanner:
+    pastas e arquivos visitados, chamadas de stat, erros agrupados por
+    errno (com alguns caminhos de exemplo), arquivos e bytes aceitos e o
+    tempo de cada fase.
+
+    Fases medidas dentro das threads (walk, filter) somam o tempo de
+    todas elas; sort e render são medidas por quem exibe o resultado.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.dirs = 0
+        self.dirs_cached = 0
+        self.dirs_pruned = 0
+        self.files = 0
+        self.stat_calls = 0
+        self.files_matched = 0
+        self.bytes_matched = 0
+        self.error_count = 0
+        self.errors = {}
+        self.phases = {}
+
+    def add_dir(self, files, stat_calls, cached=False):
+        with self._lock:
+            self.dirs += 1
+            self.files += files
+            self.stat_calls += stat_calls
+            if cached:
+                self.dirs_cached += 1
+
+    def add_pruned(self):
+        """Pasta não percorrida (exclusão, outro dispositivo ou ciclo)"""
+        with self._lock:
+            self.dirs_pruned += 1
+
+    def add_matched(self, files, size):
+        with self._lock:
+            self.files_matched += files
+            self.bytes_matched += size
+
+    def add_error(self, path, error):
+        """Registra um OSError em vez de imprimi-lo"""
+        code = errno.errorcode.get(error.errno, str(error.errno)) if error.errno else type(error).__name__
+        with self._lock:
+            group = self.errors.get(code)
+            if group is None:
+                group = self.errors[code] = {"count": 0, "message": error.strerror or str(error), "samples": []}
+            group["count"] += 1
+            self.error_count += 1
+            if len(group["samples"]) < ERROR_SAMPLES:
+                group["samples"].append(path)
+
+    def add_time(self, phase, seconds):
+        with self._lock:
+            self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    def merge(self, other, skip_phases=()):
+        """Soma as métricas de outra varredura (ex.: de outra raiz)"""
+        snapshot = other.to_dict()
+        with self._lock:
+            for key in ("dirs", "dirs_cached", "dirs_pruned", "files", "stat_calls",
+                        "files_matched", "bytes_matched"):
+                setattr(self, key, getattr(self, key) + snapshot[key])
+            self.error_count += snapshot["errors"]
+            for code, theirs in snapshot["errors_by_errno"].items():
+                group = self.errors.get(code)
+                if group is None:
+                    group = self.errors[code] = {"count": 0, "message": theirs["message"], "samples": []}
+                group["count"] += theirs["count"]
+                group["samples"].extend(theirs["samples"][:ERROR_SAMPLES - len(group["samples"])])
+            for name, seconds in snapshot["phases"].items():
+                if name not in skip_phases:
+                    self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    @contextmanager
+    def phase(self, name):
+        """Soma o tempo do bloco à fase name"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                "dirs": self.dirs,
+                "dirs_cached": self.dirs_cached,
+                "dirs_pruned": self.dirs_pruned,
+                "files": self.files,
+                "stat_calls": self.stat_calls,
+                "files_matched": self.files_matched,
+                "bytes_matched": self.bytes_matched,
+                "errors": self.error_count,
+                "errors_by_errno": {code: dict(group, samples=list(group["samples"]))
+                                    for code, group in self.errors.items()},
+                "phases": dict(self.phases),
+            }
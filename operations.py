@@ -0,0 +1,260 @@
+import errno
+import os
+import shutil
+import stat
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from duplicates import full_hash
+
+# Resultado de uma operação sobre um arquivo
+FileResult = namedtuple("FileResult", ["path", "ok", "error"])
+
+_O_BINARY = getattr(os, "O_BINARY", 0)
+
+# Arquivos por tarefa enviada ao pool
+BATCH_SIZE = 256
+# Bytes por chamada de cópia entre dispositivos
+COPY_CHUNK = 64 * 1024 * 1024
+# Erros que indicam que a chamada de cópia sem buffer não serve aqui
+_ZERO_COPY_UNSUPPORTED = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.EBADF}
+# Erros de os.link que não se resolvem com rename; qualquer outro indica um
+# sistema de arquivos sem links físicos (EPERM, EMLINK, ENOTSUP no macOS,
+# EINVAL em FAT/exFAT no Windows...)
+_LINK_FATAL = {errno.EEXIST, errno.EACCES, errno.ENOENT}
+
+
+class VerificationError(OSError):
+    """A cópia não confere com o arquivo original"""
+
+
+def describe_error(error):
+    """Mensagem amigável para um OSError"""
+    if isinstance(error, VerificationError):
+        return "Cópia não confere com o original"
+    if error.errno == errno.ENOENT:
+        return "Arquivo não existe"
+    if error.errno in (errno.EACCES, errno.EPERM):
+        return "Sem permissão de escrita"
+    if error.errno == errno.EISDIR:
+        return "Não é um arquivo"
+    if error.errno == errno.EEXIST:
+        return "Já existe um arquivo com esse nome no destino"
+    return str(error)
+
+
+def _batches(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _delete_batch(paths):
+    results = []
+    for path in paths:
+        try:
+            # A remoção é a própria validação: sem stat/access prévios
+            os.remove(path)
+        except OSError as e:
+            results.append(FileResult(path, False, describe_error(e)))
+        else:
+            results.append(FileResult(path, True, None))
+    return results
+
+
+def delete_files(paths, workers=8, progress=None, batch_size=BATCH_SIZE, on_result=None):
+    """
+    Exclui arquivos em lotes distribuídos num pool de threads.
+    progress(feitos, total) é chamado no thread chamador a cada lote e
+    on_result(FileResult) para cada arquivo concluído.
+    Retorna um FileResult por arquivo, na ordem de conclusão.
+    """
+    paths = list(paths)
+    total = len(paths)
+    results = []
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = [executor.submit(_delete_batch, batch) for batch in _batches(paths, batch_size)]
+        _collect(futures, results, total, progress, on_result)
+    return results
+
+
+def _collect(futures, results, total, progress, on_result):
+    """Junta os resultados dos lotes à medida que terminam"""
+    for future in as_completed(futures):
+        batch = future.result()
+        results.extend(batch)
+        if on_result:
+            for result in batch:
+                on_result(result)
+        if progress:
+            progress(len(results), total)
+
+
+def _zero_copy(src_fd, dst_fd, offset, size):
+    """
+    Copia de offset até size com copy_file_range ou sendfile, sem passar
+    os dados pelo Python. Retorna o offset alcançado.
+    """
+    for method in ("copy_file_range", "sendfile"):
+        func = getattr(os, method, None)
+        if func is None:
+            continue
+        try:
+            while offset < size:
+                count = min(COPY_CHUNK, size - offset)
+                if method == "copy_file_range":
+                    copied = func(src_fd, dst_fd, count, offset, offset)
+                else:
+                    os.lseek(dst_fd, offset, os.SEEK_SET)
+                    copied = func(dst_fd, src_fd, offset, count)
+                if copied == 0:
+                    break
+                offset += copied
+            return offset
+        except OSError as e:
+            if e.errno not in _ZERO_COPY_UNSUPPORTED:
+                raise
+    return offset
+
+
+def _buffered_copy(src_fd, dst_fd, offset, size):
+    os.lseek(src_fd, offset, os.SEEK_SET)
+    os.lseek(dst_fd, offset, os.SEEK_SET)
+    while offset < size:
+        chunk = os.read(src_fd, min(COPY_CHUNK, size - offset))
+        if not chunk:
+            break
+        os.write(dst_fd, chunk)
+        offset += len(chunk)
+    return offset
+
+
+def _partial_path(target, st):
+    """
+    Arquivo temporário da cópia. O nome inclui tamanho e mtime da origem,
+    então só é retomado se a origem não mudou desde a interrupção.
+    """
+    folder, name = os.path.split(target)
+    return os.path.join(folder, f".{name}.{st.st_size}-{st.st_mtime_ns}.part")
+
+
+def _publish(src, target):
+    """
+    Renomeia src para target sem sobrescrever um arquivo que já exista:
+    o link físico falha com EEXIST de forma atômica. Sem suporte a links,
+    recorre ao rename.
+    """
+    try:
+        os.link(src, target)
+    except OSError as e:
+        if e.errno in _LINK_FATAL:
+            raise
+        if os.path.lexists(target):
+            raise FileExistsError(errno.EEXIST, "Destino já existe", target)
+        os.rename(src, target)
+    else:
+        os.remove(src)
+
+
+def _copy_across_devices(src, target, st, verify):
+    """Copia src para target retomando uma cópia interrompida, depois remove src"""
+    part = _partial_path(target, st)
+    src_fd = os.open(src, os.O_RDONLY | _O_BINARY)
+    try:
+        dst_fd = os.open(part, os.O_WRONLY | os.O_CREAT | _O_BINARY, 0o600)
+        try:
+            offset = os.fstat(dst_fd).st_size
+            if offset > st.st_size:
+                os.ftruncate(dst_fd, 0)
+                offset = 0
+            offset = _zero_copy(src_fd, dst_fd, offset, st.st_size)
+            offset = _buffered_copy(src_fd, dst_fd, offset, st.st_size)
+            os.fsync(dst_fd)
+        finally:
+            os.close(dst_fd)
+    finally:
+        os.close(src_fd)
+
+    if offset != st.st_size or (verify and full_hash(src) != full_hash(part)):
+        os.remove(part)
+        raise VerificationError(errno.EIO, "Falha na verificação da cópia", src)
+
+    shutil.copystat(src, part)
+    try:
+        _publish(part, target)
+    except OSError:
+        os.remove(part)
+        raise
+    os.remove(src)
+
+
+def _move_one(src, st, dest_dir, dest_dev, verify):
+    target = os.path.join(dest_dir, os.path.basename(src))
+    try:
+        if os.path.lexists(target):
+            raise FileExistsError(errno.EEXIST, "Destino já existe", target)
+        if st.st_dev == dest_dev:
+            try:
+                if stat.S_ISREG(st.st_mode):
+                    _publish(src, target)
+                else:
+                    os.rename(src, target)
+                return FileResult(src, True, None)
+            except OSError as e:
+                # Montagens distintas no mesmo dispositivo (bind mounts)
+                if e.errno != errno.EXDEV:
+                    raise
+        if stat.S_ISREG(st.st_mode):
+            _copy_across_devices(src, target, st, verify)
+        else:
+            shutil.move(src, target)
+    except OSError as e:
+        return FileResult(src, False, describe_error(e))
+    return FileResult(src, True, None)
+
+
+def _move_batch(items, dest_dir, dest_dev, verify):
+    return [_move_one(path, st, dest_dir, dest_dev, verify) for path, st in items]
+
+
+def move_files(paths, dest_dir, workers=4, progress=None, verify=False, on_result=None):
+    """
+    Move arquivos para dest_dir. No mesmo dispositivo usa rename, em lotes;
+    entre dispositivos copia com copy_file_range/sendfile em paralelo,
+    retomando cópias interrompidas, e só remove a origem depois da cópia
+    completa (e conferida por hash, com verify=True).
+    Um arquivo nunca sobrescreve outro no destino; de vários arquivos com
+    o mesmo nome, só o primeiro é movido.
+    progress(feitos, total) e on_result(FileResult) são chamados no
+    thread chamador. Retorna um FileResult por arquivo.
+    """
+    paths = list(paths)
+    total = len(paths)
+    dest_dev = os.stat(dest_dir).st_dev
+
+    # Agrupar por dispositivo de origem com um único lstat por arquivo
+    results = []
+    same_device = []
+    other_device = []
+    names = set()
+    for path in paths:
+        # Dois arquivos com o mesmo nome iriam para o mesmo destino
+        name = os.path.normcase(os.path.basename(path))
+        try:
+            st = os.lstat(path)
+        except OSError as e:
+            results.append(FileResult(path, False, describe_error(e)))
+        else:
+            if name not in names:
+                names.add(name)
+                (same_device if st.st_dev == dest_dev else other_device).append((path, st))
+                continue
+            results.append(FileResult(path, False, "Outro arquivo selecionado tem o mesmo nome"))
+        if on_result:
+            on_result(results[-1])
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = [executor.submit(_move_batch, batch, dest_dir, dest_dev, verify)
+                   for batch in _batches(same_device, BATCH_SIZE)]
+        futures += [executor.submit(_move_batch, [item], dest_dir, dest_dev, verify)
+                    for item in other_device]
+        _collect(futures, results, total, progress, on_result)
+    return results
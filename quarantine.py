@@ -0,0 +1,258 @@
+import errno
+import json
+import os
+import threading
+import time
+import uuid
+from collections import namedtuple
+from operations import BATCH_SIZE, FileResult, describe_error
+from scanner import QUARANTINE_DIRNAME, disk_usage, entry_from_stat
+from utils import get_cache_dir
+
+# Arquivo em quarentena: id, caminho original, onde está guardado,
+# tamanho, espaço em disco, quando entrou e o lote (uma exclusão)
+QuarantineEntry = namedtuple("QuarantineEntry", ["id", "path", "stored", "size", "disk", "time", "batch"])
+
+
+def default_journal_path():
+    return os.path.join(get_cache_dir(), "quarentena.jsonl")
+
+
+def _batches(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class Quarantine:
+    """
+    Quarentena de arquivos excluídos. Cada arquivo é renomeado para uma
+    pasta de quarentena no mesmo sistema de arquivos (uma operação só de
+    metadados) e pode ser restaurado até ser eliminado de vez.
+
+    Toda operação é registrada num diário append-only em JSON lines:
+    "quarantine" é gravado antes da renomeação (e "abort" se ela falhar),
+    "restore" e "purge" depois. O estado atual é a releitura do diário.
+    As gravações são feitas por lote, com um único fsync.
+    """
+
+    def __init__(self, journal_path=None):
+        self.journal_path = journal_path or default_journal_path()
+        self._dirs = {}  # st_dev -> pasta de quarentena
+        self._lock = threading.Lock()
+
+    # Diário
+
+    def _append(self, records):
+        if not records:
+            return
+        data = "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+        with self._lock, open(self.journal_path, "a", encoding="utf-8", errors="surrogateescape") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def entries(self):
+        """{id: QuarantineEntry} dos arquivos ainda em quarentena"""
+        active = {}
+        try:
+            f = open(self.journal_path, "r", encoding="utf-8", errors="surrogateescape")
+        except FileNotFoundError:
+            return active
+        with f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # Última linha incompleta após uma interrupção
+                    continue
+                if record["op"] == "quarantine":
+                    active[record["id"]] = QuarantineEntry(
+                        record["id"], record["path"], record["stored"], record["size"],
+                        record["disk"], record["time"], record["batch"])
+                else:
+                    active.pop(record["id"], None)
+        return active
+
+    def last_batch(self):
+        """Ids do lote mais recente ainda em quarentena"""
+        entries = self.entries().values()
+        if not entries:
+            return []
+        batch = max(entries, key=lambda entry: entry.time).batch
+        return [entry.id for entry in entries if entry.batch == batch]
+
+    # Pastas de quarentena
+
+    def _quarantine_dir(self, path, st):
+        qdir = self._dirs.get(st.st_dev)
+        if qdir is None:
+            qdir = self._dirs[st.st_dev] = self._find_dir(path, st.st_dev)
+        return qdir
+
+    def _find_dir(self, path, dev):
+        """
+        Pasta de quarentena do sistema de arquivos de path: no cache do
+        usuário, se estiver no mesmo dispositivo, ou na pasta mais alta do
+        mesmo dispositivo em que se pode escrever.
+        """
+        cache = get_cache_dir()
+        if os.stat(cache).st_dev == dev:
+            base = cache
+        else:
+            base = None
+            folder = os.path.dirname(os.path.abspath(path))
+            while True:
+                try:
+                    if os.stat(folder).st_dev != dev:
+                        break
+                except OSError:
+                    break
+                if os.access(folder, os.W_OK):
+                    base = folder
+                parent = os.path.dirname(folder)
+                if parent == folder:
+                    break
+                folder = parent
+            if base is None:
+                raise PermissionError(errno.EACCES, "Sem pasta de quarentena neste disco", path)
+        qdir = os.path.join(base, QUARANTINE_DIRNAME)
+        os.makedirs(qdir, mode=0o700, exist_ok=True)
+        return qdir
+
+    # Operações
+
+    def quarantine(self, paths, progress=None, on_result=None):
+        """
+        Move arquivos para a quarentena, em lotes.
+        progress(feitos, total) e on_result(FileResult) acompanham o
+        andamento. Retorna um FileResult por arquivo.
+        """
+        paths = list(paths)
+        total = len(paths)
+        results = []
+        batch_id = uuid.uuid4().hex
+
+        def done(result):
+            results.append(result)
+            if on_result:
+                on_result(result)
+
+        for batch in _batches(paths, BATCH_SIZE):
+            planned = []
+            now = time.time()
+            for path in batch:
+                try:
+                    st = os.lstat(path)
+                    qdir = self._quarantine_dir(path, st)
+                except OSError as e:
+                    done(FileResult(path, False, describe_error(e)))
+                    continue
+                entry_id = uuid.uuid4().hex
+                planned.append((path, {
+                    "op": "quarantine", "id": entry_id, "path": os.path.abspath(path),
+                    "stored": os.path.join(qdir, f"{entry_id}_{os.path.basename(path)[:100]}"),
+                    "size": st.st_size, "disk": disk_usage(entry_from_stat(path, st)),
+                    "time": now, "batch": batch_id,
+                }))
+            # O registro vem antes: um arquivo nunca fica na quarentena sem ele
+            self._append([record for _, record in planned])
+            aborted = []
+            for path, record in planned:
+                try:
+                    os.rename(path, record["stored"])
+                except OSError as e:
+                    aborted.append({"op": "abort", "id": record["id"], "time": now})
+                    done(FileResult(path, False, describe_error(e)))
+                else:
+                    done(FileResult(path, True, None))
+            self._append(aborted)
+            if progress:
+                progress(len(results), total)
+        return results
+
+    def restore(self, ids, progress=None, on_result=None):
+        """
+        Devolve arquivos da quarentena ao caminho original, recriando a
+        pasta se preciso. Um arquivo que já existe no caminho original
+        não é sobrescrito. Retorna um FileResult (caminho original) por id.
+        """
+        ids = list(ids)
+        entries = self.entries()
+        total = len(ids)
+        results = []
+
+        def done(result):
+            results.append(result)
+            if on_result:
+                on_result(result)
+
+        for batch in _batches(ids, BATCH_SIZE):
+            records = []
+            for entry_id in batch:
+                entry = entries.get(entry_id)
+                if entry is None:
+                    done(FileResult(entry_id, False, "Não está na quarentena"))
+                    continue
+                try:
+                    if os.path.lexists(entry.path):
+                        raise FileExistsError(errno.EEXIST, "Destino já existe", entry.path)
+                    os.makedirs(os.path.dirname(entry.path), exist_ok=True)
+                    os.rename(entry.stored, entry.path)
+                except OSError as e:
+                    done(FileResult(entry.path, False, describe_error(e)))
+                else:
+                    records.append({"op": "restore", "id": entry_id, "time": time.time()})
+                    done(FileResult(entry.path, True, None))
+            self._append(records)
+            if progress:
+                progress(len(results), total)
+        return results
+
+    def purge(self, ids=None, older_than=None, progress=None):
+        """
+        Elimina de vez arquivos da quarentena: os ids indicados ou, sem
+        ids, os que entraram antes de older_than (timestamp; None = todos).
+        Retorna (FileResult por arquivo, bytes liberados em disco).
+        """
+        entries = self.entries()
+        if ids is None:
+            selected = [entry for entry in entries.values() if older_than is None or entry.time < older_than]
+        else:
+            selected = [entries[entry_id] for entry_id in ids if entry_id in entries]
+        total = len(selected)
+        results = []
+        freed = 0
+        for batch in _batches(selected, BATCH_SIZE):
+            records = []
+            for entry in batch:
+                try:
+                    os.remove(entry.stored)
+                except FileNotFoundError:
+                    # Já não existe: só falta registrar
+                    pass
+                except OSError as e:
+                    results.append(FileResult(entry.path, False, describe_error(e)))
+                    continue
+                else:
+                    freed += entry.disk
+                records.append({"op": "purge", "id": entry.id, "time": time.time()})
+                results.append(FileResult(entry.path, True, None))
+            self._append(records)
+            if progress:
+                progress(len(results), total)
+        return results, freed
+
+    def purge_in_background(self, max_age_days, on_done=None):
+        """
+        Elimina numa thread os arquivos com mais de max_age_days dias na
+        quarentena. on_done(resultados, liberado) é chamado na thread.
+        Retorna a Thread já iniciada.
+        """
+        def run():
+            results, freed = self.purge(older_than=time.time() - max_age_days * 86400)
+            if on_done:
+                on_done(results, freed)
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        return thread
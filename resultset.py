@@ -0,0 +1,196 @@
+import os
+import sys
+from array import array
+from scanner import FileEntry
+
+# Valores guardados no lugar de None em disk e uid ((uid_t) -1 não é um dono válido)
+_MISSING = -1
+_NO_UID = 0xFFFFFFFF
+
+_ENCODING = sys.getfilesystemencoding()
+_ERRORS = sys.getfilesystemencodeerrors()
+
+# O buffer de nomes é compactado quando mais desta fração está sem uso
+DEAD_FRACTION = 0.5
+
+
+class ResultSet:
+    """
+    Lista compacta de FileEntry para varreduras com milhões de arquivos.
+
+    Cada pasta é guardada uma vez (prefixo com separador no fim) e cada
+    arquivo só com o índice da pasta e o nome, num buffer de bytes com
+    início (32 bits, até 4 GiB de nomes) e comprimento. Tamanhos, mtimes,
+    donos e espaço em disco ficam em arrays. Cada item lido é um FileEntry
+    montado na hora; o inode, que só serve para descartar links físicos
+    durante a varredura, não é guardado.
+
+    Um nome substituído por outro que cabe no mesmo lugar é gravado ali;
+    os bytes que deixam de ser usados são contados e o buffer é compactado
+    quando passam de DEAD_FRACTION dele. take(), fatias e ordenação
+    produzem cópias compactas.
+    """
+
+    def __init__(self, rows=()):
+        self._dirs = []
+        self._dir_ids = {}
+        self._dir = array("I")
+        self._names = bytearray()
+        self._dead = 0
+        self._name_start = array("I")
+        self._name_len = array("H")
+        self.sizes = array("q")
+        self.mtimes = array("d")
+        self._uids = array("I")
+        self._disks = array("q")
+        self.extend(rows)
+
+    def __len__(self):
+        return len(self.sizes)
+
+    def __repr__(self):
+        return f"ResultSet({len(self)} arquivos, {len(self._dirs)} pastas)"
+
+    def _dir_id(self, folder):
+        dir_id = self._dir_ids.get(folder)
+        if dir_id is None:
+            dir_id = self._dir_ids[folder] = len(self._dirs)
+            self._dirs.append(os.path.join(folder, "") if folder else "")
+        return dir_id
+
+    def _add_name(self, name):
+        data = name.encode(_ENCODING, _ERRORS)
+        start = len(self._names)
+        self._names += data
+        return start, len(data)
+
+    def append(self, row):
+        """Acrescenta um FileEntry ou uma tupla (path, size[, mtime, uid, disk])"""
+        path, size = row[0], row[1]
+        mtime = row[2] if len(row) > 2 else 0.0
+        uid = row[3] if len(row) > 3 else None
+        disk = row[4] if len(row) > 4 else None
+        folder, name = os.path.split(path)
+        start, length = self._add_name(name)
+        self._dir.append(self._dir_id(folder))
+        self._name_start.append(start)
+        self._name_len.append(length)
+        self.sizes.append(size)
+        self.mtimes.append(mtime)
+        self._uids.append(_NO_UID if uid is None else uid)
+        self._disks.append(_MISSING if disk is None else disk)
+
+    def extend(self, rows):
+        for row in rows:
+            self.append(row)
+
+    def path(self, index):
+        start = self._name_start[index]
+        name = self._names[start:start + self._name_len[index]]
+        return self._dirs[self._dir[index]] + name.decode(_ENCODING, _ERRORS)
+
+    def paths(self):
+        """Gera os caminhos, em ordem"""
+        return (self.path(index) for index in range(len(self)))
+
+    def _entry(self, index):
+        uid = self._uids[index]
+        disk = self._disks[index]
+        return FileEntry(self.path(index), self.sizes[index], self.mtimes[index],
+                         None if uid == _NO_UID else uid, None if disk == _MISSING else disk)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.take(range(len(self))[index])
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("índice fora da lista")
+        return self._entry(index)
+
+    def __iter__(self):
+        return (self._entry(index) for index in range(len(self)))
+
+    def _compact(self):
+        """Regrava o buffer só com os nomes em uso, na ordem dos itens"""
+        names = self._names
+        buffer = bytearray()
+        starts = array("I")
+        for start, length in zip(self._name_start, self._name_len):
+            starts.append(len(buffer))
+            buffer += names[start:start + length]
+        self._names = buffer
+        self._name_start = starts
+        self._dead = 0
+
+    def _release(self, length):
+        self._dead += length
+        if self._dead > len(self._names) * DEAD_FRACTION:
+            self._compact()
+
+    def __setitem__(self, index, row):
+        """Substitui um item, reaproveitando o lugar do nome se ele couber"""
+        if index < 0:
+            index += len(self)
+        folder, name = os.path.split(row[0])
+        self._dir[index] = self._dir_id(folder)
+        data = name.encode(_ENCODING, _ERRORS)
+        start = self._name_start[index]
+        length = self._name_len[index]
+        if len(data) <= length:
+            self._names[start:start + len(data)] = data
+            self._name_len[index] = len(data)
+            self._release(length - len(data))
+        else:
+            self._name_start[index], self._name_len[index] = self._add_name(name)
+            self._release(length)
+        self.sizes[index] = row[1]
+        self.mtimes[index] = row[2] if len(row) > 2 else 0.0
+        uid = row[3] if len(row) > 3 else None
+        disk = row[4] if len(row) > 4 else None
+        self._uids[index] = _NO_UID if uid is None else uid
+        self._disks[index] = _MISSING if disk is None else disk
+
+    def __delitem__(self, index):
+        length = self._name_len[index]
+        for column in (self._dir, self._name_start, self._name_len, self.sizes, self.mtimes,
+                       self._uids, self._disks):
+            del column[index]
+        self._release(length)
+
+    def take(self, indices):
+        """Novo ResultSet compacto com os itens indicados, nessa ordem"""
+        indices = list(indices)
+        result = ResultSet()
+        result._dirs = list(self._dirs)
+        result._dir_ids = dict(self._dir_ids)
+        names = self._names
+        starts = self._name_start
+        lengths = self._name_len
+        buffer = bytearray()
+        for index in indices:
+            result._name_start.append(len(buffer))
+            start = starts[index]
+            buffer += names[start:start + lengths[index]]
+        result._names = buffer
+        result._dir = array("I", [self._dir[i] for i in indices])
+        result._name_len = array("H", [lengths[i] for i in indices])
+        result.sizes = array("q", [self.sizes[i] for i in indices])
+        result.mtimes = array("d", [self.mtimes[i] for i in indices])
+        result._uids = array("I", [self._uids[i] for i in indices])
+        result._disks = array("q", [self._disks[i] for i in indices])
+        return result
+
+    def disk_usage(self, index):
+        """Espaço em disco de um item (tamanho aparente se desconhecido)"""
+        disk = self._disks[index]
+        return self.sizes[index] if disk == _MISSING else disk
+
+    def size_order(self, reverse=True):
+        """Índices dos itens ordenados pelo espaço em disco"""
+        return sorted(range(len(self)), key=self.disk_usage, reverse=reverse)
+
+    def sort_by_size(self, reverse=True):
+        """Ordena no lugar pelo espaço em disco, do maior para o menor por padrão"""
+        sorted_set = self.take(self.size_order(reverse))
+        self.__dict__.update(sorted_set.__dict__)
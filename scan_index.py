@@ -0,0 +1,212 @@
+import os
+import sqlite3
+import threading
+import time
+from classifier import OTHER, get_classifier
+from scanner import FileEntry
+from utils import get_cache_dir
+
+SCHEMA_VERSION = 5
+
+# Pastas modificadas há menos que isso não entram no cache: uma alteração
+# no mesmo instante poderia não mudar o mtime ("racy mtime")
+RACY_MTIME_SECONDS = 2
+
+# Quantas pastas gravar antes de um commit
+COMMIT_EVERY = 500
+
+
+def default_index_path():
+    return os.path.join(get_cache_dir(), "index.sqlite")
+
+
+def _subtree_bounds(path):
+    """Faixa de chaves (path, em bytes) que contém todos os descendentes de path"""
+    sep = os.fsencode(os.sep)
+    prefix = path.rstrip(sep) + sep
+    return prefix, prefix[:-1] + bytes([sep[0] + 1])
+
+
+class ScanIndex:
+    """
+    Índice persistente em SQLite com o conteúdo de cada pasta já listada
+    e o mtime da pasta naquele momento.
+
+    O scanner só volta a listar uma pasta cujo mtime mudou. O mtime de uma
+    pasta muda quando entradas são criadas, removidas ou renomeadas, mas
+    não quando um arquivo existente cresce; tamanhos de arquivos em pastas
+    inalteradas vêm do cache.
+
+    Caminhos e nomes são guardados como bytes (os.fsencode), então nomes
+    que não são texto válido também entram. Um erro do SQLite (banco
+    travado por outro processo, por exemplo) não interrompe a varredura:
+    lookup() devolve None e store() não grava, e a pasta é listada do disco.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or default_index_path()
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self._create_schema()
+
+    def _create_schema(self):
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        if version != SCHEMA_VERSION:
+            # Índice de versão anterior: descartar e reconstruir
+            self.conn.executescript("""
+                DROP TABLE IF EXISTS entries;
+                DROP TABLE IF EXISTS dirs;
+            """)
+        self.conn.executescript(f"""
+            CREATE TABLE IF NOT EXISTS dirs (
+                id INTEGER PRIMARY KEY,
+                path BLOB UNIQUE NOT NULL,
+                mtime_ns INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS entries (
+                dir_id INTEGER NOT NULL,
+                name BLOB NOT NULL,
+                is_dir INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                mtime REAL NOT NULL,
+                uid INTEGER,
+                disk INTEGER,
+                dev INTEGER,
+                ino INTEGER,
+                ext BLOB NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS entries_dir ON entries(dir_id);
+            CREATE INDEX IF NOT EXISTS entries_size ON entries(size);
+            PRAGMA user_version = {SCHEMA_VERSION};
+        """)
+        self.conn.commit()
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+    def flush(self):
+        """Grava as alterações pendentes (descartadas se o banco estiver travado)"""
+        with self._lock:
+            try:
+                self.conn.commit()
+            except sqlite3.Error:
+                self.conn.rollback()
+            self._pending = 0
+
+    def lookup(self, path, mtime_ns):
+        """
+        Retorna as entradas guardadas de uma pasta se o mtime não mudou.
+        Retorna lista de (name, is_dir, size, mtime, uid, disk, dev, ino) ou
+        None; is_dir é 2 para links que apontam para pastas e dev e ino só
+        são guardados para arquivos com mais de um link.
+        """
+        with self._lock:
+            try:
+                row = self.conn.execute(
+                    "SELECT id, mtime_ns FROM dirs WHERE path = ?", (os.fsencode(path),)
+                ).fetchone()
+                if row is None or row[1] != mtime_ns:
+                    return None
+                rows = self.conn.execute(
+                    "SELECT name, is_dir, size, mtime, uid, disk, dev, ino FROM entries WHERE dir_id = ?", (row[0],)
+                ).fetchall()
+            except sqlite3.Error:
+                return None
+        return [(os.fsdecode(name), *rest) for name, *rest in rows]
+
+    def store(self, path, mtime_ns, entries):
+        """
+        Substitui o conteúdo guardado de uma pasta.
+        entries é uma lista de (name, is_dir, size, mtime, uid, disk, dev, ino).
+        Se o SQLite falhar, as alterações ainda não gravadas são desfeitas
+        (essas pastas são listadas de novo na próxima varredura).
+        """
+        if time.time() - mtime_ns / 1e9 < RACY_MTIME_SECONDS:
+            return
+        path = os.fsencode(path)
+        entries = [(os.fsencode(name), *rest) for name, *rest in entries]
+        with self._lock:
+            try:
+                self._store(path, mtime_ns, entries)
+                self._pending += 1
+                if self._pending >= COMMIT_EVERY:
+                    self.conn.commit()
+                    self._pending = 0
+            except sqlite3.Error:
+                self.conn.rollback()
+                self._pending = 0
+
+    def _store(self, path, mtime_ns, entries):
+        row = self.conn.execute("SELECT id FROM dirs WHERE path = ?", (path,)).fetchone()
+        if row is not None:
+            dir_id = row[0]
+            old_subdirs = {name for (name,) in self.conn.execute(
+                "SELECT name FROM entries WHERE dir_id = ? AND is_dir != 0", (dir_id,))}
+            new_subdirs = {entry[0] for entry in entries if entry[1]}
+            for name in old_subdirs - new_subdirs:
+                self._forget_subtree(os.path.join(path, name))
+            self.conn.execute("UPDATE dirs SET mtime_ns = ? WHERE id = ?", (mtime_ns, dir_id))
+            self.conn.execute("DELETE FROM entries WHERE dir_id = ?", (dir_id,))
+        else:
+            dir_id = self.conn.execute(
+                "INSERT INTO dirs (path, mtime_ns) VALUES (?, ?)", (path, mtime_ns)
+            ).lastrowid
+        self.conn.executemany(
+            "INSERT INTO entries (dir_id, name, is_dir, size, mtime, uid, disk, dev, ino, ext) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [(dir_id, name, int(is_dir), size, mtime, uid, disk, dev, ino, os.path.splitext(name)[1].lower())
+             for name, is_dir, size, mtime, uid, disk, dev, ino in entries],
+        )
+
+    def _forget_subtree(self, path):
+        low, high = _subtree_bounds(path)
+        where = "path = ? OR (path >= ? AND path < ?)"
+        self.conn.execute(
+            f"DELETE FROM entries WHERE dir_id IN (SELECT id FROM dirs WHERE {where})", (path, low, high))
+        self.conn.execute(f"DELETE FROM dirs WHERE {where}", (path, low, high))
+
+    def query(self, root, min_bytes=0, max_bytes=0, older_than=None, file_types=None, limit=None):
+        """
+        Consulta os arquivos indexados sob root sem tocar no disco.
+        older_than é um timestamp (mtime máximo); file_types usa as
+        categorias do classificador em uso, só pela extensão. Retorna
+        lista de FileEntry do que mais ocupa disco para o que menos ocupa.
+        """
+        root = os.fsencode(os.path.abspath(root))
+        low, high = _subtree_bounds(root)
+        sql = [
+            "SELECT d.path, e.name, e.size, e.mtime, e.uid, e.disk, e.dev, e.ino FROM entries e JOIN dirs d ON d.id = e.dir_id",
+            "WHERE e.is_dir = 0 AND (d.path = ? OR (d.path >= ? AND d.path < ?)) AND COALESCE(e.disk, e.size) >= ?",
+        ]
+        params = [root, low, high, min_bytes]
+        if max_bytes:
+            sql.append("AND COALESCE(e.disk, e.size) <= ?")
+            params.append(max_bytes)
+        if older_than is not None:
+            sql.append("AND e.mtime <= ?")
+            params.append(older_than)
+        if file_types:
+            classifier = get_classifier()
+            known = list(classifier.by_extension)
+            wanted = classifier.extensions_of(file_types)
+            clauses = []
+            if wanted:
+                clauses.append(f"e.ext IN ({', '.join('?' * len(wanted))})")
+                params.extend(os.fsencode(ext) for ext in wanted)
+            if OTHER in file_types:
+                clauses.append(f"e.ext NOT IN ({', '.join('?' * len(known))})")
+                params.extend(os.fsencode(ext) for ext in known)
+            sql.append(f"AND ({' OR '.join(clauses) or '0'})")
+        sql.append("ORDER BY COALESCE(e.disk, e.size) DESC")
+        if limit:
+            sql.append("LIMIT ?")
+            params.append(int(limit))
+        with self._lock:
+            rows = self.conn.execute(" ".join(sql), params).fetchall()
+        return [FileEntry(os.fsdecode(os.path.join(dir_path, name)), size, mtime, uid, disk,
+                          (dev, ino) if ino is not None else None)
+                for dir_path, name, size, mtime, uid, disk, dev, ino in rows]
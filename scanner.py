@@ -0,0 +1,645 @@
+import heapq
+import itertools
+import os
+import queue
+import threading
+import time
+from collections import namedtuple
+from dirtree import DirNode, build_dir_tree
+from metrics import ScanMetrics
+
+# Valor de is_dir no índice para links que apontam para pastas
+DIR_LINK = 2
+
+# Pastas da quarentena (quarantine.py): nunca são percorridas
+QUARANTINE_DIRNAME = ".limpador-quarentena"
+_QUARANTINE_SUFFIX = os.sep + QUARANTINE_DIRNAME
+
+# Registro produzido pelo scanner para cada arquivo encontrado. size é o
+# tamanho aparente; disk é o espaço ocupado (st_blocks), menor em arquivos
+# esparsos; inode é (dev, ino) só para arquivos com mais de um link físico;
+# uid é o dono. Os três últimos são None quando desconhecidos.
+FileEntry = namedtuple("FileEntry", ["path", "size", "mtime", "uid", "disk", "inode"],
+                       defaults=[None, None, None])
+
+
+def entry_from_stat(path, st):
+    """Monta o FileEntry de um arquivo a partir do seu stat"""
+    blocks = getattr(st, "st_blocks", None)
+    # st_blocks é sempre em unidades de 512 bytes
+    disk = blocks * 512 if blocks is not None else st.st_size
+    inode = (st.st_dev, st.st_ino) if st.st_nlink > 1 else None
+    return FileEntry(path, st.st_size, st.st_mtime, st.st_uid, disk, inode)
+
+
+def disk_usage(entry):
+    """Espaço liberado ao remover o arquivo (tamanho aparente se desconhecido)"""
+    return entry.size if entry.disk is None else entry.disk
+
+
+def _drop_seen_inodes(entries, seen):
+    """Remove links físicos de arquivos já vistos, registrando os novos em seen"""
+    kept = []
+    for entry in entries:
+        if entry.inode is not None:
+            if entry.inode in seen:
+                continue
+            seen.add(entry.inode)
+        kept.append(entry)
+    return kept
+
+
+class TopK:
+    """
+    Mantém apenas os K arquivos que mais ocupam disco, num min-heap
+    limitado. A memória é O(K) independente de quantos arquivos passam no
+    limite.
+    """
+
+    def __init__(self, k):
+        self.k = k
+        self._heap = []
+        self._seq = itertools.count()
+
+    def __len__(self):
+        return len(self._heap)
+
+    def push(self, entry):
+        usage = disk_usage(entry)
+        item = (usage, next(self._seq), entry)
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, item)
+        elif usage > self._heap[0][0]:
+            heapq.heapreplace(self._heap, item)
+
+    def extend(self, entries):
+        for entry in entries:
+            self.push(entry)
+        return self
+
+    def items(self):
+        """Retorna os arquivos guardados, do maior para o menor"""
+        return [item[2] for item in sorted(self._heap, reverse=True)]
+
+
+class Scanner:
+    """
+    Percorre uma árvore de diretórios com os.scandir, usando o tipo do
+    DirEntry e o stat em cache, e entrega os arquivos à medida que são
+    encontrados.
+
+    Com workers > 1 cada subdiretório vira uma tarefa numa fila
+    compartilhada por um pool de threads; com workers == 1 a travessia
+    é serial.
+
+    file_filter (um filters.FileFilter) é avaliado durante a listagem:
+    nomes rejeitados não recebem stat e pastas rejeitadas não são
+    percorridas.
+
+    Com index (um scan_index.ScanIndex), pastas cujo mtime não mudou desde
+    a última varredura são lidas do índice em vez de listadas de novo.
+    Um arquivo que cresce no lugar não muda o mtime da pasta e continua
+    com o tamanho guardado; com revalidate, todas as pastas são relidas e
+    o índice é atualizado.
+
+    Com aggregate_dirs, o espaço em disco e o número de arquivos de cada
+    pasta são acumulados na mesma passada (dir_totals) e dir_tree() monta
+    a árvore.
+
+    Um arquivo com vários links físicos é entregue e somado uma única vez.
+
+    Os padrões de exclusão e as opções one_file_system e follow_symlinks
+    do file_filter são aplicados antes de listar cada pasta, relativos a
+    base (padrão: root) quando root é uma subpasta da árvore original.
+    As pastas em skip não são percorridas (ficam a cargo de outra raiz).
+
+    Contadores, erros de acesso e tempos ficam em metrics (um
+    metrics.ScanMetrics); nada é impresso.
+    """
+
+    def __init__(self, root, min_bytes=0, workers=1, file_filter=None, index=None,
+                 aggregate_dirs=False, base=None, skip=(), revalidate=False):
+        # O índice é indexado por caminho absoluto
+        self.root = os.path.abspath(root) if index is not None else root
+        if base is None:
+            self.base = self.root
+        else:
+            self.base = os.path.abspath(base) if index is not None else base
+        self.index = index
+        self.revalidate = revalidate
+        self.min_bytes = min_bytes
+        self.workers = max(1, int(workers))
+        self.file_filter = file_filter
+        self.aggregate_dirs = aggregate_dirs
+        self.skip = frozenset(skip)
+        self.dir_totals = {}
+        self._dir_inodes = set()
+        self.metrics = ScanMetrics()
+        self.started_at = None
+        self.finished_at = None
+        self._lock = threading.Lock()
+        self._cancel = threading.Event()
+        self._prepare_traversal()
+
+    def __iter__(self):
+        return self.scan()
+
+    @property
+    def dirs_visited(self):
+        return self.metrics.dirs
+
+    @property
+    def files_seen(self):
+        return self.metrics.files
+
+    @property
+    def dirs_cached(self):
+        return self.metrics.dirs_cached
+
+    @property
+    def elapsed(self):
+        """Tempo de varredura em segundos"""
+        if self.started_at is None:
+            return 0.0
+        end = self.finished_at if self.finished_at is not None else time.perf_counter()
+        return end - self.started_at
+
+    @property
+    def dirs_per_sec(self):
+        """Diretórios listados por segundo"""
+        elapsed = self.elapsed
+        return self.dirs_visited / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def cancel(self):
+        """Interrompe a varredura; os arquivos já entregues continuam válidos"""
+        self._cancel.set()
+
+    def stats(self):
+        """Retorna um resumo da varredura com as métricas (serializável em JSON)"""
+        result = {
+            "root": self.root,
+            "workers": self.workers,
+            "cancelled": self.cancelled,
+            "elapsed": self.elapsed,
+            "dirs_per_sec": self.dirs_per_sec,
+        }
+        result.update(self.metrics.to_dict())
+        return result
+
+    def dir_tree(self):
+        """Árvore (dirtree.DirNode) com os totais acumulados na varredura"""
+        return build_dir_tree(self.root, self.dir_totals)
+
+    def scan(self):
+        """Gera FileEntry para cada arquivo com espaço em disco >= min_bytes que passa no filtro"""
+        self.dir_totals = {}
+        self._dir_inodes = set()
+        # Links físicos já entregues, por (dev, ino)
+        seen_inodes = set()
+        self.metrics = ScanMetrics()
+        metrics = self.metrics
+        self.started_at = time.perf_counter()
+        self.finished_at = None
+        min_bytes = self.min_bytes
+        select = self.file_filter.select if self.file_filter is not None else None
+        self._prepare_traversal()
+        try:
+            if self.workers == 1:
+                batches = self._walk_serial()
+            else:
+                batches = self._walk_parallel()
+            for files in batches:
+                if self._cancel.is_set():
+                    break
+                start = time.perf_counter()
+                files = [entry for entry in files if disk_usage(entry) >= min_bytes]
+                if select is not None and files:
+                    files = select(files)
+                if any(entry.inode is not None for entry in files):
+                    files = _drop_seen_inodes(files, seen_inodes)
+                metrics.add_time("filter", time.perf_counter() - start)
+                if files:
+                    metrics.add_matched(len(files), sum(disk_usage(entry) for entry in files))
+                yield from files
+        finally:
+            self.finished_at = time.perf_counter()
+            metrics.add_time("scan", self.finished_at - self.started_at)
+            if self.index is not None:
+                self.index.flush()
+
+    def _prepare_traversal(self):
+        ff = self.file_filter
+        self._include = ff.path_checker(self.base) if ff is not None else None
+        self._follow_symlinks = ff is not None and ff.follow_symlinks
+        self._visited_dirs = set()
+        self._root_dev = None
+        if ff is not None and ff.one_file_system:
+            try:
+                self._root_dev = os.stat(self.base).st_dev
+            except OSError:
+                pass
+        self._guard_dirs = self._root_dev is not None or self._follow_symlinks
+
+    def _walk_serial(self):
+        pending = [self.root]
+        while pending and not self._cancel.is_set():
+            files, subdirs = self._list_dir(pending.pop())
+            pending.extend(reversed(subdirs))
+            yield files
+
+    def _walk_parallel(self):
+        dirs = queue.Queue()
+        batches = queue.Queue()
+        stop = threading.Event()
+        # Diretórios enfileirados e ainda não processados
+        outstanding = [1]
+
+        def worker():
+            while True:
+                path = dirs.get()
+                if path is None:
+                    return
+                try:
+                    if not stop.is_set() and not self._cancel.is_set():
+                        files, subdirs = self._list_dir(path)
+                        with self._lock:
+                            outstanding[0] += len(subdirs)
+                        for subdir in subdirs:
+                            dirs.put(subdir)
+                        batches.put(files)
+                except Exception as e:
+                    # Repassado ao consumidor; os demais workers param de listar
+                    stop.set()
+                    batches.put(e)
+                finally:
+                    # Sempre descontado, senão o consumidor esperaria para sempre
+                    with self._lock:
+                        outstanding[0] -= 1
+                        finished = outstanding[0] == 0
+                    if finished:
+                        for _ in range(self.workers):
+                            dirs.put(None)
+                        batches.put(None)
+
+        dirs.put(self.root)
+        threads = [threading.Thread(target=worker, daemon=True) for _ in range(self.workers)]
+        for t in threads:
+            t.start()
+        try:
+            while True:
+                files = batches.get()
+                if files is None:
+                    break
+                if isinstance(files, Exception):
+                    raise files
+                yield files
+        finally:
+            # Se o consumidor parar antes do fim, os workers apenas
+            # esvaziam a fila sem listar mais nada
+            stop.set()
+
+    def _list_dir(self, path):
+        """
+        Lista um único diretório.
+        Retorna (arquivos, subdiretórios).
+        """
+        start = time.perf_counter()
+        st = None
+        if self._guard_dirs:
+            st = self._enter_dir(path)
+            if st is None:
+                return [], []
+        include = self._include
+        if self.index is not None:
+            files, subdirs, stat_calls, cached = self._list_dir_indexed(path, st)
+            if include is not None:
+                files = [f for f in files if include(f.path, os.path.basename(f.path), False)]
+                subdirs = [d for d in subdirs if self._include_dir(d)]
+        else:
+            files, subdirs, links, stat_calls = self._scandir(path, include)
+            if self._follow_symlinks:
+                subdirs.extend(links)
+            cached = False
+        if self.skip:
+            subdirs = [d for d in subdirs if d not in self.skip]
+        subdirs = [d for d in subdirs if not d.endswith(_QUARANTINE_SUFFIX)]
+        if st is not None:
+            stat_calls += 1
+        self.metrics.add_dir(len(files), stat_calls, cached)
+        if self.aggregate_dirs:
+            with self._lock:
+                if any(f.inode is not None for f in files):
+                    counted = _drop_seen_inodes(files, self._dir_inodes)
+                else:
+                    counted = files
+                self.dir_totals[path] = (sum(disk_usage(f) for f in counted), len(counted))
+        self.metrics.add_time("walk", time.perf_counter() - start)
+        return files, subdirs
+
+    def _include_dir(self, path):
+        if self._include(path, os.path.basename(path), True):
+            return True
+        self.metrics.add_pruned()
+        return False
+
+    def _enter_dir(self, path):
+        """
+        Confere se uma pasta deve ser listada: no modo one_file_system ela
+        precisa estar no dispositivo da raiz e, seguindo links, não pode
+        ter sido listada antes (ciclos). Retorna o stat da pasta ou None.
+        """
+        try:
+            st = os.stat(path)
+        except OSError as e:
+            self.metrics.add_error(path, e)
+            return None
+        if self._root_dev is not None and st.st_dev != self._root_dev:
+            self.metrics.add_pruned()
+            return None
+        if self._follow_symlinks:
+            key = (st.st_dev, st.st_ino)
+            with self._lock:
+                if key in self._visited_dirs:
+                    self.metrics.add_pruned()
+                    return None
+                self._visited_dirs.add(key)
+        return st
+
+    def _list_dir_indexed(self, path, st=None):
+        """
+        Usa o conteúdo do índice se o mtime da pasta não mudou (nunca com
+        revalidate).
+        Retorna (arquivos, subdiretórios, chamadas de stat, veio do índice).
+        """
+        stat_calls = 0
+        if st is None:
+            stat_calls = 1
+            try:
+                st = os.stat(path)
+            except OSError as e:
+                self.metrics.add_error(path, e)
+                return [], [], stat_calls, False
+        mtime_ns = st.st_mtime_ns
+
+        cached = None if self.revalidate else self.index.lookup(path, mtime_ns)
+        if cached is not None:
+            files = []
+            subdirs = []
+            for name, is_dir, size, mtime, uid, disk, dev, ino in cached:
+                child = os.path.join(path, name)
+                if is_dir == DIR_LINK:
+                    if self._follow_symlinks:
+                        subdirs.append(child)
+                elif is_dir:
+                    subdirs.append(child)
+                else:
+                    files.append(FileEntry(child, size, mtime, uid, disk,
+                                           (dev, ino) if ino is not None else None))
+            return files, subdirs, stat_calls, True
+
+        files, subdirs, links, scan_stats = self._scandir(path, None)
+        entries = [(os.path.basename(d), True, 0, 0.0, None, None, None, None) for d in subdirs]
+        entries.extend((os.path.basename(d), DIR_LINK, 0, 0.0, None, None, None, None) for d in links)
+        entries.extend((os.path.basename(f.path), False, f.size, f.mtime, f.uid, f.disk,
+                        *(f.inode or (None, None))) for f in files)
+        self.index.store(path, mtime_ns, entries)
+        if self._follow_symlinks:
+            subdirs.extend(links)
+        return files, subdirs, stat_calls + scan_stats, False
+
+    def _scandir(self, path, include):
+        """Retorna (arquivos, subdiretórios, links para pastas, chamadas de stat)"""
+        files = []
+        subdirs = []
+        links = []
+        stat_calls = 0
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    if self._cancel.is_set():
+                        break
+                    try:
+                        is_dir = entry.is_dir()
+                        if include is not None and not include(entry.path, entry.name, is_dir):
+                            if is_dir:
+                                self.metrics.add_pruned()
+                            continue
+                        # Como no os.walk, links para pastas só são
+                        # percorridos com follow_symlinks; links para
+                        # arquivos sempre
+                        if is_dir:
+                            (links if entry.is_symlink() else subdirs).append(entry.path)
+                            continue
+                        stat_calls += 1
+                        st = entry.stat()
+                    except OSError as e:
+                        self.metrics.add_error(entry.path, e)
+                        continue
+                    files.append(entry_from_stat(entry.path, st))
+        except OSError as e:
+            self.metrics.add_error(path, e)
+        return files, subdirs, links, stat_calls
+
+
+def _distinct_roots(roots):
+    """Caminhos absolutos das raízes, sem repetir a mesma pasta"""
+    distinct = {}
+    for root in roots:
+        root = os.path.abspath(root)
+        distinct.setdefault(os.path.realpath(root), root)
+    return list(distinct.values())
+
+
+def _nested_roots(roots):
+    """
+    {raiz: pastas de outras raízes dentro dela}, no espaço de caminhos
+    da raiz externa. Links simbólicos são resolvidos na comparação.
+    """
+    real = {root: os.path.realpath(root) for root in roots}
+    nested = {}
+    for outer in roots:
+        prefix = real[outer].rstrip(os.sep) + os.sep
+        for inner in roots:
+            if inner != outer and real[inner].startswith(prefix):
+                nested.setdefault(outer, set()).add(
+                    os.path.join(outer, os.path.relpath(real[inner], real[outer])))
+    return nested
+
+
+class MultiScanner:
+    """
+    Varre várias pastas ao mesmo tempo e entrega os resultados num único
+    fluxo. Raízes em dispositivos diferentes rodam em paralelo; as do
+    mesmo dispositivo, uma após a outra, para não disputar o disco.
+
+    Uma raiz repetida é ignorada e uma raiz dentro de outra é varrida uma
+    só vez: a externa não entra nela. Links físicos entre raízes também
+    são entregues uma vez.
+
+    scanners tem o Scanner de cada raiz, com progresso e métricas
+    próprios; metrics soma as raízes concluídas, com scan medindo o tempo
+    total e não a soma das raízes.
+    """
+
+    def __init__(self, roots, min_bytes=0, workers=1, file_filter=None, index=None,
+                 aggregate_dirs=False, revalidate=False):
+        self.roots = _distinct_roots(roots)
+        nested = _nested_roots(self.roots)
+        self.min_bytes = min_bytes
+        self.workers = max(1, int(workers))
+        self.file_filter = file_filter
+        self.index = index
+        self.scanners = [Scanner(root, min_bytes, workers, file_filter, index, aggregate_dirs,
+                                 skip=nested.get(root, ()), revalidate=revalidate)
+                         for root in self.roots]
+        self._top_roots = [root for root in self.roots
+                           if not any(root in inner for inner in nested.values())]
+        self.metrics = ScanMetrics()
+        self.finished_roots = set()
+        self.started_at = None
+        self.finished_at = None
+        self._cancel = threading.Event()
+
+    def __iter__(self):
+        return self.scan()
+
+    @property
+    def dirs_visited(self):
+        return sum(scanner.dirs_visited for scanner in self.scanners)
+
+    @property
+    def files_seen(self):
+        return sum(scanner.files_seen for scanner in self.scanners)
+
+    @property
+    def dirs_cached(self):
+        return sum(scanner.dirs_cached for scanner in self.scanners)
+
+    @property
+    def elapsed(self):
+        """Tempo total da varredura em segundos"""
+        if self.started_at is None:
+            return 0.0
+        end = self.finished_at if self.finished_at is not None else time.perf_counter()
+        return end - self.started_at
+
+    @property
+    def dirs_per_sec(self):
+        elapsed = self.elapsed
+        return self.dirs_visited / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def cancel(self):
+        """Interrompe todas as raízes; os arquivos já entregues continuam válidos"""
+        self._cancel.set()
+        for scanner in self.scanners:
+            scanner.cancel()
+
+    def progress(self):
+        """Lista de (raiz, pastas listadas, concluída) de cada raiz"""
+        return [(scanner.root, scanner.dirs_visited, scanner.root in self.finished_roots)
+                for scanner in self.scanners]
+
+    def stats(self):
+        """Resumo da varredura com as métricas somadas e as de cada raiz"""
+        result = {
+            "roots": [scanner.stats() for scanner in self.scanners],
+            "workers": self.workers,
+            "cancelled": self.cancelled,
+            "elapsed": self.elapsed,
+            "dirs_per_sec": self.dirs_per_sec,
+        }
+        result.update(self.metrics.to_dict())
+        return result
+
+    @property
+    def dir_totals(self):
+        totals = {}
+        for scanner in self.scanners:
+            totals.update(scanner.dir_totals)
+        return totals
+
+    def dir_tree(self):
+        """
+        Árvore com os totais de todas as raízes. Raízes aninhadas ficam
+        dentro da externa; com mais de uma raiz independente, um nó sem
+        caminho as reúne.
+        """
+        totals = self.dir_totals
+        trees = []
+        for root in self._top_roots:
+            prefix = root.rstrip(os.sep) + os.sep
+            subset = {path: value for path, value in totals.items()
+                      if path == root or path.startswith(prefix)}
+            trees.append(build_dir_tree(root, subset))
+        if len(trees) == 1:
+            return trees[0]
+        node = DirNode(os.pathsep.join(self._top_roots))
+        node.children = sorted(trees, key=lambda n: n.total_bytes, reverse=True)
+        node.total_bytes = sum(tree.total_bytes for tree in trees)
+        node.total_files = sum(tree.total_files for tree in trees)
+        return node
+
+    def _device_groups(self):
+        """Scanners agrupados pelo dispositivo da raiz"""
+        groups = {}
+        for scanner in self.scanners:
+            try:
+                device = os.stat(scanner.root).st_dev
+            except OSError:
+                device = scanner.root
+            groups.setdefault(device, []).append(scanner)
+        return list(groups.values())
+
+    def scan(self):
+        """Gera os FileEntry de todas as raízes à medida que são encontrados"""
+        self.metrics = ScanMetrics()
+        self.finished_roots = set()
+        self.started_at = time.perf_counter()
+        self.finished_at = None
+        results = queue.Queue()
+
+        def run(scanners):
+            try:
+                for scanner in scanners:
+                    if self._cancel.is_set():
+                        break
+                    for entry in scanner.scan():
+                        results.put(entry)
+                    self.metrics.merge(scanner.metrics, skip_phases=("scan",))
+                    self.finished_roots.add(scanner.root)
+            except Exception as e:
+                results.put(e)
+            finally:
+                results.put(None)
+
+        groups = self._device_groups()
+        for scanners in groups:
+            threading.Thread(target=run, args=(scanners,), daemon=True).start()
+        running = len(groups)
+        seen_inodes = set()
+        try:
+            while running:
+                item = results.get()
+                if item is None:
+                    running -= 1
+                elif isinstance(item, Exception):
+                    raise item
+                elif item.inode is None or item.inode not in seen_inodes:
+                    if item.inode is not None:
+                        seen_inodes.add(item.inode)
+                    yield item
+        finally:
+            if running:
+                # Consumidor parou antes do fim: as raízes param de listar
+                for scanner in self.scanners:
+                    scanner.cancel()
+            self.finished_at = time.perf_counter()
+            self.metrics.add_time("scan", self.finished_at - self.started_at)
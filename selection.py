@@ -0,0 +1,157 @@
+from resultset import ResultSet
+
+
+class SelectionModel:
+    """
+    Modelo dos resultados exibidos na lista: linhas FileEntry (ou tuplas
+    que comecem com path e size) guardadas num ResultSet compacto e o
+    estado de seleção num bytearray, um byte por linha.
+    Quantidade e bytes selecionados são mantidos a cada alteração, com os
+    tamanhos da varredura, sem percorrer as linhas nem acessar o disco.
+    weight(row) define os bytes de cada linha (padrão: row[1]).
+    Não depende do Tk.
+    """
+
+    def __init__(self, weight=None):
+        self.weight = weight or (lambda row: row[1])
+        self.rows = ResultSet()
+        self.flags = bytearray()
+        # path -> posição, construído sob demanda
+        self._positions = None
+        self._total_bytes = 0
+        self._selected_count = 0
+        self._selected_bytes = 0
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __getitem__(self, index):
+        return self.rows[index]
+
+    def clear(self):
+        """Remove todas as linhas"""
+        self.rows = ResultSet()
+        self.flags = bytearray()
+        self._positions = None
+        self._total_bytes = 0
+        self._selected_count = 0
+        self._selected_bytes = 0
+
+    def extend(self, rows):
+        """Acrescenta linhas desmarcadas"""
+        self._positions = None
+        rows = list(rows)
+        self.rows.extend(rows)
+        self._total_bytes += sum(map(self.weight, rows))
+        self.flags.extend(bytes(len(self.rows) - len(self.flags)))
+
+    def sort_by_size(self, reverse=True):
+        """Ordena as linhas pelo espaço em disco preservando a seleção"""
+        order = self.rows.size_order(reverse)
+        self.rows = self.rows.take(order)
+        self.flags = bytearray(self.flags[i] for i in order)
+        self._positions = None
+
+    def index_of(self, path):
+        """Posição de um caminho na lista ou None"""
+        if self._positions is None:
+            self._positions = {path: i for i, path in enumerate(self.rows.paths())}
+        return self._positions.get(path)
+
+    def upsert(self, row):
+        """
+        Acrescenta ou atualiza a linha com o mesmo caminho.
+        Retorna a linha anterior ou None se a linha é nova.
+        """
+        index = self.index_of(row[0])
+        if index is None:
+            self.rows.append(row)
+            self.flags.append(0)
+            self._total_bytes += self.weight(row)
+            self._positions[row[0]] = len(self.rows) - 1
+            return None
+        previous = self.rows[index]
+        self.rows[index] = row
+        delta = self.weight(row) - self.weight(previous)
+        self._total_bytes += delta
+        if self.flags[index]:
+            self._selected_bytes += delta
+        return previous
+
+    def remove(self, path):
+        """Remove uma linha; retorna a linha removida ou None"""
+        index = self.index_of(path)
+        if index is None:
+            return None
+        previous = self.rows[index]
+        self._total_bytes -= self.weight(previous)
+        if self.flags[index]:
+            self._selected_count -= 1
+            self._selected_bytes -= self.weight(previous)
+        del self.rows[index]
+        del self.flags[index]
+        self._positions = None
+        return previous
+
+    def remove_paths(self, paths):
+        """Remove várias linhas numa única passada; retorna as linhas removidas"""
+        paths = set(paths)
+        keep = []
+        keep_flags = bytearray()
+        removed = []
+        for index, (path, flag) in enumerate(zip(self.rows.paths(), self.flags)):
+            if path in paths:
+                row = self.rows[index]
+                removed.append(row)
+                self._total_bytes -= self.weight(row)
+                if flag:
+                    self._selected_count -= 1
+                    self._selected_bytes -= self.weight(row)
+            else:
+                keep.append(index)
+                keep_flags.append(flag)
+        self.rows = self.rows.take(keep)
+        self.flags = keep_flags
+        self._positions = None
+        return removed
+
+    def is_selected(self, index):
+        return bool(self.flags[index])
+
+    def set_selected(self, index, value):
+        if bool(self.flags[index]) != bool(value):
+            self.toggle(index)
+
+    def toggle(self, index):
+        """Inverte a seleção de uma linha e retorna o novo estado"""
+        self.flags[index] ^= 1
+        selected = bool(self.flags[index])
+        sign = 1 if selected else -1
+        self._selected_count += sign
+        self._selected_bytes += sign * self.weight(self.rows[index])
+        return selected
+
+    def select_all(self):
+        self.flags = bytearray(b"\x01" * len(self.rows))
+        self._selected_count = len(self.rows)
+        self._selected_bytes = self._total_bytes
+
+    def clear_selection(self):
+        self.flags = bytearray(len(self.rows))
+        self._selected_count = 0
+        self._selected_bytes = 0
+
+    def selected_count(self):
+        return self._selected_count
+
+    def total_bytes(self):
+        """Soma dos tamanhos de todas as linhas"""
+        return self._total_bytes
+
+    def selected_bytes(self):
+        """Soma dos tamanhos das linhas marcadas"""
+        return self._selected_bytes
+
+    def selected_paths(self):
+        """Retorna os caminhos das linhas marcadas"""
+        return [path for path, flag in zip(self.rows.paths(), self.flags) if flag]
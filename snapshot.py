@@ -0,0 +1,248 @@
+"""
+Snapshots de varreduras e comparação entre eles.
+
+Um snapshot guarda os arquivos encontrados e os totais de cada pasta
+(subárvore inteira) em registros binários ordenados por caminho, dentro
+de um gzip. Como os dois lados estão ordenados, a comparação é uma
+intercalação em fluxo: nenhum dos snapshots é carregado inteiro.
+"""
+import gzip
+import heapq
+import json
+import os
+import struct
+import tempfile
+import time
+from collections import namedtuple
+from scanner import disk_usage
+
+MAGIC = b"LMPSNAP1\n"
+
+# Registro: tipo ("f" arquivo, "d" pasta), caminho, tamanho, espaço em
+# disco, mtime e número de arquivos (1 num arquivo, da subárvore numa pasta)
+SnapshotRecord = namedtuple("SnapshotRecord", ["kind", "path", "size", "disk", "mtime", "files"])
+
+FILE = "f"
+DIR = "d"
+
+_RECORD = struct.Struct("<cHQQdQ")
+
+# Registros ordenados em memória antes de irem para um arquivo temporário
+SORT_CHUNK = 200_000
+
+# O nível 9 (padrão do gzip) é dez vezes mais lento e quase não reduz mais
+COMPRESS_LEVEL = 6
+
+# Uma diferença: old/new são o espaço em disco (None quando não existia)
+DiffItem = namedtuple("DiffItem", ["path", "kind", "old", "new"])
+
+
+def _sort_key(record):
+    return record.kind, record.path
+
+
+def _encode(record):
+    path = os.fsencode(record.path)
+    return _RECORD.pack(record.kind.encode(), len(path), record.size, record.disk, record.mtime,
+                        record.files) + path
+
+
+def _read_records(f):
+    read = f.read
+    size = _RECORD.size
+    while True:
+        header = read(size)
+        if len(header) < size:
+            return
+        kind, length, file_size, disk, mtime, files = _RECORD.unpack(header)
+        yield SnapshotRecord(kind.decode(), os.fsdecode(read(length)), file_size, disk, mtime, files)
+
+
+def scan_records(entries, dir_tree=None):
+    """Registros (fora de ordem) dos FileEntry e da árvore de pastas de uma varredura"""
+    for entry in entries:
+        yield SnapshotRecord(FILE, entry.path, entry.size, disk_usage(entry), entry.mtime, 1)
+    if dir_tree is not None:
+        # Com várias raízes independentes, o nó de cima só as reúne
+        virtual = (len(dir_tree.children) > 1
+                   and set(dir_tree.path.split(os.pathsep)) == {child.path for child in dir_tree.children})
+        for node in dir_tree.walk():
+            if node is not dir_tree or not virtual:
+                yield SnapshotRecord(DIR, node.path, node.total_bytes, node.total_bytes, 0.0, node.total_files)
+
+
+def _sorted(records, workdir):
+    """Ordena em blocos de SORT_CHUNK gravados em disco e intercala os blocos"""
+    runs = []
+    chunk = []
+
+    def flush():
+        chunk.sort(key=_sort_key)
+        run = tempfile.TemporaryFile(dir=workdir)
+        run.write(b"".join(_encode(record) for record in chunk))
+        run.seek(0)
+        runs.append(run)
+        chunk.clear()
+
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= SORT_CHUNK:
+            flush()
+    if not runs:
+        chunk.sort(key=_sort_key)
+        yield from chunk
+        return
+    if chunk:
+        flush()
+    try:
+        yield from heapq.merge(*(_read_records(run) for run in runs), key=_sort_key)
+    finally:
+        for run in runs:
+            run.close()
+
+
+def write_snapshot(path, records, meta=None):
+    """
+    Grava um snapshot com os registros em ordem de (tipo, caminho).
+    meta (serializável em JSON) vai no cabeçalho, com a data de criação.
+    Retorna o número de registros.
+    """
+    header = dict(meta or {}, created=time.time())
+    folder = os.path.dirname(os.path.abspath(path))
+    part = path + ".part"
+    count = 0
+    with gzip.open(part, "wb", compresslevel=COMPRESS_LEVEL) as f:
+        f.write(MAGIC)
+        f.write(json.dumps(header, ensure_ascii=False).encode() + b"\n")
+        buffer = []
+        for record in _sorted(records, folder):
+            buffer.append(_encode(record))
+            count += 1
+            if len(buffer) >= 4096:
+                f.write(b"".join(buffer))
+                buffer = []
+        f.write(b"".join(buffer))
+    os.replace(part, path)
+    return count
+
+
+def read_meta(path):
+    """Cabeçalho de um snapshot"""
+    with gzip.open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"Não é um snapshot: {path}")
+        return json.loads(f.readline())
+
+
+def read_snapshot(path):
+    """Gera os registros de um snapshot, em ordem"""
+    with gzip.open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"Não é um snapshot: {path}")
+        f.readline()
+        yield from _read_records(f)
+
+
+class _Largest:
+    """Os limit itens de maior chave vistos até agora"""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self._heap = []
+        self._seq = 0
+
+    def push(self, key, item):
+        self._seq += 1
+        entry = (key, self._seq, item)
+        if len(self._heap) < self.limit:
+            heapq.heappush(self._heap, entry)
+        elif entry > self._heap[0]:
+            heapq.heapreplace(self._heap, entry)
+
+    def items(self):
+        return [item for _, _, item in sorted(self._heap, reverse=True)]
+
+
+class SnapshotDiff:
+    """
+    Resultado da comparação: totais de arquivos e pastas novos,
+    removidos e alterados, e os limit maiores de cada grupo.
+    """
+
+    GROUPS = ("added", "removed", "grown", "shrunk")
+
+    def __init__(self, limit=20):
+        self.limit = limit
+        self.counts = {kind: {group: 0 for group in self.GROUPS} for kind in (FILE, DIR)}
+        self.bytes = {kind: {group: 0 for group in self.GROUPS} for kind in (FILE, DIR)}
+        self._top = {kind: {group: _Largest(limit) for group in self.GROUPS} for kind in (FILE, DIR)}
+
+    def _add(self, kind, group, amount, item):
+        self.counts[kind][group] += 1
+        self.bytes[kind][group] += amount
+        self._top[kind][group].push(amount, item)
+
+    def compare(self, old, new):
+        """Registra a diferença entre dois registros do mesmo caminho (um pode ser None)"""
+        if new is None:
+            self._add(old.kind, "removed", old.disk, DiffItem(old.path, old.kind, old.disk, None))
+        elif old is None:
+            self._add(new.kind, "added", new.disk, DiffItem(new.path, new.kind, None, new.disk))
+        elif new.disk > old.disk:
+            self._add(new.kind, "grown", new.disk - old.disk, DiffItem(new.path, new.kind, old.disk, new.disk))
+        elif new.disk < old.disk:
+            self._add(new.kind, "shrunk", old.disk - new.disk, DiffItem(new.path, new.kind, old.disk, new.disk))
+
+    def top(self, kind, group):
+        """Maiores itens de um grupo, do maior para o menor"""
+        return self._top[kind][group].items()
+
+    @property
+    def growth(self):
+        """Variação líquida do espaço ocupado pelos arquivos"""
+        files = self.bytes[FILE]
+        return files["added"] + files["grown"] - files["removed"] - files["shrunk"]
+
+    def to_dict(self):
+        names = {FILE: "files", DIR: "dirs"}
+        return {
+            "growth": self.growth,
+            **{names[kind]: {
+                group: {
+                    "count": self.counts[kind][group],
+                    "bytes": self.bytes[kind][group],
+                    "top": [item._asdict() for item in self.top(kind, group)],
+                } for group in self.GROUPS
+            } for kind in (FILE, DIR)},
+        }
+
+
+def _merge(old, new):
+    """Intercala dois fluxos ordenados; gera (antigo, novo) com None no lado ausente"""
+    old = iter(old)
+    new = iter(new)
+    a = next(old, None)
+    b = next(new, None)
+    while a is not None or b is not None:
+        if b is None or (a is not None and _sort_key(a) < _sort_key(b)):
+            yield a, None
+            a = next(old, None)
+        elif a is None or _sort_key(b) < _sort_key(a):
+            yield None, b
+            b = next(new, None)
+        else:
+            yield a, b
+            a = next(old, None)
+            b = next(new, None)
+
+
+def diff(old, new, limit=20):
+    """
+    Compara dois fluxos de registros em ordem de (tipo, caminho), como os
+    de read_snapshot, com memória limitada aos limit maiores de cada grupo.
+    Retorna um SnapshotDiff.
+    """
+    result = SnapshotDiff(limit)
+    for a, b in _merge(old, new):
+        result.compare(a, b)
+    return result
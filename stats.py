@@ -0,0 +1,145 @@
+import itertools
+import os
+import time
+from classifier import get_classifier
+from scanner import disk_usage
+
+try:
+    import pwd
+except ImportError:  # Windows
+    pwd = None
+
+# Limites (em dias) das faixas de idade
+AGE_BUCKETS = [
+    (7, "até 1 semana"),
+    (30, "até 1 mês"),
+    (180, "até 6 meses"),
+    (365, "até 1 ano"),
+    (None, "mais de 1 ano"),
+]
+
+# Arquivos classificados por vez em collect_stats
+STATS_BATCH = 1000
+
+GROUPINGS = ("category", "extension", "owner", "age", "size")
+
+
+def size_bucket(size):
+    """Faixa logarítmica (potência de 2) de um tamanho"""
+    return size.bit_length()
+
+
+def size_bucket_label(bucket, format_size):
+    if bucket == 0:
+        return format_size(0)
+    return f"{format_size(1 << (bucket - 1))} – {format_size(1 << bucket)}"
+
+
+def owner_name(uid):
+    if uid is None:
+        return "desconhecido"
+    if pwd is not None:
+        try:
+            return pwd.getpwuid(uid).pw_name
+        except KeyError:
+            pass
+    return str(uid)
+
+
+class ScanStats:
+    """
+    Contadores (arquivos, bytes) agrupados por categoria, extensão, dono,
+    faixa de idade e faixa de tamanho, atualizados arquivo a arquivo
+    durante a varredura. Ler o resultado custa O(grupos), sem stat.
+    Os bytes são o espaço em disco (scanner.disk_usage); a faixa de
+    tamanho usa o tamanho aparente.
+
+    remove() desconta da categoria atribuída em add(): o arquivo pode já
+    ter sido excluído, e o cabeçalho não pode mais ser lido. Só as
+    categorias que diferem da extensão são guardadas, por caminho.
+    """
+
+    def __init__(self, now=None, classifier=None):
+        self.now = time.time() if now is None else now
+        self.classifier = classifier or get_classifier()
+        self.total_files = 0
+        self.total_bytes = 0
+        self.groups = {name: {} for name in GROUPINGS}
+        self._sniffed = {}
+
+    def _keys(self, entry, category):
+        ext = os.path.splitext(entry.path)[1].lower()
+        if entry.mtime is None:
+            age = "desconhecida"
+        else:
+            days = (self.now - entry.mtime) / 86400
+            age = next(label for limit, label in AGE_BUCKETS if limit is None or days <= limit)
+        return (
+            ("category", category),
+            ("extension", ext or "(sem extensão)"),
+            ("owner", entry.uid),
+            ("age", age),
+            ("size", size_bucket(entry.size)),
+        )
+
+    def add(self, entry):
+        self._add(entry, self.classifier.category(entry.path))
+
+    def add_many(self, entries):
+        """Acrescenta um lote; cabeçalhos a identificar são lidos em paralelo"""
+        categories = self.classifier.classify_many([entry.path for entry in entries])
+        for entry, category in zip(entries, categories):
+            self._add(entry, category)
+
+    def _add(self, entry, category):
+        if category != self.classifier.by_name(entry.path):
+            self._sniffed[entry.path] = category
+        else:
+            self._sniffed.pop(entry.path, None)
+        self._update(entry, category, 1)
+
+    def remove(self, entry):
+        category = self._sniffed.pop(entry.path, None) or self.classifier.by_name(entry.path)
+        self._update(entry, category, -1)
+
+    def _update(self, entry, category, sign):
+        usage = disk_usage(entry)
+        self.total_files += sign
+        self.total_bytes += sign * usage
+        for name, key in self._keys(entry, category):
+            counters = self.groups[name].get(key)
+            if counters is None:
+                counters = self.groups[name][key] = [0, 0]
+            counters[0] += sign
+            counters[1] += sign * usage
+            if counters[0] == 0:
+                del self.groups[name][key]
+
+    def top(self, name, limit=None):
+        """Grupos de um agrupamento como (chave, arquivos, bytes), do maior para o menor"""
+        items = sorted(self.groups[name].items(), key=lambda kv: kv[1][1], reverse=True)
+        if limit:
+            items = items[:limit]
+        return [(key, count, size) for key, (count, size) in items]
+
+    def to_dict(self):
+        return {
+            "total_files": self.total_files,
+            "total_bytes": self.total_bytes,
+            "groups": {
+                name: [{"key": owner_name(key) if name == "owner" else key, "files": count, "bytes": size}
+                       for key, count, size in self.top(name)]
+                for name in GROUPINGS
+            },
+        }
+
+
+def collect_stats(entries, now=None):
+    """Calcula um ScanStats para uma sequência de FileEntry"""
+    stats = ScanStats(now)
+    entries = iter(entries)
+    while True:
+        batch = list(itertools.islice(entries, STATS_BATCH))
+        if not batch:
+            return stats
+        stats.add_many(batch)
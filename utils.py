@@ -1,6 +1,21 @@
+import os
+import sys
+
 def format_size(size):
     for unit in ['B', 'KB', 'MB', 'GB']:
-        if size < 1024:
+        if abs(size) < 1024:
             return f"{size:.2f} {unit}"
         size /= 1024
     return f"{size:.2f} TB"
+
+def get_cache_dir():
+    """Retorna (e cria) a pasta de cache do usuário para o aplicativo"""
+    if os.name == "nt":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~\\AppData\\Local")
+    elif sys.platform == "darwin":
+        base = os.path.expanduser("~/Library/Caches")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    path = os.path.join(base, "limpador-arquivos")
+    os.makedirs(path, exist_ok=True)
+    return path
@@ -0,0 +1,306 @@
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from scanner import QUARANTINE_DIRNAME, Scanner, disk_usage, entry_from_stat
+
+# Constantes de <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+              | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+
+_EVENT_HEADER = struct.Struct("iIII")
+
+# Eventos de escrita são agrupados e processados a cada intervalo
+COALESCE_SECONDS = 0.5
+
+
+class WatchLimitError(OSError):
+    """O limite de watches do inotify (max_user_watches) foi atingido"""
+
+
+class _Inotify:
+    """Acesso mínimo ao inotify do Linux via ctypes"""
+
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._rm_watch = libc.inotify_rm_watch
+        self._rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+
+    def add_watch(self, path, mask):
+        wd = self._add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            err = ctypes.get_errno()
+            if err == errno.ENOSPC:
+                raise WatchLimitError(err, "Limite de watches do inotify atingido", path)
+            raise OSError(err, os.strerror(err), path)
+        return wd
+
+    def rm_watch(self, wd):
+        self._rm_watch(self.fd, wd)
+
+    def read_events(self, timeout):
+        """Retorna lista de (wd, mask, name) ou [] após timeout segundos"""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        events = []
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+            offset += length
+            events.append((wd, mask, name))
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+
+def inotify_available():
+    if not sys.platform.startswith("linux"):
+        return False
+    libc = ctypes.CDLL(ctypes.util.find_library("c") or None)
+    return hasattr(libc, "inotify_init1")
+
+
+class TreeWatcher:
+    """
+    Mantém atualizado o conjunto de arquivos grandes de uma árvore após a
+    varredura inicial. Usa inotify no Linux e, se ele não estiver
+    disponível ou o limite de watches for atingido, recorre a varreduras
+    periódicas.
+
+    on_event(kind, entry) é chamado na thread do watcher com kind em
+    "add", "update" ou "remove"; entry é o FileEntry novo ou, na remoção,
+    o último conhecido. initial são os FileEntry da varredura inicial.
+    """
+
+    def __init__(self, root, min_bytes, on_event, file_filter=None, initial=None,
+                 poll_interval=30, workers=1):
+        self.root = root
+        self.min_bytes = min_bytes
+        self.on_event = on_event
+        self.file_filter = file_filter
+        self.poll_interval = poll_interval
+        self.workers = workers
+        self.files = {entry.path: entry for entry in initial or ()}
+        self.mode = None
+        self._stop = threading.Event()
+        self._thread = None
+        self._inotify = None
+        self._watches = {}
+        self._include = file_filter.path_checker(root) if file_filter is not None else None
+        self._root_dev = None
+        if file_filter is not None and file_filter.one_file_system:
+            try:
+                self._root_dev = os.stat(root).st_dev
+            except OSError:
+                pass
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self):
+        if inotify_available():
+            try:
+                self._inotify = _Inotify()
+                self._watch_tree(self.root)
+                self.mode = "inotify"
+            except OSError:
+                self._close_inotify()
+        if self._inotify is not None:
+            self._run_inotify()
+        else:
+            self.mode = "polling"
+            self._run_polling()
+
+    def _close_inotify(self):
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+            self._watches.clear()
+
+    # Varredura e comparação
+
+    def _included(self, path, is_dir):
+        name = os.path.basename(path)
+        if is_dir and name == QUARANTINE_DIRNAME:
+            return False
+        return self._include is None or self._include(path, name, is_dir)
+
+    def _matches(self, entry):
+        if disk_usage(entry) < self.min_bytes:
+            return False
+        match = self.file_filter.match if self.file_filter is not None else None
+        return match is None or match(entry)
+
+    def _emit(self, kind, entry):
+        if kind == "remove":
+            self.files.pop(entry.path, None)
+        else:
+            self.files[entry.path] = entry
+        self.on_event(kind, entry)
+
+    def _compare(self, entry):
+        previous = self.files.get(entry.path)
+        if previous is None:
+            self._emit("add", entry)
+        elif (previous.size, previous.disk) != (entry.size, entry.disk):
+            self._emit("update", entry)
+
+    def _check_file(self, path):
+        """Reavalia um arquivo e emite o evento correspondente"""
+        try:
+            st = os.stat(path)
+            entry = entry_from_stat(path, st)
+            wanted = self._included(path, False) and self._matches(entry)
+        except OSError:
+            wanted = False
+        if wanted:
+            self._compare(entry)
+        elif path in self.files:
+            self._emit("remove", self.files[path])
+
+    def _forget_subtree(self, path):
+        prefix = path.rstrip(os.sep) + os.sep
+        for tracked in [e for p, e in self.files.items() if p.startswith(prefix)]:
+            self._emit("remove", tracked)
+
+    def _resync(self, root):
+        """Varre root e emite as diferenças em relação ao conjunto atual"""
+        scanner = Scanner(root, self.min_bytes, workers=self.workers, file_filter=self.file_filter,
+                          base=self.root)
+        found = {}
+        for entry in scanner.scan():
+            if self._stop.is_set():
+                return
+            found[entry.path] = entry
+        prefix = root.rstrip(os.sep) + os.sep
+        for tracked in [e for p, e in self.files.items() if p.startswith(prefix) and p not in found]:
+            self._emit("remove", tracked)
+        for entry in found.values():
+            self._compare(entry)
+
+    # Modo inotify
+
+    def _watch_tree(self, root):
+        pending = [root]
+        while pending:
+            path = pending.pop()
+            try:
+                wd = self._inotify.add_watch(path, WATCH_MASK)
+            except WatchLimitError:
+                raise
+            except OSError:
+                continue
+            self._watches[wd] = path
+            try:
+                with os.scandir(path) as it:
+                    for entry in it:
+                        if entry.is_dir(follow_symlinks=False) and self._included(entry.path, True):
+                            if self._root_dev is not None and entry.stat(follow_symlinks=False).st_dev != self._root_dev:
+                                continue
+                            pending.append(entry.path)
+            except OSError:
+                pass
+
+    def _unwatch_subtree(self, path):
+        prefix = path.rstrip(os.sep) + os.sep
+        for wd, watched in list(self._watches.items()):
+            if watched == path or watched.startswith(prefix):
+                self._inotify.rm_watch(wd)
+                del self._watches[wd]
+
+    def _run_inotify(self):
+        dirty = set()
+        last_flush = time.monotonic()
+        try:
+            while not self._stop.is_set():
+                for wd, mask, name in self._inotify.read_events(COALESCE_SECONDS):
+                    if mask & IN_Q_OVERFLOW:
+                        # Eventos perdidos: comparar a árvore inteira
+                        dirty.clear()
+                        self._resync(self.root)
+                        continue
+                    if mask & IN_IGNORED:
+                        self._watches.pop(wd, None)
+                        continue
+                    parent = self._watches.get(wd)
+                    if parent is None or not name:
+                        continue
+                    path = os.path.join(parent, name)
+                    if mask & IN_ISDIR:
+                        if mask & (IN_DELETE | IN_MOVED_FROM):
+                            self._unwatch_subtree(path)
+                            self._forget_subtree(path)
+                        elif mask & (IN_CREATE | IN_MOVED_TO) and self._included(path, True):
+                            self._watch_tree(path)
+                            self._resync(path)
+                    elif mask & (IN_DELETE | IN_MOVED_FROM):
+                        dirty.discard(path)
+                        if path in self.files:
+                            self._emit("remove", self.files[path])
+                    else:
+                        dirty.add(path)
+
+                now = time.monotonic()
+                if dirty and now - last_flush >= COALESCE_SECONDS:
+                    for path in dirty:
+                        self._check_file(path)
+                    dirty.clear()
+                    last_flush = now
+        except WatchLimitError:
+            # Limite atingido ao acompanhar novas pastas: trocar de modo
+            self._close_inotify()
+            self.mode = "polling"
+            self._run_polling()
+            return
+        finally:
+            self._close_inotify()
+
+    # Modo polling
+
+    def _run_polling(self):
+        while not self._stop.wait(self.poll_interval):
+            self._resync(self.root)
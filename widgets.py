@@ -0,0 +1,104 @@
+import tkinter as tk
+import customtkinter as ctk
+from utils import format_size
+
+
+class VirtualList(ctk.CTkFrame):
+    """
+    Lista virtualizada de resultados: desenha num Canvas apenas as linhas
+    visíveis do SelectionModel, com uma caixa de seleção por linha.
+    O custo de redesenho depende da altura da janela, não do número de
+    arquivos.
+    """
+
+    ROW_HEIGHT = 24
+
+    def __init__(self, master, model, on_change=None, empty_text="", **kwargs):
+        super().__init__(master, **kwargs)
+        self.model = model
+        self.on_change = on_change
+        self.empty_text = empty_text
+        self.offset = 0
+
+        self.canvas = tk.Canvas(self, highlightthickness=0, borderwidth=0)
+        self.scrollbar = ctk.CTkScrollbar(self, command=self._on_scrollbar)
+        self.scrollbar.pack(side="right", fill="y")
+        self.canvas.pack(side="left", fill="both", expand=True)
+
+        self.canvas.bind("<Configure>", lambda event: self.refresh())
+        self.canvas.bind("<Button-1>", self._on_click)
+        self.canvas.bind("<MouseWheel>", self._on_mousewheel)
+        self.canvas.bind("<Button-4>", lambda event: self._scroll_units(-3))
+        self.canvas.bind("<Button-5>", lambda event: self._scroll_units(3))
+
+    def format_row(self, row):
+        """Texto exibido para uma linha (path, size) ou FileEntry"""
+        path, size = row[0], row[1]
+        disk = getattr(row, "disk", None)
+        if disk is not None and disk < size:
+            # Arquivo esparso: ocupa menos do que o tamanho aparente
+            return f"{path} ({format_size(size)}, {format_size(disk)} em disco)"
+        return f"{path} ({format_size(size)})"
+
+    def refresh(self):
+        """Redesenha as linhas visíveis e atualiza a barra de rolagem"""
+        total = len(self.model) * self.ROW_HEIGHT
+        height = max(self.canvas.winfo_height(), 1)
+        self.offset = max(0, min(self.offset, total - height))
+
+        bg, fg = self._colors()
+        self.canvas.configure(background=bg)
+        self.canvas.delete("all")
+
+        if not len(self.model):
+            if self.empty_text:
+                self.canvas.create_text(10, 10, text=self.empty_text, anchor="nw", fill=fg)
+            self.scrollbar.set(0, 1)
+            return
+
+        first = self.offset // self.ROW_HEIGHT
+        last = min(len(self.model), (self.offset + height) // self.ROW_HEIGHT + 1)
+        for index in range(first, last):
+            y = index * self.ROW_HEIGHT - self.offset + self.ROW_HEIGHT // 2
+            mark = "☑" if self.model.is_selected(index) else "☐"
+            self.canvas.create_text(8, y, text=mark, anchor="w", fill=fg, font=("Arial", 14))
+            self.canvas.create_text(32, y, text=self.format_row(self.model[index]), anchor="w", fill=fg)
+
+        if total <= height:
+            self.scrollbar.set(0, 1)
+        else:
+            self.scrollbar.set(self.offset / total, (self.offset + height) / total)
+
+    def _colors(self):
+        if ctk.get_appearance_mode() == "Dark":
+            return "#2b2b2b", "#dce4ee"
+        return "#f9f9fa", "#1a1a1a"
+
+    def _on_scrollbar(self, action, *args):
+        total = len(self.model) * self.ROW_HEIGHT
+        if action == "moveto":
+            self.offset = int(float(args[0]) * total)
+            self.refresh()
+        elif action == "scroll":
+            amount, unit = int(args[0]), args[1]
+            if unit == "pages":
+                self._scroll_units(amount * max(1, self.canvas.winfo_height() // self.ROW_HEIGHT - 1))
+            else:
+                self._scroll_units(amount)
+
+    def _scroll_units(self, rows):
+        self.offset += rows * self.ROW_HEIGHT
+        self.refresh()
+
+    def _on_mousewheel(self, event):
+        # Windows usa múltiplos de 120, macOS valores pequenos
+        step = event.delta // 120 if abs(event.delta) >= 120 else event.delta
+        self._scroll_units(-step * 3)
+
+    def _on_click(self, event):
+        index = (event.y + self.offset) // self.ROW_HEIGHT
+        if 0 <= index < len(self.model):
+            self.model.toggle(index)
+            self.refresh()
+            if self.on_change:
+                self.on_change()